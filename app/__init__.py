@@ -26,7 +26,8 @@ def create_app():
              "https://as241s4-pii-t19-fe.onrender.com"  # tu frontend
          ],
          supports_credentials=True,
-         allow_headers=["Content-Type", "Authorization"],
+         allow_headers=["Content-Type", "Authorization", "Idempotency-Key"],
+         expose_headers=["Idempotent-Replayed"],
          methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"])
 
     # Inicializar extensiones
@@ -60,6 +61,10 @@ def create_app():
     app.register_blueprint(professor_dashboard_bp, url_prefix="/api/professor/dashboard")
     app.register_blueprint(report_bp, url_prefix="/api/reports")
 
+    # Drenador del diario de asistencias (solo si ATTENDANCE_WRITE_BEHIND está activo)
+    from app.services.attendance_write_behind_service import AttendanceWriteBehindService
+    AttendanceWriteBehindService.init_app(app)
+
     # Carpeta de uploads compatible con Render
     BASE_DIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
     UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
@@ -5,6 +5,13 @@ from app.models.course_enrollment import CourseEnrollment
 from app.models.attendance_record import AttendanceRecord
 from app.models.justification import Justification
 from app.models.audit_log import AuditLog
+from app.models.student_attendance_summary import StudentAttendanceSummary
+from app.models.attendance_daily_rollup import AttendanceDailyRollup
+from app.models.attendance_record_archive import AttendanceRecordArchive
+from app.models.attendance_change import AttendanceChange
+from app.models.attendance_change_clock import AttendanceChangeClock
+from app.models.idempotency_key import IdempotencyKey
+from app.models.justification_counter import JustificationCounter
 
 __all__ = [
     'Student',
@@ -13,5 +20,12 @@ __all__ = [
     'CourseEnrollment',
     'AttendanceRecord',
     'Justification',
-    'AuditLog'
+    'AuditLog',
+    'StudentAttendanceSummary',
+    'AttendanceDailyRollup',
+    'AttendanceRecordArchive',
+    'AttendanceChange',
+    'AttendanceChangeClock',
+    'IdempotencyKey',
+    'JustificationCounter'
 ]
\ No newline at end of file
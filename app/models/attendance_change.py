@@ -0,0 +1,34 @@
+from app import db
+from datetime import datetime
+
+class AttendanceChange(db.Model):
+    """Secuencia de cambios de asistencia (base de la sincronización incremental)"""
+    __tablename__ = 'attendance_changes'
+    __table_args__ = (
+        # Cambios de un curso o de un estudiante a partir de un token
+        db.Index('ix_att_changes_course_seq', 'course_id', 'seq'),
+        db.Index('ix_att_changes_student_seq', 'student_id', 'seq'),
+        {'schema': 'DEVELOPER_01'}
+    )
+    
+    # Token de cambio: creciente, uno por escritura de una clave
+    seq = db.Column(db.Integer, db.Identity(), primary_key=True)
+    student_id = db.Column(db.Integer, nullable=False)
+    course_id = db.Column(db.Integer, nullable=False)
+    attendance_date = db.Column(db.Date, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)  # UPSERT, DELETE
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self):
+        """Convertir a diccionario"""
+        return {
+            'seq': self.seq,
+            'student_id': self.student_id,
+            'course_id': self.course_id,
+            'attendance_date': self.attendance_date.isoformat() if self.attendance_date else None,
+            'operation': self.operation,
+            'changed_at': self.changed_at.isoformat() if self.changed_at else None
+        }
+    
+    def __repr__(self):
+        return f'<AttendanceChange {self.seq}: {self.operation} Student {self.student_id} - Course {self.course_id}>'
@@ -0,0 +1,15 @@
+from app import db
+from datetime import datetime
+
+class AttendanceChangeClock(db.Model):
+    """Turno de escritura de attendance_changes (una fila por secuencia)"""
+    __tablename__ = 'attendance_change_clock'
+    __table_args__ = {'schema': 'DEVELOPER_01'}
+    
+    # Cada transacción que registra cambios bloquea esta fila hasta su commit:
+    # los tokens quedan ordenados según el orden de confirmación
+    name = db.Column(db.String(20), primary_key=True)
+    ticked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<AttendanceChangeClock {self.name}: {self.ticked_at}>'
@@ -0,0 +1,33 @@
+from app import db
+
+class AttendanceDailyRollup(db.Model):
+    """Contadores de asistencia por estudiante y día (base de las ventanas móviles)"""
+    __tablename__ = 'attendance_daily_rollup'
+    __table_args__ = (
+        # Ventanas de fechas de toda la cohorte (window_cohort_query)
+        db.Index('ix_att_rollup_date', 'rollup_date', 'student_id'),
+        {'schema': 'DEVELOPER_01'}
+    )
+    
+    student_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    rollup_date = db.Column(db.Date, primary_key=True)
+    total_classes = db.Column(db.Integer, default=0, nullable=False)
+    present = db.Column(db.Integer, default=0, nullable=False)
+    absent = db.Column(db.Integer, default=0, nullable=False)
+    justified = db.Column(db.Integer, default=0, nullable=False)
+    late = db.Column(db.Integer, default=0, nullable=False)
+    
+    def to_dict(self):
+        """Convertir a diccionario"""
+        return {
+            'student_id': self.student_id,
+            'rollup_date': self.rollup_date.isoformat() if self.rollup_date else None,
+            'total_classes': self.total_classes,
+            'present': self.present,
+            'absent': self.absent,
+            'justified': self.justified,
+            'late': self.late
+        }
+    
+    def __repr__(self):
+        return f'<AttendanceDailyRollup Student {self.student_id} - {self.rollup_date}>'
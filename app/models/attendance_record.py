@@ -4,7 +4,17 @@ from datetime import datetime
 class AttendanceRecord(db.Model):
     """Modelo para registros de asistencia"""
     __tablename__ = 'attendance_records'
-    __table_args__ = {'schema': 'DEVELOPER_01'}
+    __table_args__ = (
+        # Un solo registro por estudiante, curso y fecha (hace idempotente el upsert masivo)
+        db.UniqueConstraint('student_id', 'course_id', 'attendance_date', name='uq_attendance_student_course_date'),
+        # Lista de una sesión, matriz y analítica por curso (cubre el estado)
+        db.Index('ix_attendance_course_date', 'course_id', 'attendance_date', 'status', 'student_id'),
+        # Historial y ventanas por estudiante
+        db.Index('ix_attendance_student_date', 'student_id', 'attendance_date', 'status'),
+        # Listado general ordenado por fecha (paginación por cursor)
+        db.Index('ix_attendance_date_id', 'attendance_date', 'id'),
+        {'schema': 'DEVELOPER_01'}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, nullable=False)
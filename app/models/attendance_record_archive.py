@@ -0,0 +1,41 @@
+from app import db
+from datetime import datetime
+
+class AttendanceRecordArchive(db.Model):
+    """Registros de asistencia de semestres cerrados (fuera de la tabla viva)"""
+    __tablename__ = 'attendance_records_archive'
+    __table_args__ = (
+        db.Index('ix_archive_semester', 'semester'),
+        db.Index('ix_archive_student_course', 'student_id', 'course_id', 'attendance_date'),
+        {'schema': 'DEVELOPER_01'}
+    )
+    
+    # Se conserva el id original para poder restaurar el semestre
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    student_id = db.Column(db.Integer, nullable=False)
+    course_id = db.Column(db.Integer, nullable=False)
+    attendance_date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    notes = db.Column(db.String(500))
+    recorded_by = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime)
+    semester = db.Column(db.String(10), nullable=False)  # ej. 2025-I
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convertir a diccionario"""
+        return {
+            'id': self.id,
+            'student_id': self.student_id,
+            'course_id': self.course_id,
+            'attendance_date': self.attendance_date.isoformat() if self.attendance_date else None,
+            'status': self.status,
+            'notes': self.notes,
+            'recorded_by': self.recorded_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'semester': self.semester,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+    
+    def __repr__(self):
+        return f'<AttendanceRecordArchive {self.id}: {self.semester} - Student {self.student_id}>'
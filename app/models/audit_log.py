@@ -3,7 +3,13 @@ from datetime import datetime
 
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
-    __table_args__ = {'schema': 'DEVELOPER_02'}
+    __table_args__ = (
+        # Listado por fecha (paginación por cursor) y filtros por usuario o acción
+        db.Index('ix_audit_created_id', 'created_at', 'id'),
+        db.Index('ix_audit_user_created', 'user_id', 'created_at'),
+        db.Index('ix_audit_action_created', 'action', 'created_at'),
+        {'schema': 'DEVELOPER_02'}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer)
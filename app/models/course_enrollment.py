@@ -4,7 +4,13 @@ from datetime import datetime
 class CourseEnrollment(db.Model):
     """Modelo para inscripciones de estudiantes a cursos"""
     __tablename__ = 'course_enrollments'
-    __table_args__ = {'schema': 'DEVELOPER_01'}
+    __table_args__ = (
+        # Roster activo de un curso (cubre student_id)
+        db.Index('ix_enrollment_course_status', 'course_id', 'status', 'student_id'),
+        # Cursos de un estudiante
+        db.Index('ix_enrollment_student_status', 'student_id', 'status'),
+        {'schema': 'DEVELOPER_01'}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, nullable=False)
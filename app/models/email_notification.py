@@ -13,7 +13,7 @@ class EmailNotification(db.Model):
     notification_type = db.Column(db.String(50), nullable=False)
     related_table = db.Column(db.String(50))
     related_id = db.Column(db.Integer)
-    status = db.Column(db.String(20), default='PENDING')  # PENDING, SENT, FAILED
+    status = db.Column(db.String(20), default='PENDING')  # PENDING, SENDING, SENT, FAILED
     sent_at = db.Column(db.DateTime)
     error_message = db.Column(db.String(1000))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
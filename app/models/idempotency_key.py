@@ -0,0 +1,23 @@
+from app import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """Respuestas guardadas por Idempotency-Key (reintentos de clientes móviles)"""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        # Limpieza de claves vencidas
+        db.Index('ix_idempotency_expires', 'expires_at'),
+        {'schema': 'DEVELOPER_01'}
+    )
+    
+    # Hash de método + ruta + clave enviada por el cliente
+    key_hash = db.Column(db.String(64), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    state = db.Column(db.String(20), nullable=False, default='IN_PROGRESS')  # IN_PROGRESS, DONE
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key_hash[:12]}: {self.state} {self.status_code}>'
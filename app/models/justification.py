@@ -3,7 +3,13 @@ from datetime import datetime
 
 class Justification(db.Model):
     __tablename__ = 'justifications'
-    __table_args__ = {'schema': 'DEVELOPER_02'}
+    __table_args__ = (
+        # Justificaciones de un estudiante por estado
+        db.Index('ix_justif_student_status', 'student_id', 'status', 'submission_date'),
+        # Listado por estado ordenado por fecha (paginación por cursor)
+        db.Index('ix_justif_status_submitted', 'status', 'submission_date', 'id'),
+        {'schema': 'DEVELOPER_02'}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, nullable=False)
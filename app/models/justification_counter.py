@@ -0,0 +1,30 @@
+from app import db
+from datetime import datetime
+
+class JustificationCounter(db.Model):
+    """Contadores materializados de justificaciones por estado (global, estudiante, curso, profesor)"""
+    __tablename__ = 'justification_counters'
+    __table_args__ = {'schema': 'DEVELOPER_02'}
+    
+    scope = db.Column(db.String(10), primary_key=True)  # GLOBAL, STUDENT, COURSE, PROFESSOR
+    scope_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 0 para GLOBAL
+    total = db.Column(db.Integer, default=0, nullable=False)
+    pending = db.Column(db.Integer, default=0, nullable=False)
+    approved = db.Column(db.Integer, default=0, nullable=False)
+    rejected = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convertir a diccionario"""
+        return {
+            'scope': self.scope,
+            'scope_id': self.scope_id,
+            'total': self.total,
+            'pending': self.pending,
+            'approved': self.approved,
+            'rejected': self.rejected,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<JustificationCounter {self.scope} {self.scope_id}: {self.total}>'
@@ -1,6 +1,9 @@
 from app import db
 from datetime import datetime
 from enum import Enum
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
 
 class StudentStatus(Enum):
     ACTIVO = "A"
@@ -47,9 +50,31 @@ class Student(db.Model):
         return stats.get('risk_level', 'NORMAL')
     
     def get_attendance_stats(self):
-        """Obtiene estadísticas de asistencia REALES del estudiante"""
-        from app.services.statistics_service import StatisticsService
-        return StatisticsService.calculate_student_attendance(self.id)
+        """
+        Obtiene estadísticas de asistencia REALES del estudiante
+        
+        Se calculan una sola vez por instancia (la sesión vive lo que dura la
+        petición) y se comparten entre absence_percentage, attendance_percentage
+        y risk_level. La caché se invalida cuando se escribe asistencia del estudiante.
+        """
+        stats = self.__dict__.get('_attendance_stats_cache')
+        if stats is None:
+            from app.services.statistics_service import StatisticsService
+            stats = StatisticsService.calculate_student_attendance(self.id)
+            self._attendance_stats_cache = stats
+        return stats
+    
+    def invalidate_stats(self):
+        """Descarta las estadísticas de asistencia memorizadas"""
+        self.__dict__.pop('_attendance_stats_cache', None)
+    
+    @staticmethod
+    def invalidate_cached_stats(session, student_ids):
+        """Invalida la caché de los estudiantes ya cargados en la sesión"""
+        for student_id in set(student_ids):
+            student = session.identity_map.get(identity_key(Student, student_id))
+            if student is not None:
+                student.invalidate_stats()
     
     def get_justification_stats(self):
         """Obtiene estadísticas de justificaciones REALES del estudiante"""
@@ -59,8 +84,15 @@ class Student(db.Model):
     def __repr__(self):
         return f'<Student {self.full_name}>'
     
-    def to_dict(self, include_stats=False):
-        """Convierte el estudiante a diccionario con estadísticas REALES"""
+    def to_dict(self, include_stats=False, preloaded_stats=None):
+        """
+        Convierte el estudiante a diccionario con estadísticas REALES
+        
+        Args:
+            include_stats: incluir estadísticas de asistencia y justificaciones
+            preloaded_stats: dict {'attendance': ..., 'justification': ...} obtenido
+                con StatisticsService.preload_student_stats (evita consultas por fila)
+        """
         data = {
             'id': self.id,
             'first_name': self.first_name,
@@ -79,8 +111,13 @@ class Student(db.Model):
         
         if include_stats:
             try:
-                attendance_stats = self.get_attendance_stats()
-                justification_stats = self.get_justification_stats()
+                if preloaded_stats is not None:
+                    attendance_stats = preloaded_stats['attendance']
+                    justification_stats = preloaded_stats['justification']
+                    self._attendance_stats_cache = attendance_stats
+                else:
+                    attendance_stats = self.get_attendance_stats()
+                    justification_stats = self.get_justification_stats()
                 
                 data.update({
                     'attendance_stats': attendance_stats,
@@ -115,3 +152,16 @@ class Student(db.Model):
                 })
         
         return data
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_student_stats(session, flush_context):
+    """Invalida las estadísticas memorizadas al escribir asistencia desde la sesión"""
+    from app.models.attendance_record import AttendanceRecord
+    
+    student_ids = [
+        obj.student_id
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, AttendanceRecord)
+    ]
+    if student_ids:
+        Student.invalidate_cached_stats(session, student_ids)
@@ -0,0 +1,38 @@
+from app import db
+from datetime import datetime
+
+class StudentAttendanceSummary(db.Model):
+    """Contadores de asistencia por estudiante y curso (mantenidos por AttendanceService)"""
+    __tablename__ = 'student_attendance_summary'
+    __table_args__ = (
+        # Resumen de un curso (estadísticas y cohortes filtradas por curso)
+        db.Index('ix_att_summary_course', 'course_id', 'student_id'),
+        {'schema': 'DEVELOPER_01'}
+    )
+    
+    student_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    course_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    total_classes = db.Column(db.Integer, default=0, nullable=False)
+    present = db.Column(db.Integer, default=0, nullable=False)
+    absent = db.Column(db.Integer, default=0, nullable=False)
+    justified = db.Column(db.Integer, default=0, nullable=False)
+    late = db.Column(db.Integer, default=0, nullable=False)
+    risk_level = db.Column(db.String(20), default='NORMAL', nullable=False)  # CRITICO, EN_RIESGO, ATENCION, NORMAL
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convertir a diccionario"""
+        return {
+            'student_id': self.student_id,
+            'course_id': self.course_id,
+            'total_classes': self.total_classes,
+            'present': self.present,
+            'absent': self.absent,
+            'justified': self.justified,
+            'late': self.late,
+            'risk_level': self.risk_level,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<StudentAttendanceSummary Student {self.student_id} - Course {self.course_id}: {self.risk_level}>'
@@ -1,9 +1,49 @@
 from flask import Blueprint, request, jsonify
 from app.services.attendance_service import AttendanceService
+from app.services.attendance_analytics_service import AttendanceAnalyticsService
+from app.services.attendance_summary_service import AttendanceSummaryService
+from app.services.attendance_import_service import AttendanceImportService
+from app.services.attendance_change_service import AttendanceChangeService
+from app.services.attendance_archive_service import AttendanceArchiveService
+from app.services.attendance_write_behind_service import AttendanceWriteBehindService
+from app.services.pagination_service import PaginationService
+from app.services.idempotency_service import idempotent
 from datetime import datetime
 
 attendance_bp = Blueprint('attendance', __name__)
 
+# Campos de un registro que se guardan en el diario write-behind
+QUEUED_FIELDS = ('student_id', 'course_id', 'attendance_date', 'status', 'notes', 'recorded_by')
+
+def _queue_attendance(data_list):
+    """
+    Valida y encola asistencias en el diario write-behind (respuesta 202)
+    
+    Raises:
+        ValueError: si algún registro no es válido
+    """
+    queued = []
+    for data in data_list:
+        if not data.get('student_id') or not data.get('course_id') or not data.get('attendance_date'):
+            raise ValueError('Campos requeridos: student_id, course_id, attendance_date')
+        if data.get('status', 'AUSENTE') not in AttendanceService.VALID_STATUSES:
+            raise ValueError(f'Estado inválido: {data.get("status")}')
+        
+        record = {field: data[field] for field in QUEUED_FIELDS if field in data}
+        record['student_id'] = int(record['student_id'])
+        record['course_id'] = int(record['course_id'])
+        queued.append(record)
+    
+    AttendanceArchiveService.ensure_not_archived(record['attendance_date'] for record in queued)
+    result = AttendanceWriteBehindService.enqueue(queued)
+    print(f"📥 {result['queued']} asistencias encoladas (write-behind)")
+    
+    return jsonify({
+        'success': True,
+        'message': f'{result["queued"]} registros recibidos; se guardarán en segundos',
+        'data': result
+    }), 202
+
 @attendance_bp.route('/', methods=['GET'])
 def get_attendance():
     """Endpoint para obtener registros de asistencia con filtros"""
@@ -15,6 +55,7 @@ def get_attendance():
         status_filter = request.args.get('status')
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
+        cursor = request.args.get('cursor')
         
         print(f"📋 Obteniendo asistencias - Filtros: course_id={course_id}, student_id={student_id}, date_from={date_from}, date_to={date_to}, status={status_filter}")
         
@@ -24,41 +65,36 @@ def get_attendance():
         if date_to:
             date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
         
-        pagination = AttendanceService.get_all_attendance(
-            course_id=course_id,
-            student_id=student_id,
-            date_from=date_from,
-            date_to=date_to,
-            status_filter=status_filter,
+        # Página y estadísticas sobre el mismo conjunto filtrado (dos consultas)
+        pagination, stats = AttendanceService.list_attendance(
+            {
+                'course_id': course_id,
+                'student_id': student_id,
+                'date_from': date_from,
+                'date_to': date_to,
+                'status_filter': status_filter
+            },
             page=page,
-            per_page=per_page
-        )
-        
-        print(f"✅ Registros encontrados: {pagination.total}")
-        
-        # Obtener estadísticas
-        stats = AttendanceService.get_attendance_stats(
-            course_id=course_id,
-            student_id=student_id
+            per_page=per_page,
+            cursor=cursor
         )
         
+        print(f"✅ Registros obtenidos: {len(pagination.items)}")
         print(f"📊 Estadísticas: {stats}")
         
         return jsonify({
             'success': True,
             'data': {
                 'attendance': [a.to_dict() for a in pagination.items],
-                'pagination': {
-                    'page': pagination.page,
-                    'pages': pagination.pages,
-                    'per_page': pagination.per_page,
-                    'total': pagination.total,
-                    'has_next': pagination.has_next,
-                    'has_prev': pagination.has_prev
-                },
+                'pagination': PaginationService.to_dict(pagination),
                 'stats': stats
             }
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Parámetros inválidos: {str(e)}'
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -88,6 +124,7 @@ def get_attendance_details(attendance_id):
         }), 500
 
 @attendance_bp.route('/create', methods=['POST'])
+@idempotent
 def create_attendance():
     """Endpoint para crear un nuevo registro de asistencia"""
     try:
@@ -113,6 +150,9 @@ def create_attendance():
         if isinstance(data['attendance_date'], str):
             data['attendance_date'] = datetime.strptime(data['attendance_date'], '%Y-%m-%d').date()
         
+        if AttendanceWriteBehindService.enabled():
+            return _queue_attendance([data])
+        
         attendance = AttendanceService.create_attendance(data)
         print(f"✅ Asistencia creada exitosamente: {attendance.id}")
         
@@ -121,6 +161,11 @@ def create_attendance():
             'message': 'Asistencia registrada exitosamente',
             'data': attendance.to_dict()
         }), 201
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         print(f"❌ Error al crear asistencia: {str(e)}")
         return jsonify({
@@ -129,6 +174,7 @@ def create_attendance():
         }), 500
 
 @attendance_bp.route('/create-bulk', methods=['POST'])
+@idempotent
 def create_bulk_attendance():
     """Endpoint para crear múltiples registros de asistencia"""
     try:
@@ -146,6 +192,9 @@ def create_bulk_attendance():
             if isinstance(record.get('attendance_date'), str):
                 record['attendance_date'] = datetime.strptime(record['attendance_date'], '%Y-%m-%d').date()
         
+        if AttendanceWriteBehindService.enabled():
+            return _queue_attendance(data)
+        
         attendances = AttendanceService.create_bulk_attendance(data)
         print(f"✅ {len(attendances)} asistencias creadas/actualizadas")
         
@@ -154,6 +203,11 @@ def create_bulk_attendance():
             'message': f'{len(attendances)} registros procesados exitosamente',
             'data': [a.to_dict() for a in attendances]
         }), 201
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         print(f"❌ Error al crear asistencias masivas: {str(e)}")
         return jsonify({
@@ -161,6 +215,54 @@ def create_bulk_attendance():
             'message': f'Error al crear asistencias: {str(e)}'
         }), 500
 
+@attendance_bp.route('/import', methods=['POST'])
+def import_attendance():
+    """
+    Endpoint para importar asistencias desde CSV o NDJSON
+    Acepta multipart (campo file) o el archivo directamente en el body.
+    Query params: format (csv | ndjson), chunk_size, recorded_by
+    """
+    try:
+        upload = request.files.get('file')
+        
+        if upload:
+            stream = upload.stream
+            default_format = AttendanceImportService.detect_format(upload.filename)
+        else:
+            stream = request.stream
+            default_format = 'ndjson' if 'ndjson' in (request.content_type or '') else 'csv'
+        
+        file_format = request.args.get('format', default_format).lower()
+        chunk_size = request.args.get('chunk_size', type=int)
+        recorded_by = request.args.get('recorded_by', type=int)
+        
+        if file_format not in ('csv', 'ndjson'):
+            return jsonify({
+                'success': False,
+                'message': f'Formato no soportado: {file_format}'
+            }), 400
+        
+        print(f"📥 Importando asistencias ({file_format})")
+        report = AttendanceImportService.import_stream(
+            stream,
+            file_format=file_format,
+            chunk_size=chunk_size,
+            recorded_by=recorded_by
+        )
+        print(f"✅ Importación: {report['imported']} importadas, {report['failed']} con error")
+        
+        return jsonify({
+            'success': report['imported'] > 0 or report['failed'] == 0,
+            'message': f"{report['imported']} registros importados, {report['failed']} con error",
+            'data': report
+        })
+    except Exception as e:
+        print(f"❌ Error al importar asistencias: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error al importar asistencias: {str(e)}'
+        }), 500
+
 @attendance_bp.route('/<int:attendance_id>/update', methods=['PUT'])
 def update_attendance(attendance_id):
     """Endpoint para actualizar un registro de asistencia"""
@@ -224,6 +326,31 @@ def get_student_course_attendance(student_id, course_id):
             'message': f'Error al obtener asistencias: {str(e)}'
         }), 500
 
+@attendance_bp.route('/student/<int:student_id>/windows', methods=['GET'])
+def get_student_attendance_windows(student_id):
+    """Endpoint para obtener las estadísticas de un estudiante por ventanas (7 días, 30 días, semestre)"""
+    try:
+        windows = AttendanceSummaryService.get_rolling_stats([student_id])[student_id]
+        
+        date_from = request.args.get('date_from')
+        if date_from:
+            date_to = request.args.get('date_to')
+            windows['custom'] = AttendanceSummaryService.get_window_stats(
+                [student_id],
+                datetime.strptime(date_from, '%Y-%m-%d').date(),
+                datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+            )[student_id]
+        
+        return jsonify({
+            'success': True,
+            'data': windows
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener estadísticas por ventana: {str(e)}'
+        }), 500
+
 @attendance_bp.route('/course/<int:course_id>/date/<string:date>', methods=['GET'])
 def get_course_date_attendance(course_id, date):
     """Endpoint para obtener asistencias de un curso en una fecha"""
@@ -241,16 +368,184 @@ def get_course_date_attendance(course_id, date):
             'message': f'Error al obtener asistencias: {str(e)}'
         }), 500
 
+@attendance_bp.route('/course/<int:course_id>/session/<string:date>', methods=['GET'])
+def get_course_session(course_id, date):
+    """Endpoint para obtener la lista de asistencia de una sesión (roster + registros del día)"""
+    try:
+        attendance_date = datetime.strptime(date, '%Y-%m-%d').date()
+        roster = AttendanceService.get_course_session(course_id, attendance_date)
+        
+        return jsonify({
+            'success': True,
+            'data': roster,
+            'count': len(roster),
+            'recorded': sum(1 for student in roster if student['status'])
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener la lista de asistencia: {str(e)}'
+        }), 500
+
+@attendance_bp.route('/course/<int:course_id>/session/<string:date>', methods=['PUT'])
+def save_course_session(course_id, date):
+    """
+    Endpoint para registrar la asistencia de una sesión completa
+    Body: {"statuses": {"<student_id>": "PRESENTE", ...}, "recorded_by": <professor_id>}
+    (también se acepta directamente el mapa {student_id: status})
+    """
+    try:
+        attendance_date = datetime.strptime(date, '%Y-%m-%d').date()
+        data = request.get_json()
+        
+        if not data or not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'message': 'Se esperaba un mapa {student_id: status}'
+            }), 400
+        
+        recorded_by = None
+        if isinstance(data.get('statuses'), dict):
+            recorded_by = data.get('recorded_by')
+            data = data['statuses']
+        
+        try:
+            statuses = {int(student_id): status for student_id, status in data.items()}
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'message': 'Los IDs de estudiante deben ser numéricos'
+            }), 400
+        
+        invalid_statuses = sorted({
+            str(status) for status in statuses.values()
+            if status not in AttendanceService.VALID_STATUSES
+        })
+        if invalid_statuses:
+            return jsonify({
+                'success': False,
+                'message': f'Estados inválidos: {", ".join(invalid_statuses)}'
+            }), 400
+        
+        roster_ids = AttendanceService.get_course_roster_ids(course_id)
+        not_enrolled = sorted(set(statuses) - roster_ids)
+        if not_enrolled:
+            return jsonify({
+                'success': False,
+                'message': 'Hay estudiantes que no están inscritos en el curso',
+                'student_ids': not_enrolled
+            }), 400
+        
+        if AttendanceWriteBehindService.enabled():
+            return _queue_attendance([
+                {
+                    'student_id': student_id,
+                    'course_id': course_id,
+                    'attendance_date': attendance_date,
+                    'status': status,
+                    **({'recorded_by': recorded_by} if recorded_by else {})
+                }
+                for student_id, status in statuses.items()
+            ])
+        
+        records = AttendanceService.save_course_session(
+            course_id, attendance_date, statuses, recorded_by=recorded_by
+        )
+        print(f"✅ {len(records)} asistencias registradas para el curso {course_id} ({date})")
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(records)} registros procesados exitosamente',
+            'data': AttendanceService.get_course_session(course_id, attendance_date)
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        print(f"❌ Error al registrar la lista de asistencia: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error al registrar la lista de asistencia: {str(e)}'
+        }), 500
+
+@attendance_bp.route('/course/<int:course_id>/analytics', methods=['GET'])
+def get_course_analytics(course_id):
+    """Endpoint para obtener la analítica de asistencia de un curso (una sola consulta)"""
+    try:
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        
+        if date_from:
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
+        if date_to:
+            date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
+        
+        analytics = AttendanceAnalyticsService.get_course_analytics(
+            course_id,
+            date_from=date_from,
+            date_to=date_to
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': analytics
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener analítica del curso: {str(e)}'
+        }), 500
+
+@attendance_bp.route('/course/<int:course_id>/matrix', methods=['GET'])
+def get_course_matrix(course_id):
+    """
+    Endpoint para obtener la grilla de asistencia compacta de un curso
+    Query params: from, to (YYYY-MM-DD) y encoding (chars | rle)
+    """
+    try:
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        encoding = request.args.get('encoding', 'chars')
+        
+        matrix = AttendanceAnalyticsService.get_compact_matrix(
+            course_id,
+            date_from=datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None,
+            date_to=datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None,
+            encoding=encoding
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': matrix
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Parámetros inválidos: {str(e)}'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener la matriz de asistencia: {str(e)}'
+        }), 500
+
 @attendance_bp.route('/stats', methods=['GET'])
 def get_attendance_stats():
-    """Endpoint para obtener estadísticas de asistencia"""
+    """Endpoint para obtener estadísticas de asistencia (mismos filtros que el listado)"""
     try:
         course_id = request.args.get('course_id', type=int)
         student_id = request.args.get('student_id', type=int)
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
         
         stats = AttendanceService.get_attendance_stats(
             course_id=course_id,
-            student_id=student_id
+            student_id=student_id,
+            date_from=datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None,
+            date_to=datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None,
+            status_filter=request.args.get('status')
         )
         
         return jsonify({
@@ -262,3 +557,68 @@ def get_attendance_stats():
             'success': False,
             'message': f'Error al obtener estadísticas: {str(e)}'
         }), 500
+
+@attendance_bp.route('/changes', methods=['GET'])
+def get_attendance_changes():
+    """
+    Endpoint de sincronización incremental
+    Query: since=<token> (opcional), course_id, student_id, limit
+    
+    Sin since devuelve solo el token actual: el cliente lo guarda junto con
+    una carga completa y luego pide únicamente los cambios posteriores.
+    """
+    try:
+        course_id = request.args.get('course_id', type=int)
+        student_id = request.args.get('student_id', type=int)
+        since = AttendanceChangeService.parse_token(request.args.get('since'))
+        
+        if since is None:
+            data = {
+                'changes': [],
+                'next_token': AttendanceChangeService.latest_token(course_id, student_id),
+                'has_more': False
+            }
+        else:
+            data = AttendanceChangeService.get_changes(
+                since,
+                course_id=course_id,
+                student_id=student_id,
+                limit=request.args.get('limit', type=int)
+            )
+        
+        return jsonify({
+            'success': True,
+            'data': data
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Parámetros inválidos: {str(e)}'
+        }), 400
+    except Exception as e:
+        print(f"❌ Error al obtener cambios de asistencia: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener cambios de asistencia: {str(e)}'
+        }), 500
+
+@attendance_bp.route('/write-behind/metrics', methods=['GET'])
+def get_write_behind_metrics():
+    """Endpoint con la profundidad del diario write-behind y el estado del drenador"""
+    try:
+        if not AttendanceWriteBehindService.enabled():
+            return jsonify({
+                'success': True,
+                'data': {'enabled': False, 'queue_depth': 0}
+            })
+        
+        return jsonify({
+            'success': True,
+            'data': AttendanceWriteBehindService.get_metrics()
+        })
+    except Exception as e:
+        print(f"❌ Error al obtener métricas del write-behind: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener métricas del write-behind: {str(e)}'
+        }), 500
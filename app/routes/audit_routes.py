@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models.audit_log import AuditLog
+from app.services.pagination_service import PaginationService
 from datetime import datetime, timedelta
 
 audit_bp = Blueprint('audit', __name__)
@@ -10,7 +11,7 @@ def get_audit_logs():
     """Obtener registros de auditoría con filtros"""
     try:
         # Parámetros de filtro
-        user_email = request.args.get('user_email')
+        user_id = request.args.get('user_id', type=int)
         user_type = request.args.get('user_type')
         action_type = request.args.get('action_type')
         table_name = request.args.get('table_name')
@@ -18,51 +19,56 @@ def get_audit_logs():
         date_to = request.args.get('date_to')
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
+        cursor = request.args.get('cursor')
         
         # Construir query
         query = db.session.query(AuditLog)
         
-        if user_email:
-            query = query.filter(AuditLog.user_email.ilike(f'%{user_email}%'))
+        if user_id:
+            query = query.filter(AuditLog.user_id == user_id)
         
         if user_type:
-            query = query.filter(AuditLog.user_type == user_type)
+            query = query.filter(AuditLog.user_type == user_type.upper())
         
         if action_type:
-            query = query.filter(AuditLog.action_type == action_type)
+            query = query.filter(AuditLog.action == action_type)
         
         if table_name:
             query = query.filter(AuditLog.table_name == table_name)
         
         if date_from:
             date_from_obj = datetime.strptime(date_from, '%Y-%m-%d')
-            query = query.filter(AuditLog.action_date >= date_from_obj)
+            query = query.filter(AuditLog.created_at >= date_from_obj)
         
         if date_to:
             date_to_obj = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
-            query = query.filter(AuditLog.action_date < date_to_obj)
-        
-        # Ordenar por fecha descendente
-        query = query.order_by(AuditLog.action_date.desc())
-        
-        # Paginar
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            query = query.filter(AuditLog.created_at < date_to_obj)
+        
+        # Ordenar por fecha descendente (id desempata) y paginar
+        if cursor is not None:
+            pagination = PaginationService.keyset_paginate(
+                query,
+                [(AuditLog.created_at, True), (AuditLog.id, True)],
+                cursor,
+                per_page
+            )
+        else:
+            query = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
         return jsonify({
             'success': True,
             'data': {
                 'logs': [log.to_dict() for log in pagination.items],
-                'pagination': {
-                    'page': pagination.page,
-                    'pages': pagination.pages,
-                    'per_page': pagination.per_page,
-                    'total': pagination.total,
-                    'has_next': pagination.has_next,
-                    'has_prev': pagination.has_prev
-                }
+                'pagination': PaginationService.to_dict(pagination)
             }
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Parámetros inválidos: {str(e)}'
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -159,19 +159,21 @@ def get_course_students(course_id):
     try:
         from app.models.course_enrollment import CourseEnrollment
         from app.models.student import Student
-        
-        # Obtener inscripciones activas del curso
-        enrollments = CourseEnrollment.query.filter_by(
-            course_id=course_id,
-            status='A'
-        ).all()
-        
-        # Obtener estudiantes
-        students = []
-        for enrollment in enrollments:
-            student = Student.query.get(enrollment.student_id)
-            if student and student.status == 'A':
-                students.append(student.to_dict())
+        from sqlalchemy import and_
+        
+        # Estudiantes activos con inscripción activa (una sola consulta)
+        students = Student.query.join(
+            CourseEnrollment,
+            and_(
+                CourseEnrollment.student_id == Student.id,
+                CourseEnrollment.course_id == course_id,
+                CourseEnrollment.status == 'A'
+            )
+        ).filter(
+            Student.status == 'A'
+        ).distinct().all()
+        
+        students = [student.to_dict() for student in students]
         
         return jsonify({
             'success': True,
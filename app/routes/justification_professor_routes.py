@@ -5,52 +5,27 @@ from app.models.student import Student
 from app.models.professor import Professor
 from app.models.course import Course
 from app.models.audit_log import AuditLog
+from app.services.justification_service import JustificationService
+from app.services.justification_counter_service import JustificationCounterService
+from app.services.justification_reconciliation_service import JustificationReconciliationService
+from app.services.email_outbox_service import EmailOutboxService
+from app.services.idempotency_service import idempotent
+from flask import current_app
 from datetime import datetime
 
 justification_professor_bp = Blueprint('justification_professor', __name__)
 
 @justification_professor_bp.route('/all', methods=['GET'])
 def get_all_justifications():
-    """Obtener todas las justificaciones con datos del estudiante y curso"""
+    """Obtener todas las justificaciones con datos del estudiante y curso (paginado o en streaming)"""
     try:
         print("🔍 Obteniendo TODAS las justificaciones...")
-        # Query con JOIN para obtener datos relacionados
-        justifications_data = db.session.query(
-            Justification,
-            Student.first_name,
-            Student.last_name,
-            Student.student_code,
-            Student.email,
-            Student.career,
-            Course.course_name,
-            Course.course_code
-        ).join(
-            Student, Justification.student_id == Student.id
-        ).join(
-            Course, Justification.course_id == Course.id
-        ).order_by(
-            Justification.submission_date.desc()
-        ).all()
-        
-        print(f"✅ Justificaciones encontradas: {len(justifications_data)}")
-        
-        # Construir respuesta con datos completos
-        result = []
-        for justification, student_first, student_last, student_code, student_email, student_career, course_name, course_code in justifications_data:
-            justification_dict = justification.to_dict()
-            justification_dict['student_name'] = f"{student_first} {student_last}"
-            justification_dict['student_code'] = student_code
-            justification_dict['student_email'] = student_email
-            justification_dict['student_career'] = student_career
-            justification_dict['course_name'] = course_name
-            justification_dict['course_code'] = course_code
-            result.append(justification_dict)
-        
+        return JustificationService.all_requests_response()
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'data': result
-        })
-        
+            'success': False,
+            'message': f'Parámetros inválidos: {str(e)}'
+        }), 400
     except Exception as e:
         print(f"❌ Error al obtener justificaciones: {str(e)}")
         return jsonify({
@@ -117,7 +92,8 @@ def approve_justification(justification_id):
         professor_id = data.get('professor_id')
         admin_response = data.get('admin_response', '')
         
-        justification = db.session.query(Justification).get(justification_id)
+        # Bloqueada hasta el commit: el estado anterior de los contadores no puede cambiar
+        justification = db.session.query(Justification).with_for_update().populate_existing().get(justification_id)
         
         if not justification:
             return jsonify({
@@ -126,6 +102,7 @@ def approve_justification(justification_id):
             }), 404
         
         # Actualizar justificación
+        old_status = justification.status
         justification.status = 'APROBADA'
         justification.reviewed_by = professor_id
         justification.review_date = datetime.utcnow()
@@ -147,6 +124,16 @@ def approve_justification(justification_id):
                 ip_address=request.remote_addr
             )
         
+        # Contadores por estado en la misma transacción
+        JustificationCounterService.apply_changes([
+            (justification.student_id, justification.course_id, old_status, justification.status)
+        ])
+        
+        # La inasistencia del mismo día pasa a JUSTIFICADO
+        JustificationReconciliationService.apply_approved([
+            (justification.student_id, justification.course_id, justification.absence_date)
+        ])
+        
         db.session.commit()
         
         # Enviar email al estudiante
@@ -187,7 +174,8 @@ def reject_justification(justification_id):
                 'message': 'Debe proporcionar un motivo de rechazo'
             }), 400
         
-        justification = db.session.query(Justification).get(justification_id)
+        # Bloqueada hasta el commit: el estado anterior de los contadores no puede cambiar
+        justification = db.session.query(Justification).with_for_update().populate_existing().get(justification_id)
         
         if not justification:
             return jsonify({
@@ -196,6 +184,7 @@ def reject_justification(justification_id):
             }), 404
         
         # Actualizar justificación
+        old_status = justification.status
         justification.status = 'RECHAZADA'
         justification.reviewed_by = professor_id
         justification.review_date = datetime.utcnow()
@@ -215,6 +204,11 @@ def reject_justification(justification_id):
                 ip_address=request.remote_addr
             )
         
+        # Contadores por estado en la misma transacción
+        JustificationCounterService.apply_changes([
+            (justification.student_id, justification.course_id, old_status, justification.status)
+        ])
+        
         db.session.commit()
         
         # Enviar email al estudiante
@@ -241,29 +235,60 @@ def reject_justification(justification_id):
             'message': f'Error: {str(e)}'
         }), 500
 
+@justification_professor_bp.route('/batch-review', methods=['POST'])
+@idempotent
+def batch_review_justifications():
+    """
+    Aprobar o rechazar varias justificaciones en una sola transacción
+    
+    Body:
+        professor_id: profesor que revisa
+        decisions: [{"id": 1, "decision": "APPROVE" | "REJECT", "admin_response": "..."}]
+        admin_response: respuesta por defecto para las decisiones sin una propia
+    
+    Los emails a los estudiantes se encolan y se envían en segundo plano.
+    """
+    try:
+        data = request.get_json() or {}
+        
+        result = JustificationService.batch_review(
+            data.get('professor_id'),
+            data.get('decisions'),
+            default_response=data.get('admin_response'),
+            ip_address=request.remote_addr,
+            max_items=current_app.config.get('JUSTIFICATION_BATCH_REVIEW_MAX', 500)
+        )
+        
+        if result['emails_queued']:
+            EmailOutboxService.wake()
+        
+        print(f"✅ Revisión en lote: {len(result['processed'])} procesadas, {result['emails_queued']} emails encolados")
+        
+        return jsonify({
+            'success': True,
+            'message': f"{len(result['processed'])} justificaciones revisadas",
+            'data': result
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
 @justification_professor_bp.route('/stats', methods=['GET'])
 def get_justification_stats():
     """Obtener estadísticas de justificaciones"""
     try:
-        total = db.session.query(Justification).count()
-        pending = db.session.query(Justification).filter(
-            Justification.status == 'PENDIENTE'
-        ).count()
-        approved = db.session.query(Justification).filter(
-            Justification.status == 'APROBADA'
-        ).count()
-        rejected = db.session.query(Justification).filter(
-            Justification.status == 'RECHAZADA'
-        ).count()
-        
         return jsonify({
             'success': True,
-            'data': {
-                'total': total,
-                'pending': pending,
-                'approved': approved,
-                'rejected': rejected
-            }
+            'data': JustificationService.get_status_counts()
         })
         
     except Exception as e:
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 from app import db
 from app.models.justification import Justification
 from app.services.justification_service import JustificationService
-from app.services.student_service import StudentService
+from app.services.pagination_service import PaginationService
 from datetime import datetime
 import os
 
@@ -12,19 +12,9 @@ justification_bp = Blueprint('justifications', __name__)
 def get_justification_stats():
     """Endpoint para obtener estadísticas de justificaciones"""
     try:
-        total = db.session.query(Justification).count()
-        pending = db.session.query(Justification).filter(Justification.status == 'PENDIENTE').count()
-        approved = db.session.query(Justification).filter(Justification.status == 'APROBADA').count()
-        rejected = db.session.query(Justification).filter(Justification.status == 'RECHAZADA').count()
-        
         return jsonify({
             'success': True,
-            'data': {
-                'total': total,
-                'pending': pending,
-                'approved': approved,
-                'rejected': rejected
-            }
+            'data': JustificationService.get_status_counts()
         })
     except Exception as e:
         print(f"❌ Error en /stats: {str(e)}")
@@ -64,50 +54,43 @@ def get_justifications():
         search = request.args.get('search', '')
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
+        cursor = request.args.get('cursor')
         
+        # Datos del estudiante desde la misma unión de la consulta (sin una consulta por fila)
         pagination = JustificationService.get_requests_by_status(
             status=status if status != 'Todas' else None,
             search=search if search else None,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=cursor,
+            with_student=True
         )
         
-        # Obtener estadísticas para los contadores
-        stats = JustificationService.get_dashboard_stats()
+        # Contadores por estado (un GROUP BY memorizado entre páginas)
+        stats = JustificationService.get_status_counts()
         
-        # Enriquecer justificaciones con datos del estudiante
         justifications_data = []
-        for j in pagination.items:
-            j_dict = j.to_dict()
-            # Obtener datos del estudiante
-            student = StudentService.get_student_by_id(j.student_id)
-            if student:
-                j_dict['student_email'] = student.email
-                j_dict['student_phone'] = student.phone
-                j_dict['student_career'] = student.career
-                j_dict['student_semester'] = student.semester
+        for row in pagination.items:
+            j_dict = row.Justification.to_dict()
+            j_dict['student_email'] = row.student_email
+            j_dict['student_phone'] = row.student_phone
+            j_dict['student_career'] = row.student_career
+            j_dict['student_semester'] = row.student_semester
             justifications_data.append(j_dict)
         
         return jsonify({
             'success': True,
             'data': {
                 'justifications': justifications_data,
-                'pagination': {
-                    'page': pagination.page,
-                    'pages': pagination.pages,
-                    'per_page': pagination.per_page,
-                    'total': pagination.total,
-                    'has_next': pagination.has_next,
-                    'has_prev': pagination.has_prev
-                },
-                'stats': {
-                    'total': stats['total_requests'],
-                    'pending': stats['pending_requests'],
-                    'approved': stats['approved_requests'],
-                    'rejected': stats['rejected_requests']
-                }
+                'pagination': PaginationService.to_dict(pagination),
+                'stats': stats
             }
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Parámetros inválidos: {str(e)}'
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -118,34 +101,12 @@ def get_justifications():
 def get_all_justifications():
     """Endpoint para obtener todas las justificaciones (para dashboard)"""
     try:
-        justifications = JustificationService.get_all_requests()
-        
-        # Enriquecer con datos del estudiante
-        justifications_data = []
-        for j in justifications:
-            j_dict = j.to_dict()
-            # Obtener datos del estudiante
-            student = StudentService.get_student_by_id(j.student_id)
-            if student:
-                j_dict['student_name'] = student.full_name
-                j_dict['student_code'] = student.student_code
-                j_dict['student_email'] = student.email
-                j_dict['student_phone'] = student.phone
-                j_dict['student_career'] = student.career
-                j_dict['student_semester'] = student.semester
-            # Obtener nombre del curso
-            from app.models.course import Course
-            course = db.session.query(Course).get(j.course_id)
-            if course:
-                j_dict['course_name'] = course.course_name
-            # Asegurar que los campos de attachment estén presentes
-            print(f"📎 Justificación {j.id} - Archivo: {j.attachment_filename}")
-            justifications_data.append(j_dict)
-        
+        return JustificationService.all_requests_response()
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'data': justifications_data
-        })
+            'success': False,
+            'message': f'Parámetros inválidos: {str(e)}'
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
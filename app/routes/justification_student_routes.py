@@ -4,6 +4,8 @@ from app.models.justification import Justification
 from app.models.student import Student
 from app.models.course import Course
 from app.models.audit_log import AuditLog
+from app.services.idempotency_service import idempotent
+from app.services.justification_counter_service import JustificationCounterService
 from datetime import datetime, timedelta
 import os
 from werkzeug.utils import secure_filename
@@ -18,6 +20,7 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 @justification_student_bp.route('/create', methods=['POST'])
+@idempotent
 def create_justification():
     """Crear nueva justificación (estudiante)"""
     try:
@@ -144,6 +147,11 @@ def create_justification():
             ip_address=request.remote_addr
         )
         
+        # Contadores por estado en la misma transacción
+        JustificationCounterService.apply_changes([
+            (justification.student_id, justification.course_id, None, justification.status)
+        ])
+        
         db.session.commit()
         
         # Enviar email al profesor del curso
@@ -15,7 +15,8 @@ professor_dashboard_bp = Blueprint('professor_dashboard', __name__)
 def get_dashboard_stats():
     """Obtiene estadísticas generales REALES para el dashboard del profesor"""
     try:
-        stats = StatisticsService.get_dashboard_stats()
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        stats = StatisticsService.get_dashboard_stats(use_cache=not refresh)
         
         return jsonify({
             'success': True,
@@ -27,17 +28,45 @@ def get_dashboard_stats():
             'message': f'Error: {str(e)}'
         }), 500
 
+def _risk_cohort_response(min_risk_level):
+    """Respuesta común para los listados de riesgo (paginados con ?page=&per_page=)"""
+    page = request.args.get('page', type=int)
+    per_page = request.args.get('per_page', type=int)
+    risk_level = request.args.get('risk_level')
+    
+    if page and not per_page:
+        per_page = 50
+    
+    cohort = StatisticsService.get_risk_cohort(
+        risk_level=risk_level,
+        min_risk_level=min_risk_level,
+        page=page,
+        per_page=per_page
+    )
+    
+    response = {
+        'success': True,
+        'data': cohort['students'],
+        'count': cohort['total']
+    }
+    
+    if per_page:
+        response['pagination'] = {
+            'page': cohort['page'],
+            'pages': cohort['pages'],
+            'per_page': cohort['per_page'],
+            'total': cohort['total'],
+            'has_next': cohort['page'] < cohort['pages'],
+            'has_prev': cohort['page'] > 1
+        }
+    
+    return jsonify(response)
+
 @professor_dashboard_bp.route('/students-at-risk', methods=['GET'])
 def get_students_at_risk():
-    """Obtiene lista de estudiantes en riesgo (≥25% inasistencias)"""
+    """Obtiene lista de estudiantes en riesgo (EN_RIESGO o CRITICO según la política de riesgo)"""
     try:
-        students = StatisticsService.get_students_at_risk()
-        
-        return jsonify({
-            'success': True,
-            'data': students,
-            'count': len(students)
-        })
+        return _risk_cohort_response(min_risk_level='EN_RIESGO')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -46,15 +75,9 @@ def get_students_at_risk():
 
 @professor_dashboard_bp.route('/students-critical', methods=['GET'])
 def get_students_critical():
-    """Obtiene lista de estudiantes CRÍTICOS (≥30% inasistencias)"""
+    """Obtiene lista de estudiantes CRÍTICOS (según la política de riesgo)"""
     try:
-        students = StatisticsService.get_critical_students()
-        
-        return jsonify({
-            'success': True,
-            'data': students,
-            'count': len(students)
-        })
+        return _risk_cohort_response(min_risk_level='CRITICO')
     except Exception as e:
         return jsonify({
             'success': False,
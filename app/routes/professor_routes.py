@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app.services.professor_service import ProfessorService
+from app.services.pagination_service import PaginationService
 from datetime import datetime
 
 professor_bp = Blueprint('professors', __name__)
@@ -12,6 +13,7 @@ def get_professors():
         search = request.args.get('search', '')
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
+        cursor = request.args.get('cursor')
         
         print(f"📋 Filtros recibidos: status={status_filter}, search={search}")
         
@@ -26,10 +28,11 @@ def get_professors():
             status_filter=backend_status_filter,
             search=search if search else None,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=cursor
         )
         
-        print(f"✅ Profesores encontrados: {pagination.total}")
+        print(f"✅ Profesores obtenidos: {len(pagination.items)}")
         
         # Obtener estadísticas
         stats = ProfessorService.get_professor_stats()
@@ -38,17 +41,15 @@ def get_professors():
             'success': True,
             'data': {
                 'professors': [p.to_dict() for p in pagination.items],
-                'pagination': {
-                    'page': pagination.page,
-                    'pages': pagination.pages,
-                    'per_page': pagination.per_page,
-                    'total': pagination.total,
-                    'has_next': pagination.has_next,
-                    'has_prev': pagination.has_prev
-                },
+                'pagination': PaginationService.to_dict(pagination),
                 'stats': stats
             }
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Parámetros inválidos: {str(e)}'
+        }), 400
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return jsonify({
@@ -3,6 +3,7 @@ from app import db
 from app.models.student import Student
 from app.models.justification import Justification
 from app.models.course import Course
+from app.services.justification_counter_service import JustificationCounterService
 from sqlalchemy import func
 
 student_dashboard_bp = Blueprint('student_dashboard', __name__)
@@ -19,25 +20,12 @@ def get_student_dashboard(student_id):
                 'message': 'Estudiante no encontrado'
             }), 404
         
-        # Estadísticas de justificaciones
-        total_justifications = db.session.query(Justification).filter(
-            Justification.student_id == student_id
-        ).count()
-        
-        pending_justifications = db.session.query(Justification).filter(
-            Justification.student_id == student_id,
-            Justification.status == 'PENDIENTE'
-        ).count()
-        
-        approved_justifications = db.session.query(Justification).filter(
-            Justification.student_id == student_id,
-            Justification.status == 'APROBADA'
-        ).count()
-        
-        rejected_justifications = db.session.query(Justification).filter(
-            Justification.student_id == student_id,
-            Justification.status == 'RECHAZADA'
-        ).count()
+        # Estadísticas de justificaciones (contadores materializados del estudiante)
+        justification_counts = JustificationCounterService.get_counts('STUDENT', student_id)
+        total_justifications = justification_counts['total']
+        pending_justifications = justification_counts['pending']
+        approved_justifications = justification_counts['approved']
+        rejected_justifications = justification_counts['rejected']
         
         # Obtener estadísticas de asistencia desde la base de datos
         try:
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app.services.student_service import StudentService
+from app.services.statistics_service import StatisticsService
 from datetime import datetime
 
 student_bp = Blueprint('students', __name__)
@@ -42,10 +43,20 @@ def get_students():
         # Verificar si se solicitan estadísticas
         include_stats = request.args.get('include_stats', 'false').lower() == 'true'
         
+        # Precargar estadísticas de toda la página (dos consultas agrupadas)
+        preloaded = {}
+        if include_stats:
+            preloaded = StatisticsService.preload_student_stats(
+                [student.id for student in pagination.items]
+            )
+        
         # Convertir estudiantes a dict
         students_data = []
         for student in pagination.items:
-            student_dict = student.to_dict(include_stats=include_stats)
+            student_dict = student.to_dict(
+                include_stats=include_stats,
+                preloaded_stats=preloaded.get(student.id)
+            )
             students_data.append(student_dict)
         
         if include_stats and students_data:
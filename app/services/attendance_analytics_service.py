@@ -0,0 +1,261 @@
+"""
+Servicio de analítica de asistencia por curso
+Carga la asistencia de un curso en una sola consulta como matriz
+estudiante × sesión (int8) y calcula las métricas con NumPy
+"""
+from app import db
+from app.models.attendance_record import AttendanceRecord
+from app.services.risk_policy import RiskPolicy
+from itertools import groupby
+import numpy as np
+
+# Códigos de estado dentro de la matriz (0 = sin registro)
+STATUS_CODES = {
+    'PRESENTE': 1,
+    'TARDANZA': 2,
+    'JUSTIFICADO': 3,
+    'AUSENTE': 4
+}
+
+NO_RECORD = 0
+
+# Un carácter por celda para la matriz compacta (índice = código de estado)
+CELL_CHARS = '-PTJA'
+
+CELL_LEGEND = {
+    '-': None,
+    'P': 'PRESENTE',
+    'T': 'TARDANZA',
+    'J': 'JUSTIFICADO',
+    'A': 'AUSENTE'
+}
+
+class CourseAttendanceMatrix:
+    """Asistencia de un curso: student_ids (filas), dates (columnas) y codes (int8)"""
+    
+    def __init__(self, course_id, student_ids, dates, codes):
+        self.course_id = course_id
+        self.student_ids = student_ids
+        self.dates = dates
+        self.codes = codes
+    
+    @property
+    def is_empty(self):
+        return self.codes.size == 0
+
+class AttendanceAnalyticsService:
+    
+    @staticmethod
+    def load_course_matrix(course_id, date_from=None, date_to=None):
+        """
+        Carga la asistencia del curso en un solo viaje a la base de datos
+        
+        Args:
+            course_id: ID del curso
+            date_from: fecha inicial (opcional)
+            date_to: fecha final (opcional)
+        
+        Returns:
+            CourseAttendanceMatrix con una fila por estudiante y una columna por sesión
+        """
+        query = db.session.query(
+            AttendanceRecord.student_id,
+            AttendanceRecord.attendance_date,
+            AttendanceRecord.status
+        ).filter(
+            AttendanceRecord.course_id == course_id
+        )
+        
+        if date_from:
+            query = query.filter(AttendanceRecord.attendance_date >= date_from)
+        if date_to:
+            query = query.filter(AttendanceRecord.attendance_date <= date_to)
+        
+        rows = query.all()
+        
+        if not rows:
+            return CourseAttendanceMatrix(course_id, [], [], np.zeros((0, 0), dtype=np.int8))
+        
+        student_column, date_column, status_column = zip(*rows)
+        
+        student_ids, student_index = np.unique(np.array(student_column), return_inverse=True)
+        date_ordinals, date_index = np.unique(
+            np.fromiter((d.toordinal() for d in date_column), dtype=np.int64, count=len(rows)),
+            return_inverse=True
+        )
+        
+        codes = np.zeros((len(student_ids), len(date_ordinals)), dtype=np.int8)
+        codes[student_index, date_index] = np.fromiter(
+            (STATUS_CODES.get(status, NO_RECORD) for status in status_column),
+            dtype=np.int8,
+            count=len(rows)
+        )
+        
+        dates = sorted(set(date_column))
+        
+        return CourseAttendanceMatrix(course_id, student_ids.tolist(), dates, codes)
+    
+    @staticmethod
+    def _run_length_encode(row):
+        """Codifica una fila por tramos: 'PPPAA--' → '3P2A2-'"""
+        return ''.join(f'{len(list(run))}{char}' for char, run in groupby(row))
+    
+    @staticmethod
+    def get_compact_matrix(course_id, date_from=None, date_to=None, encoding='chars'):
+        """
+        Matriz de asistencia compacta para la grilla del curso
+        
+        Cada fila es un string con un carácter por sesión (ver CELL_LEGEND)
+        o, con encoding='rle', codificado por tramos (ej. 12P1A3P).
+        
+        Returns:
+            dict con student_ids, dates, rows (una por estudiante) y legend
+        """
+        if encoding not in ('chars', 'rle'):
+            raise ValueError(f'Codificación no soportada: {encoding}')
+        
+        matrix = AttendanceAnalyticsService.load_course_matrix(course_id, date_from, date_to)
+        
+        lookup = np.frombuffer(CELL_CHARS.encode(), dtype='S1')
+        grid = lookup[matrix.codes]
+        rows = [row.tobytes().decode() for row in grid]
+        
+        if encoding == 'rle':
+            rows = [AttendanceAnalyticsService._run_length_encode(row) for row in rows]
+        
+        return {
+            'course_id': course_id,
+            'encoding': encoding,
+            'student_ids': matrix.student_ids,
+            'dates': [d.isoformat() for d in matrix.dates],
+            'rows': rows,
+            'legend': CELL_LEGEND
+        }
+    
+    @staticmethod
+    def _status_counts(codes, axis):
+        """Cuenta cada estado a lo largo del eje indicado"""
+        return {
+            status: np.count_nonzero(codes == code, axis=axis)
+            for status, code in STATUS_CODES.items()
+        }
+    
+    @staticmethod
+    def _risk_levels(absence_percentage, course_id=None):
+        """Versión vectorizada de StatisticsService._determine_risk_level"""
+        return RiskPolicy.current().classify_array(absence_percentage, course_id=course_id)
+    
+    @staticmethod
+    def _absence_streaks(absent):
+        """
+        Rachas de inasistencias consecutivas por estudiante
+        
+        Returns:
+            tupla (racha más larga, racha actual) por fila
+        """
+        if absent.shape[1] == 0:
+            zeros = np.zeros(absent.shape[0], dtype=np.int64)
+            return zeros, zeros
+        
+        running = np.cumsum(absent, axis=1)
+        # Valor acumulado en la última sesión sin inasistencia (reinicia la racha)
+        resets = np.maximum.accumulate(np.where(absent, 0, running), axis=1)
+        streaks = running - resets
+        
+        return streaks.max(axis=1), streaks[:, -1]
+    
+    @staticmethod
+    def get_course_analytics(course_id, date_from=None, date_to=None):
+        """
+        Calcula la analítica de un curso a partir de la matriz de asistencia
+        
+        Returns:
+            dict con resumen del curso, métricas por estudiante, asistencia
+            por sesión y distribución de niveles de riesgo
+        """
+        matrix = AttendanceAnalyticsService.load_course_matrix(course_id, date_from, date_to)
+        codes = matrix.codes
+        
+        recorded_by_student = np.count_nonzero(codes != NO_RECORD, axis=1)
+        by_student = AttendanceAnalyticsService._status_counts(codes, axis=1)
+        recorded_by_session = np.count_nonzero(codes != NO_RECORD, axis=0)
+        by_session = AttendanceAnalyticsService._status_counts(codes, axis=0)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            attendance_percentage = np.where(
+                recorded_by_student > 0,
+                np.round(by_student['PRESENTE'] / recorded_by_student * 100, 2),
+                100.0
+            )
+            absence_percentage = np.where(
+                recorded_by_student > 0,
+                np.round(by_student['AUSENTE'] / recorded_by_student * 100, 2),
+                0.0
+            )
+            turnout_percentage = np.where(
+                recorded_by_session > 0,
+                np.round((by_session['PRESENTE'] + by_session['TARDANZA']) / recorded_by_session * 100, 2),
+                0.0
+            )
+        
+        risk_levels = AttendanceAnalyticsService._risk_levels(absence_percentage, course_id)
+        longest_streak, current_streak = AttendanceAnalyticsService._absence_streaks(
+            codes == STATUS_CODES['AUSENTE']
+        )
+        
+        students = [
+            {
+                'student_id': student_id,
+                'total_classes': int(recorded_by_student[i]),
+                'present': int(by_student['PRESENTE'][i]),
+                'absent': int(by_student['AUSENTE'][i]),
+                'justified': int(by_student['JUSTIFICADO'][i]),
+                'late': int(by_student['TARDANZA'][i]),
+                'attendance_percentage': float(attendance_percentage[i]),
+                'absence_percentage': float(absence_percentage[i]),
+                'risk_level': str(risk_levels[i]),
+                'longest_absence_streak': int(longest_streak[i]),
+                'current_absence_streak': int(current_streak[i])
+            }
+            for i, student_id in enumerate(matrix.student_ids)
+        ]
+        students.sort(key=lambda s: s['absence_percentage'], reverse=True)
+        
+        sessions = [
+            {
+                'date': session_date.isoformat(),
+                'recorded': int(recorded_by_session[j]),
+                'present': int(by_session['PRESENTE'][j]),
+                'absent': int(by_session['AUSENTE'][j]),
+                'justified': int(by_session['JUSTIFICADO'][j]),
+                'late': int(by_session['TARDANZA'][j]),
+                'turnout_percentage': float(turnout_percentage[j])
+            }
+            for j, session_date in enumerate(matrix.dates)
+        ]
+        
+        levels, level_counts = np.unique(risk_levels, return_counts=True)
+        risk_distribution = dict.fromkeys(['CRITICO', 'EN_RIESGO', 'ATENCION', 'NORMAL'], 0)
+        risk_distribution.update({str(level): int(count) for level, count in zip(levels, level_counts)})
+        
+        # Mismo formato que AttendanceService.get_attendance_stats
+        total = int(recorded_by_student.sum())
+        present = int(by_student['PRESENTE'].sum())
+        summary = {
+            'total': total,
+            'present': present,
+            'absent': int(by_student['AUSENTE'].sum()),
+            'late': int(by_student['TARDANZA'].sum()),
+            'justified': int(by_student['JUSTIFICADO'].sum()),
+            'attendance_rate': round((present / total * 100), 2) if total > 0 else 0
+        }
+        
+        return {
+            'course_id': course_id,
+            'students_count': len(matrix.student_ids),
+            'sessions_count': len(matrix.dates),
+            'summary': summary,
+            'students': students,
+            'sessions': sessions,
+            'risk_distribution': risk_distribution
+        }
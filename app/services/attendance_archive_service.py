@@ -0,0 +1,188 @@
+"""
+Servicio para archivar los registros de asistencia de semestres cerrados
+Mueve las filas a attendance_records_archive para que attendance_records
+solo contenga el semestre en curso; los totales por estudiante
+(student_attendance_summary y attendance_daily_rollup) no se modifican y
+attendance_changes recibe una baja (DELETE) por cada registro archivado y
+un alta (UPSERT) por cada registro restaurado
+"""
+from app import db
+from app.models.attendance_record import AttendanceRecord
+from app.models.attendance_record_archive import AttendanceRecordArchive
+from app.services.semester_service import SemesterService
+from app.services.attendance_change_service import AttendanceChangeService
+from app.services.cache_service import TTLCache
+from sqlalchemy import select, insert, delete, func, literal
+from datetime import datetime, date, timedelta
+
+# Semestres archivados (se consulta en cada registro de asistencia)
+_archived_cache = TTLCache(ttl_seconds=300, max_entries=1)
+
+# Columnas que se copian entre la tabla viva y el archivo
+RECORD_COLUMNS = ('id', 'student_id', 'course_id', 'attendance_date', 'status', 'notes', 'recorded_by', 'created_at')
+
+# Al restaurar, el id lo genera la tabla viva
+RESTORE_COLUMNS = RECORD_COLUMNS[1:]
+
+class AttendanceArchiveService:
+    
+    @staticmethod
+    def _month_ranges(start, end):
+        """Divide el rango en meses (un lote y un commit por mes)"""
+        current = start
+        while current <= end:
+            next_month = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+            yield current, min(next_month - timedelta(days=1), end)
+            current = next_month
+    
+    @staticmethod
+    def archive_semester(label, today=None):
+        """
+        Mueve los registros de un semestre cerrado a attendance_records_archive
+        
+        Args:
+            label: etiqueta del semestre (ej. 2025-I)
+            today: fecha de referencia para validar que el semestre terminó
+        
+        Returns:
+            dict con el semestre y la cantidad de registros archivados
+        
+        Raises:
+            ValueError: si la etiqueta no es válida o el semestre no ha terminado
+        """
+        label = label.strip().upper()
+        start, end = SemesterService.range_for(label)
+        today = today or date.today()
+        
+        if end >= today:
+            raise ValueError(f'El semestre {label} no ha terminado ({end.isoformat()})')
+        
+        live = AttendanceRecord.__table__
+        archive = AttendanceRecordArchive.__table__
+        archived_at = datetime.utcnow()
+        moved = 0
+        
+        for month_start, month_end in AttendanceArchiveService._month_ranges(start, end):
+            in_month = live.c.attendance_date.between(month_start, month_end)
+            source = select(
+                *[live.c[column] for column in RECORD_COLUMNS],
+                literal(label),
+                literal(archived_at)
+            ).where(in_month)
+            
+            try:
+                result = db.session.execute(
+                    insert(archive).from_select([*RECORD_COLUMNS, 'semester', 'archived_at'], source)
+                )
+                db.session.execute(delete(live).where(in_month))
+                # Bajas para que los clientes sincronizados quiten los registros archivados
+                # (último paso: el turno de la secuencia se mantiene hasta el commit)
+                AttendanceChangeService.record_from_select(
+                    select(archive.c.student_id, archive.c.course_id, archive.c.attendance_date).where(
+                        archive.c.semester == label,
+                        archive.c.archived_at == archived_at,
+                        archive.c.attendance_date.between(month_start, month_end)
+                    ),
+                    operation='DELETE'
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise e
+            
+            moved += max(result.rowcount or 0, 0)
+        
+        _archived_cache.invalidate()
+        return {'semester': label, 'archived': moved}
+    
+    @staticmethod
+    def restore_semester(label):
+        """
+        Devuelve a attendance_records los registros archivados de un semestre
+        
+        Los registros se insertan sin su id original: la base asigna uno nuevo
+        (en Oracle una identidad GENERATED ALWAYS rechaza ids explícitos y con
+        BY DEFAULT chocarían más adelante con la secuencia). Ninguna tabla
+        referencia attendance_records.id y los clientes sincronizados reciben
+        el registro completo por attendance_changes.
+        
+        Returns:
+            dict con el semestre y la cantidad de registros restaurados
+        
+        Raises:
+            ValueError: si la etiqueta no es válida
+        """
+        label = label.strip().upper()
+        start, end = SemesterService.range_for(label)
+        
+        live = AttendanceRecord.__table__
+        archive = AttendanceRecordArchive.__table__
+        restored = 0
+        
+        for month_start, month_end in AttendanceArchiveService._month_ranges(start, end):
+            in_month = (archive.c.semester == label) & archive.c.attendance_date.between(month_start, month_end)
+            source = select(*[archive.c[column] for column in RESTORE_COLUMNS]).where(in_month)
+            
+            try:
+                result = db.session.execute(insert(live).from_select(list(RESTORE_COLUMNS), source))
+                AttendanceChangeService.record_from_select(
+                    select(archive.c.student_id, archive.c.course_id, archive.c.attendance_date).where(in_month)
+                )
+                db.session.execute(delete(archive).where(in_month))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise e
+            
+            restored += max(result.rowcount or 0, 0)
+        
+        _archived_cache.invalidate()
+        return {'semester': label, 'restored': restored}
+    
+    @staticmethod
+    def list_archived():
+        """Semestres archivados con su cantidad de registros"""
+        rows = db.session.query(
+            AttendanceRecordArchive.semester,
+            func.count(AttendanceRecordArchive.id),
+            func.min(AttendanceRecordArchive.attendance_date),
+            func.max(AttendanceRecordArchive.attendance_date)
+        ).group_by(
+            AttendanceRecordArchive.semester
+        ).order_by(
+            func.min(AttendanceRecordArchive.attendance_date)
+        ).all()
+        
+        return [
+            {
+                'semester': semester,
+                'records': total,
+                'first_date': first_date.isoformat() if first_date else None,
+                'last_date': last_date.isoformat() if last_date else None
+            }
+            for semester, total, first_date, last_date in rows
+        ]
+    
+    @staticmethod
+    def archived_semesters():
+        """Conjunto de etiquetas de semestres archivados (en caché)"""
+        return _archived_cache.get_or_set('semesters', lambda: frozenset(
+            semester for (semester,) in db.session.query(AttendanceRecordArchive.semester).distinct()
+        ))
+    
+    @staticmethod
+    def ensure_not_archived(dates):
+        """
+        Impide registrar asistencia en un semestre ya archivado
+        
+        Raises:
+            ValueError: si alguna fecha pertenece a un semestre archivado
+        """
+        archived = AttendanceArchiveService.archived_semesters()
+        if not archived:
+            return
+        
+        for day in set(dates):
+            label = SemesterService.label_for(day)
+            if label in archived:
+                raise ValueError(f'El semestre {label} está archivado; restáurelo antes de registrar asistencia')
@@ -0,0 +1,209 @@
+"""
+Servicio para la sincronización incremental de asistencia
+Cada escritura de AttendanceService agrega una entrada a attendance_changes;
+los clientes piden solo las claves cambiadas desde su último token
+
+Las escrituras registran sus cambios al final de la transacción y toman el
+turno de attendance_change_clock hasta el commit, así el orden de los tokens
+es el orden de confirmación
+"""
+from app import db
+from app.models.attendance_change import AttendanceChange
+from app.models.attendance_change_clock import AttendanceChangeClock
+from app.models.attendance_record import AttendanceRecord
+from sqlalchemy import insert, update, select, func, and_, literal
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+
+class AttendanceChangeService:
+    
+    DEFAULT_LIMIT = 500
+    MAX_LIMIT = 5000
+    
+    # Fila de attendance_change_clock que serializa los tokens
+    CLOCK_NAME = 'attendance'
+    
+    @staticmethod
+    def _acquire_turn():
+        """
+        Bloquea la fila del reloj hasta el commit de la transacción actual
+        
+        Los tokens (identidad de attendance_changes) se asignan después de
+        obtener el turno, de modo que un seq menor nunca se confirma después
+        de uno mayor: un cliente que ya recibió un token no puede perderse un
+        cambio que se vuelva visible más tarde con un token anterior.
+        """
+        clock = AttendanceChangeClock.__table__
+        tick = update(clock).where(
+            clock.c.name == AttendanceChangeService.CLOCK_NAME
+        ).values(ticked_at=datetime.utcnow())
+        
+        if db.session.execute(tick).rowcount:
+            return
+        
+        # Base creada sin la migración: se agrega la fila la primera vez
+        try:
+            with db.session.begin_nested():
+                db.session.execute(
+                    insert(clock).values(name=AttendanceChangeService.CLOCK_NAME, ticked_at=datetime.utcnow())
+                )
+        except IntegrityError:
+            db.session.execute(tick)
+    
+    @staticmethod
+    def record(keys, operation='UPSERT'):
+        """
+        Registra cambios de las claves (student_id, course_id, attendance_date)
+        
+        No hace commit: la entrada queda en la transacción de la escritura,
+        que conserva el turno de la secuencia hasta confirmarse (llamar como
+        último paso antes del commit).
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                'student_id': student_id,
+                'course_id': course_id,
+                'attendance_date': attendance_date,
+                'operation': operation,
+                'changed_at': now
+            }
+            for student_id, course_id, attendance_date in keys
+        ]
+        if rows:
+            AttendanceChangeService._acquire_turn()
+            db.session.execute(insert(AttendanceChange.__table__), rows)
+    
+    @staticmethod
+    def record_from_select(keys_source, operation='UPSERT'):
+        """
+        Registra cambios de forma masiva a partir de una consulta
+        (INSERT ... SELECT, sin traer las claves a Python)
+        
+        No hace commit: igual que record, conserva el turno de la secuencia
+        hasta el commit.
+        
+        Args:
+            keys_source: select con las columnas student_id, course_id y
+                         attendance_date (en ese orden)
+        """
+        AttendanceChangeService._acquire_turn()
+        keys = keys_source.subquery()
+        source = select(
+            keys.c[0], keys.c[1], keys.c[2], literal(operation), literal(datetime.utcnow())
+        )
+        db.session.execute(
+            insert(AttendanceChange.__table__).from_select(
+                ['student_id', 'course_id', 'attendance_date', 'operation', 'changed_at'], source
+            )
+        )
+    
+    @staticmethod
+    def parse_token(token):
+        """
+        Convierte el token recibido en un número de secuencia
+        
+        Raises:
+            ValueError: si el token no es válido
+        """
+        if token in (None, ''):
+            return None
+        
+        try:
+            seq = int(token)
+        except (TypeError, ValueError):
+            raise ValueError(f'Token de cambios inválido: {token}')
+        
+        if seq < 0:
+            raise ValueError(f'Token de cambios inválido: {token}')
+        return seq
+    
+    @staticmethod
+    def _visible_filters(course_id=None, student_id=None):
+        """Filtros comunes por curso o estudiante"""
+        filters = []
+        if course_id:
+            filters.append(AttendanceChange.course_id == course_id)
+        if student_id:
+            filters.append(AttendanceChange.student_id == student_id)
+        return filters
+    
+    @staticmethod
+    def latest_token(course_id=None, student_id=None):
+        """Token actual: punto de partida después de una carga completa"""
+        seq = db.session.query(
+            func.max(AttendanceChange.seq)
+        ).filter(
+            *AttendanceChangeService._visible_filters(course_id, student_id)
+        ).scalar()
+        return str(seq or 0)
+    
+    @staticmethod
+    def get_changes(since, course_id=None, student_id=None, limit=None):
+        """
+        Estado actual de las claves que cambiaron después del token
+        
+        Cada clave aparece una sola vez (con su último token). Si el registro
+        ya no existe se devuelve como eliminado (tombstone).
+        
+        Args:
+            since: número de secuencia del último cambio recibido
+            limit: máximo de claves por respuesta
+        
+        Returns:
+            dict con changes, next_token y has_more
+        """
+        limit = min(max(int(limit or AttendanceChangeService.DEFAULT_LIMIT), 1), AttendanceChangeService.MAX_LIMIT)
+        
+        # Último token de cada clave cambiada (una fila por clave)
+        latest = select(
+            AttendanceChange.student_id,
+            AttendanceChange.course_id,
+            AttendanceChange.attendance_date,
+            func.max(AttendanceChange.seq).label('seq')
+        ).where(
+            AttendanceChange.seq > since,
+            *AttendanceChangeService._visible_filters(course_id, student_id)
+        ).group_by(
+            AttendanceChange.student_id,
+            AttendanceChange.course_id,
+            AttendanceChange.attendance_date
+        ).order_by(
+            func.max(AttendanceChange.seq)
+        ).limit(limit + 1).subquery()
+        
+        rows = db.session.query(
+            latest.c.seq,
+            latest.c.student_id,
+            latest.c.course_id,
+            latest.c.attendance_date,
+            AttendanceRecord
+        ).outerjoin(
+            AttendanceRecord,
+            and_(
+                AttendanceRecord.student_id == latest.c.student_id,
+                AttendanceRecord.course_id == latest.c.course_id,
+                AttendanceRecord.attendance_date == latest.c.attendance_date
+            )
+        ).order_by(latest.c.seq).all()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        changes = [
+            {
+                'token': str(row.seq),
+                'student_id': row.student_id,
+                'course_id': row.course_id,
+                'attendance_date': row.attendance_date.isoformat(),
+                'deleted': row.AttendanceRecord is None,
+                'record': row.AttendanceRecord.to_dict() if row.AttendanceRecord is not None else None
+            }
+            for row in rows
+        ]
+        
+        return {
+            'changes': changes,
+            'next_token': str(rows[-1].seq) if rows else str(since),
+            'has_more': has_more
+        }
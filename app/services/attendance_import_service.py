@@ -0,0 +1,237 @@
+"""
+Servicio de importación masiva de asistencia desde CSV o NDJSON
+El archivo se lee en streaming y se escribe en bloques con un commit por bloque,
+por lo que la memoria no depende del tamaño del archivo
+"""
+from app import db
+from app.models.student import Student
+from app.models.course import Course
+from app.services.attendance_service import AttendanceService
+from flask import current_app, has_app_context
+from datetime import datetime
+import codecs
+import csv
+import json
+
+SUPPORTED_FORMATS = ('csv', 'ndjson')
+
+class AttendanceImportService:
+    
+    @staticmethod
+    def detect_format(filename, default='csv'):
+        """Formato según la extensión del archivo (.csv, .ndjson, .jsonl)"""
+        name = (filename or '').lower()
+        if name.endswith('.ndjson') or name.endswith('.jsonl'):
+            return 'ndjson'
+        if name.endswith('.csv'):
+            return 'csv'
+        return default
+    
+    @staticmethod
+    def _config(name, default):
+        if has_app_context():
+            return current_app.config.get(name, default)
+        return default
+    
+    @staticmethod
+    def _iter_rows(stream, file_format):
+        """
+        Recorre el archivo fila por fila sin cargarlo completo
+        
+        Yields:
+            tupla (número de línea, dict de la fila o None, error o None)
+        """
+        text = codecs.getreader('utf-8-sig')(stream)
+        
+        if file_format == 'csv':
+            reader = csv.DictReader(text)
+            for row in reader:
+                yield reader.line_num, row, None
+            return
+        
+        for line_number, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_number, None, 'JSON inválido'
+                continue
+            if not isinstance(row, dict):
+                yield line_number, None, 'Se esperaba un objeto JSON por línea'
+                continue
+            yield line_number, row, None
+    
+    @staticmethod
+    def _load_lookups():
+        """
+        IDs válidos de estudiantes y cursos (y sus códigos) en dos consultas,
+        reutilizados para validar todas las filas
+        """
+        students = {}
+        for student_id, student_code in db.session.query(Student.id, Student.student_code):
+            students[student_code] = student_id
+        
+        courses = {}
+        for course_id, course_code in db.session.query(Course.id, Course.course_code):
+            courses[course_code] = course_id
+        
+        return {
+            'student_ids': set(students.values()),
+            'students_by_code': students,
+            'course_ids': set(courses.values()),
+            'courses_by_code': courses
+        }
+    
+    @staticmethod
+    def _resolve_id(row, id_field, code_field, valid_ids, ids_by_code, label):
+        """ID de estudiante o curso a partir del ID o del código de la fila"""
+        value = (row.get(id_field) or '')
+        if str(value).strip():
+            try:
+                resolved = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'{id_field} inválido: {value}')
+            if resolved not in valid_ids:
+                raise ValueError(f'{label} no existe: {resolved}')
+            return resolved
+        
+        code = str(row.get(code_field) or '').strip()
+        if not code:
+            raise ValueError(f'Campo requerido: {id_field} o {code_field}')
+        if code not in ids_by_code:
+            raise ValueError(f'{label} no existe: {code}')
+        return ids_by_code[code]
+    
+    @staticmethod
+    def _parse_row(row, lookups, recorded_by=None):
+        """
+        Valida y normaliza una fila
+        
+        Raises:
+            ValueError: con el motivo por el que se rechaza la fila
+        """
+        student_id = AttendanceImportService._resolve_id(
+            row, 'student_id', 'student_code',
+            lookups['student_ids'], lookups['students_by_code'], 'Estudiante'
+        )
+        course_id = AttendanceImportService._resolve_id(
+            row, 'course_id', 'course_code',
+            lookups['course_ids'], lookups['courses_by_code'], 'Curso'
+        )
+        
+        raw_date = str(row.get('attendance_date') or '').strip()
+        if not raw_date:
+            raise ValueError('Campo requerido: attendance_date')
+        try:
+            attendance_date = datetime.strptime(raw_date[:10], '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f'Fecha inválida: {raw_date}')
+        
+        status = str(row.get('status') or '').strip().upper()
+        if status not in AttendanceService.VALID_STATUSES:
+            raise ValueError(f'Estado inválido: {status or "(vacío)"}')
+        
+        data = {
+            'student_id': student_id,
+            'course_id': course_id,
+            'attendance_date': attendance_date,
+            'status': status
+        }
+        
+        notes = str(row.get('notes') or '').strip()
+        if notes:
+            data['notes'] = notes[:500]
+        if recorded_by:
+            data['recorded_by'] = recorded_by
+        
+        return data
+    
+    @staticmethod
+    def import_stream(stream, file_format='csv', chunk_size=None, recorded_by=None, progress=None):
+        """
+        Importa asistencias desde un stream binario (archivo subido, archivo local)
+        
+        Columnas: student_id o student_code, course_id o course_code,
+        attendance_date (YYYY-MM-DD), status y notes (opcional).
+        Los registros existentes se actualizan (upsert por estudiante, curso y fecha).
+        
+        Args:
+            stream: stream binario con el contenido en UTF-8
+            file_format: csv o ndjson
+            chunk_size: filas por bloque (por defecto ATTENDANCE_IMPORT_CHUNK_SIZE)
+            recorded_by: ID del profesor que registra (opcional)
+            progress: función opcional que recibe el reporte después de cada bloque
+        
+        Returns:
+            dict con el reporte de la importación
+        """
+        if file_format not in SUPPORTED_FORMATS:
+            raise ValueError(f'Formato no soportado: {file_format}')
+        
+        chunk_size = chunk_size or AttendanceImportService._config('ATTENDANCE_IMPORT_CHUNK_SIZE', 1000)
+        max_errors = AttendanceImportService._config('ATTENDANCE_IMPORT_MAX_ERRORS', 100)
+        
+        report = {
+            'format': file_format,
+            'processed': 0,
+            'imported': 0,
+            'duplicates': 0,
+            'failed': 0,
+            'chunks': 0,
+            'errors': [],
+            'errors_truncated': False
+        }
+        
+        def add_error(line, message):
+            report['failed'] += 1
+            if len(report['errors']) < max_errors:
+                report['errors'].append({'line': line, 'message': message})
+            else:
+                report['errors_truncated'] = True
+        
+        def flush(chunk):
+            first_line, last_line = chunk[0][0], chunk[-1][0]
+            try:
+                # Claves distintas escritas; una clave repetida en el bloque
+                # se escribe una vez (prevalece la última fila)
+                written = len(AttendanceService.upsert_attendance([data for _, data in chunk]))
+                report['imported'] += written
+                report['duplicates'] += len(chunk) - written
+            except Exception as e:
+                # El bloque se revierte completo; los siguientes continúan
+                add_error(f'{first_line}-{last_line}', f'Bloque rechazado ({len(chunk)} filas): {str(e)}')
+                report['failed'] += len(chunk) - 1
+            report['chunks'] += 1
+            
+            # Liberar los objetos de la sesión entre bloques
+            db.session.expunge_all()
+            
+            if progress:
+                progress(report)
+        
+        lookups = AttendanceImportService._load_lookups()
+        
+        chunk = []
+        for line_number, row, error in AttendanceImportService._iter_rows(stream, file_format):
+            report['processed'] += 1
+            
+            if error:
+                add_error(line_number, error)
+                continue
+            
+            try:
+                chunk.append((line_number, AttendanceImportService._parse_row(row, lookups, recorded_by)))
+            except ValueError as e:
+                add_error(line_number, str(e))
+                continue
+            
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        
+        if chunk:
+            flush(chunk)
+        
+        return report
@@ -3,16 +3,30 @@ from app.models.student import Student
 from app.models.course import Course
 from app.models.professor import Professor
 from app.models.audit_log import AuditLog
+from app.models.course_enrollment import CourseEnrollment
+from app.services.attendance_summary_service import AttendanceSummaryService
+from app.services.attendance_archive_service import AttendanceArchiveService
+from app.services.attendance_change_service import AttendanceChangeService
+from app.services.statistics_service import StatisticsService
+from app.services.pagination_service import PaginationService
 from app import db
+from sqlalchemy import text, insert, update, bindparam, tuple_, and_
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, date
-from flask import request
+from flask import request, current_app
+from concurrent.futures import ThreadPoolExecutor
+
+# Hilos para calcular las estadísticas del listado en paralelo con la página
+_stats_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='attendance-stats')
 
 class AttendanceService:
     """Servicio para gestión de registros de asistencia"""
     
+    VALID_STATUSES = ('PRESENTE', 'AUSENTE', 'TARDANZA', 'JUSTIFICADO')
+    
     @staticmethod
-    def get_all_attendance(course_id=None, student_id=None, date_from=None, date_to=None, status_filter=None, page=1, per_page=50):
-        """Obtener registros de asistencia con filtros"""
+    def _filtered_query(course_id=None, student_id=None, date_from=None, date_to=None, status_filter=None):
+        """Consulta base del listado: la misma para la página y para las estadísticas"""
         query = AttendanceRecord.query
         
         # Filtro por curso
@@ -33,10 +47,77 @@ class AttendanceService:
         if status_filter:
             query = query.filter_by(status=status_filter)
         
-        # Ordenar por fecha descendente
-        query = query.order_by(AttendanceRecord.attendance_date.desc())
+        return query
+    
+    @staticmethod
+    def get_all_attendance(course_id=None, student_id=None, date_from=None, date_to=None, status_filter=None, page=1, per_page=50, cursor=None, count=True):
+        """
+        Obtener registros de asistencia con filtros
+        Con cursor (aunque sea vacío) se pagina por keyset y no se calcula el total
+        """
+        query = AttendanceService._filtered_query(course_id, student_id, date_from, date_to, status_filter)
+        
+        # Ordenar por fecha descendente (id desempata)
+        order_by = [(AttendanceRecord.attendance_date, True), (AttendanceRecord.id, True)]
+        
+        if cursor is not None:
+            return PaginationService.keyset_paginate(query, order_by, cursor, per_page)
+        
+        query = query.order_by(AttendanceRecord.attendance_date.desc(), AttendanceRecord.id.desc())
         
-        return query.paginate(page=page, per_page=per_page, error_out=False)
+        return query.paginate(page=page, per_page=per_page, error_out=False, count=count)
+    
+    @staticmethod
+    def list_attendance(filters, page=1, per_page=50, cursor=None, concurrent=None):
+        """
+        Página de asistencias y estadísticas del mismo conjunto filtrado
+        en dos consultas; el total de la paginación sale de las estadísticas
+        
+        Args:
+            filters: dict con course_id, student_id, date_from, date_to y status_filter
+            concurrent: ejecutar las estadísticas en paralelo con la página
+                (por defecto ATTENDANCE_STATS_CONCURRENT)
+        
+        Returns:
+            tupla (paginación, estadísticas)
+        """
+        if concurrent is None:
+            concurrent = current_app.config.get('ATTENDANCE_STATS_CONCURRENT', False)
+        
+        stats_future = None
+        if concurrent:
+            stats_future = _stats_executor.submit(
+                AttendanceService._stats_in_app_context,
+                current_app._get_current_object(),
+                filters
+            )
+        
+        try:
+            pagination = AttendanceService.get_all_attendance(
+                **filters, page=page, per_page=per_page, cursor=cursor, count=False
+            )
+        except Exception:
+            # Se informa el error de la página sin esperar las estadísticas
+            # (si ya están en curso terminan solas en su hilo y se descartan)
+            if stats_future:
+                stats_future.cancel()
+            raise
+        
+        if stats_future:
+            stats = stats_future.result()
+        else:
+            stats = AttendanceService.get_attendance_stats(**filters)
+        
+        if cursor is None:
+            pagination.total = stats['total']
+        
+        return pagination, stats
+    
+    @staticmethod
+    def _stats_in_app_context(app, filters):
+        """Estadísticas en un hilo aparte con su propio contexto (y sesión) de aplicación"""
+        with app.app_context():
+            return AttendanceService.get_attendance_stats(**filters)
     
     @staticmethod
     def get_attendance_by_id(attendance_id):
@@ -45,7 +126,22 @@ class AttendanceService:
     
     @staticmethod
     def create_attendance(data):
-        """Crear nuevo registro de asistencia"""
+        """
+        Crear nuevo registro de asistencia
+        
+        Raises:
+            ValueError: si ya existe un registro para el estudiante, curso y fecha
+        """
+        AttendanceArchiveService.ensure_not_archived([data['attendance_date']])
+        
+        key = (data['student_id'], data['course_id'], data['attendance_date'])
+        duplicate_message = (
+            f'Ya existe un registro de asistencia del estudiante {key[0]} en el curso {key[1]} '
+            f'para el {key[2].isoformat()}; use la actualización o el registro masivo'
+        )
+        if AttendanceService._find_existing([key]):
+            raise ValueError(duplicate_message)
+        
         attendance = AttendanceRecord(
             student_id=data['student_id'],
             course_id=data['course_id'],
@@ -56,14 +152,22 @@ class AttendanceService:
         )
         
         db.session.add(attendance)
-        db.session.flush()
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # Otra petición registró la misma clave a la vez
+            db.session.rollback()
+            if AttendanceService._find_existing([key]):
+                raise ValueError(duplicate_message)
+            raise
         
-        # Actualizar contadores del estudiante si es ausencia
-        if attendance.status == 'AUSENTE':
-            student = Student.query.get(data['student_id'])
-            if student:
-                student.total_absences = (student.total_absences or 0) + 1
-                student.unjustified_absences = (student.unjustified_absences or 0) + 1
+        # Actualizar el resumen de asistencia en la misma transacción
+        AttendanceSummaryService.apply_changes([
+            (attendance.student_id, attendance.course_id, attendance.attendance_date, None, attendance.status)
+        ])
+        AttendanceChangeService.record([
+            (attendance.student_id, attendance.course_id, attendance.attendance_date)
+        ])
         
         # Registrar en audit_logs
         if data.get('recorded_by'):
@@ -85,50 +189,364 @@ class AttendanceService:
     
     @staticmethod
     def create_bulk_attendance(data_list):
-        """Crear múltiples registros de asistencia"""
-        created_records = []
+        """
+        Crear o actualizar múltiples registros de asistencia
+        
+        Todo el lote se resuelve con una consulta por clave
+        (student_id, course_id, attendance_date) y se escribe con un upsert
+        masivo según el dialecto, en una sola transacción.
+        
+        Returns:
+            list de AttendanceRecord en el orden recibido (sin claves repetidas)
+        """
+        keys = AttendanceService.upsert_attendance(data_list)
         
+        records = AttendanceService._load_by_keys(keys)
+        return [records[key] for key in keys if key in records]
+    
+    @staticmethod
+    def upsert_attendance(data_list):
+        """
+        Upsert masivo de un lote de asistencias con commit (sin recargar los registros)
+        
+        Returns:
+            list de claves (student_id, course_id, attendance_date) escritas
+        """
+        # Si una clave se repite en el lote prevalece el último registro
+        batch = {}
         for data in data_list:
-            # Verificar si ya existe un registro para ese estudiante, curso y fecha
-            existing = AttendanceRecord.query.filter_by(
-                student_id=data['student_id'],
-                course_id=data['course_id'],
-                attendance_date=data['attendance_date']
-            ).first()
+            key = (data['student_id'], data['course_id'], data['attendance_date'])
+            batch[key] = data
+        
+        if not batch:
+            return []
+        
+        AttendanceArchiveService.ensure_not_archived(key[2] for key in batch)
+        
+        try:
+            # Los existentes quedan bloqueados hasta el commit: el estado anterior
+            # con el que se calcula el resumen no puede cambiar por otra escritura
+            existing = AttendanceService._find_existing(list(batch), lock=True)
+            now = datetime.utcnow()
             
-            if existing:
-                # Actualizar el existente
-                existing.status = data.get('status', existing.status)
-                existing.notes = data.get('notes', existing.notes)
-                existing.recorded_by = data.get('recorded_by', existing.recorded_by)
-                created_records.append(existing)
-            else:
-                # Crear nuevo
-                attendance = AttendanceRecord(
-                    student_id=data['student_id'],
-                    course_id=data['course_id'],
-                    attendance_date=data['attendance_date'],
-                    status=data.get('status', 'AUSENTE'),
-                    notes=data.get('notes'),
-                    recorded_by=data.get('recorded_by')
-                )
-                db.session.add(attendance)
-                created_records.append(attendance)
+            # Claves nuevas: INSERT directo; las que otra transacción insertó a la
+            # vez se releen bloqueadas y se actualizan como existentes
+            inserted = {
+                key: AttendanceService._record_row(key, data, None, now)
+                for key, data in batch.items() if key not in existing
+            }
+            conflicts = AttendanceService._insert_new_records(list(inserted.values()))
+            if conflicts:
+                for key in conflicts:
+                    del inserted[key]
+                existing.update(AttendanceService._find_existing(conflicts, lock=True))
+            
+            rows = []
+            changes = []
+            for key, data in batch.items():
+                if key in inserted:
+                    changes.append((*key, None, inserted[key]['status']))
+                    continue
                 
-                # Actualizar contadores del estudiante
-                if attendance.status == 'AUSENTE':
-                    student = Student.query.get(data['student_id'])
-                    if student:
-                        student.total_absences = (student.total_absences or 0) + 1
-                        student.unjustified_absences = (student.unjustified_absences or 0) + 1
+                current = existing.get(key)
+                row = AttendanceService._record_row(key, data, current, now)
+                rows.append(row)
+                changes.append((*key, current.status if current else None, row['status']))
+            
+            if rows:
+                AttendanceService._upsert_records(rows, existing)
+            
+            # Actualizar el resumen de asistencia y la secuencia de cambios en la misma transacción
+            AttendanceSummaryService.apply_changes(changes)
+            AttendanceChangeService.record(list(batch))
+            
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
         
-        db.session.commit()
-        return created_records
+        return list(batch)
+    
+    @staticmethod
+    def _record_row(key, data, current, now):
+        """Columnas a escribir para la clave (los campos omitidos conservan el valor actual)"""
+        if current:
+            row = {
+                'status': data.get('status', current.status),
+                'notes': data.get('notes', current.notes),
+                'recorded_by': data.get('recorded_by', current.recorded_by)
+            }
+        else:
+            row = {
+                'status': data.get('status', 'AUSENTE'),
+                'notes': data.get('notes'),
+                'recorded_by': data.get('recorded_by')
+            }
+        
+        row.update(student_id=key[0], course_id=key[1], attendance_date=key[2], created_at=now)
+        return row
+    
+    @staticmethod
+    def _insert_new_records(rows):
+        """
+        INSERT masivo de claves que no existían al leer el lote
+        
+        Si otra transacción insertó alguna de ellas a la vez, el lote se
+        reintenta fila por fila (cada una en un savepoint).
+        
+        Returns:
+            list de claves que ya existían (no insertadas)
+        """
+        if not rows:
+            return []
+        
+        table = AttendanceRecord.__table__
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table), rows)
+            return []
+        except IntegrityError:
+            pass
+        
+        conflicts = []
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(table), [row])
+            except IntegrityError:
+                conflicts.append((row['student_id'], row['course_id'], row['attendance_date']))
+        
+        return conflicts
+    
+    @staticmethod
+    def _key_chunks(keys):
+        """Divide las claves para no superar el límite de 1000 expresiones del IN de Oracle"""
+        chunk_size = StatisticsService.IN_CLAUSE_CHUNK_SIZE
+        for start in range(0, len(keys), chunk_size):
+            yield keys[start:start + chunk_size]
+    
+    @staticmethod
+    def _key_expression():
+        return tuple_(
+            AttendanceRecord.student_id,
+            AttendanceRecord.course_id,
+            AttendanceRecord.attendance_date
+        )
+    
+    @staticmethod
+    def _find_existing(keys, lock=False):
+        """
+        Registros existentes para las claves (student_id, course_id, attendance_date)
+        
+        Args:
+            lock: bloquear las filas encontradas hasta el commit (SELECT ... FOR UPDATE)
+        
+        Returns:
+            dict {clave: fila con id, status, notes y recorded_by}
+        """
+        existing = {}
+        for chunk in AttendanceService._key_chunks(keys):
+            rows = db.session.query(
+                AttendanceRecord.id,
+                AttendanceRecord.student_id,
+                AttendanceRecord.course_id,
+                AttendanceRecord.attendance_date,
+                AttendanceRecord.status,
+                AttendanceRecord.notes,
+                AttendanceRecord.recorded_by
+            ).filter(
+                AttendanceService._key_expression().in_(chunk)
+            )
+            if lock:
+                rows = rows.with_for_update()
+            for row in rows:
+                existing[(row.student_id, row.course_id, row.attendance_date)] = row
+        
+        return existing
+    
+    @staticmethod
+    def _load_by_keys(keys):
+        """Carga los registros de las claves indicadas {clave: AttendanceRecord}"""
+        records = {}
+        for chunk in AttendanceService._key_chunks(keys):
+            query = AttendanceRecord.query.filter(
+                AttendanceService._key_expression().in_(chunk)
+            ).execution_options(populate_existing=True)
+            for record in query:
+                records[(record.student_id, record.course_id, record.attendance_date)] = record
+        
+        return records
+    
+    @staticmethod
+    def _upsert_records(rows, existing):
+        """
+        Upsert masivo de attendance_records según el dialecto
+        
+        - Oracle: MERGE ejecutado como executemany
+        - SQLite / PostgreSQL: INSERT ... ON CONFLICT DO UPDATE
+        - Otros: UPDATE masivo de los existentes e INSERT masivo de los nuevos
+        
+        Args:
+            rows: dicts con las columnas del registro
+            existing: registros existentes por clave (de _find_existing)
+        """
+        table = AttendanceRecord.__table__
+        dialect = db.session.get_bind().dialect.name
+        
+        if dialect == 'oracle':
+            db.session.execute(text(f"""
+                MERGE INTO {table.fullname} t
+                USING (
+                    SELECT :student_id AS student_id, :course_id AS course_id,
+                           :attendance_date AS attendance_date, :status AS status,
+                           :notes AS notes, :recorded_by AS recorded_by,
+                           :created_at AS created_at
+                    FROM dual
+                ) s
+                ON (t.student_id = s.student_id AND t.course_id = s.course_id
+                    AND t.attendance_date = s.attendance_date)
+                WHEN MATCHED THEN UPDATE SET
+                    t.status = s.status, t.notes = s.notes, t.recorded_by = s.recorded_by
+                WHEN NOT MATCHED THEN INSERT
+                    (student_id, course_id, attendance_date, status, notes, recorded_by, created_at)
+                    VALUES (s.student_id, s.course_id, s.attendance_date, s.status,
+                            s.notes, s.recorded_by, s.created_at)
+            """), rows)
+            return
+        
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            
+            statement = dialect_insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=['student_id', 'course_id', 'attendance_date'],
+                set_={
+                    'status': statement.excluded.status,
+                    'notes': statement.excluded.notes,
+                    'recorded_by': statement.excluded.recorded_by
+                }
+            )
+            db.session.execute(statement, rows)
+            return
+        
+        updates = []
+        inserts = []
+        for row in rows:
+            current = existing.get((row['student_id'], row['course_id'], row['attendance_date']))
+            if current:
+                updates.append({
+                    'b_id': current.id,
+                    'status': row['status'],
+                    'notes': row['notes'],
+                    'recorded_by': row['recorded_by']
+                })
+            else:
+                inserts.append(row)
+        
+        if updates:
+            db.session.execute(
+                update(table).where(table.c.id == bindparam('b_id')),
+                updates
+            )
+        if inserts:
+            db.session.execute(insert(table), inserts)
+    
+    @staticmethod
+    def _active_roster_query(course_id):
+        """Estudiantes activos con inscripción activa en el curso"""
+        return db.session.query(Student).join(
+            CourseEnrollment,
+            and_(
+                CourseEnrollment.student_id == Student.id,
+                CourseEnrollment.course_id == course_id,
+                CourseEnrollment.status == 'A'
+            )
+        ).filter(
+            Student.status == 'A'
+        )
+    
+    @staticmethod
+    def get_course_roster_ids(course_id):
+        """IDs de los estudiantes activos inscritos en el curso"""
+        return {
+            row.id for row in AttendanceService._active_roster_query(course_id).with_entities(Student.id)
+        }
+    
+    @staticmethod
+    def get_course_session(course_id, attendance_date):
+        """
+        Lista de asistencia de una sesión: roster activo del curso unido a los
+        registros de esa fecha en una sola consulta
+        
+        Returns:
+            list de dicts por estudiante (status es None si aún no se registró)
+        """
+        rows = AttendanceService._active_roster_query(course_id).outerjoin(
+            AttendanceRecord,
+            and_(
+                AttendanceRecord.student_id == Student.id,
+                AttendanceRecord.course_id == course_id,
+                AttendanceRecord.attendance_date == attendance_date
+            )
+        ).with_entities(
+            Student.id,
+            Student.student_code,
+            Student.first_name,
+            Student.last_name,
+            AttendanceRecord.id.label('attendance_id'),
+            AttendanceRecord.status,
+            AttendanceRecord.notes
+        ).order_by(
+            Student.last_name,
+            Student.first_name,
+            Student.id
+        ).all()
+        
+        roster = {}
+        for row in rows:
+            # Una inscripción duplicada no debe repetir al estudiante
+            roster.setdefault(row.id, {
+                'student_id': row.id,
+                'student_code': row.student_code,
+                'full_name': f'{row.first_name} {row.last_name}',
+                'attendance_id': row.attendance_id,
+                'status': row.status,
+                'notes': row.notes
+            })
+        
+        return list(roster.values())
+    
+    @staticmethod
+    def save_course_session(course_id, attendance_date, statuses, recorded_by=None):
+        """
+        Registra la asistencia de una sesión a partir de un mapa {student_id: status}
+        con un único upsert masivo (ver create_bulk_attendance)
+        
+        Returns:
+            list de AttendanceRecord guardados
+        """
+        data_list = []
+        for student_id, status in statuses.items():
+            data = {
+                'student_id': student_id,
+                'course_id': course_id,
+                'attendance_date': attendance_date,
+                'status': status
+            }
+            if recorded_by:
+                data['recorded_by'] = recorded_by
+            data_list.append(data)
+        
+        return AttendanceService.create_bulk_attendance(data_list)
     
     @staticmethod
     def update_attendance(attendance_id, data):
         """Actualizar registro de asistencia"""
-        attendance = AttendanceRecord.query.get(attendance_id)
+        # Bloqueado hasta el commit: el estado anterior del resumen no puede cambiar
+        attendance = db.session.get(AttendanceRecord, attendance_id, with_for_update=True, populate_existing=True)
         if not attendance:
             return None
         
@@ -142,21 +560,16 @@ class AttendanceService:
         if 'justification_id' in data:
             attendance.justification_id = data['justification_id']
         
-        # Actualizar contadores del estudiante si cambió el estado
+        # Actualizar el resumen de asistencia si cambió el estado
         if old_status != attendance.status:
-            student = Student.query.get(attendance.student_id)
-            if student:
-                # Revertir el conteo anterior
-                if old_status == 'AUSENTE':
-                    student.total_absences = max(0, (student.total_absences or 0) - 1)
-                    student.unjustified_absences = max(0, (student.unjustified_absences or 0) - 1)
-                
-                # Aplicar el nuevo conteo
-                if attendance.status == 'AUSENTE':
-                    student.total_absences = (student.total_absences or 0) + 1
-                    student.unjustified_absences = (student.unjustified_absences or 0) + 1
-                elif attendance.status == 'JUSTIFICADO':
-                    student.justified_absences = (student.justified_absences or 0) + 1
+            AttendanceSummaryService.apply_changes([
+                (attendance.student_id, attendance.course_id, attendance.attendance_date, old_status, attendance.status)
+            ])
+        
+        db.session.flush()
+        AttendanceChangeService.record([
+            (attendance.student_id, attendance.course_id, attendance.attendance_date)
+        ])
         
         db.session.commit()
         return attendance
@@ -164,43 +577,45 @@ class AttendanceService:
     @staticmethod
     def delete_attendance(attendance_id):
         """Eliminar registro de asistencia"""
-        attendance = AttendanceRecord.query.get(attendance_id)
+        attendance = db.session.get(AttendanceRecord, attendance_id, with_for_update=True, populate_existing=True)
         if not attendance:
             return False
         
-        # Actualizar contadores del estudiante
-        if attendance.status == 'AUSENTE':
-            student = Student.query.get(attendance.student_id)
-            if student:
-                student.total_absences = max(0, (student.total_absences or 0) - 1)
-                student.unjustified_absences = max(0, (student.unjustified_absences or 0) - 1)
+        # Actualizar el resumen de asistencia
+        AttendanceSummaryService.apply_changes([
+            (attendance.student_id, attendance.course_id, attendance.attendance_date, attendance.status, None)
+        ])
         
         db.session.delete(attendance)
+        db.session.flush()
+        AttendanceChangeService.record([
+            (attendance.student_id, attendance.course_id, attendance.attendance_date)
+        ], operation='DELETE')
+        
         db.session.commit()
         return True
     
     @staticmethod
-    def get_attendance_stats(course_id=None, student_id=None):
-        """Obtener estadísticas de asistencia"""
-        query = AttendanceRecord.query
-        
-        if course_id:
-            query = query.filter_by(course_id=course_id)
-        if student_id:
-            query = query.filter_by(student_id=student_id)
+    def get_attendance_stats(course_id=None, student_id=None, date_from=None, date_to=None, status_filter=None):
+        """
+        Obtener estadísticas de asistencia del conjunto filtrado
+        Todos los contadores salen de una sola consulta (SUM(CASE ...))
+        """
+        row = AttendanceService._filtered_query(
+            course_id, student_id, date_from, date_to, status_filter
+        ).with_entities(
+            *StatisticsService._record_count_columns()
+        ).one()
         
-        total = query.count()
-        present = query.filter_by(status='PRESENTE').count()
-        absent = query.filter_by(status='AUSENTE').count()
-        late = query.filter_by(status='TARDANZA').count()
-        justified = query.filter_by(status='JUSTIFICADO').count()
+        total = int(row.total_classes or 0)
+        present = int(row.present or 0)
         
         return {
             'total': total,
             'present': present,
-            'absent': absent,
-            'late': late,
-            'justified': justified,
+            'absent': int(row.absent or 0),
+            'late': int(row.late or 0),
+            'justified': int(row.justified or 0),
             'attendance_rate': round((present / total * 100), 2) if total > 0 else 0
         }
     
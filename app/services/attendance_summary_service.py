@@ -0,0 +1,517 @@
+"""
+Servicio para mantener student_attendance_summary y attendance_daily_rollup
+Los contadores se actualizan en la misma transacción que los registros de asistencia
+"""
+from app import db
+from app.models.attendance_record import AttendanceRecord
+from app.models.student import Student
+from app.models.student_attendance_summary import StudentAttendanceSummary
+from app.models.attendance_daily_rollup import AttendanceDailyRollup
+from app.models.attendance_record_archive import AttendanceRecordArchive
+from app.services.statistics_service import StatisticsService
+from app.services.semester_service import SemesterService
+from app.services.risk_policy import RiskPolicy
+from sqlalchemy import func, case, select, insert, update, delete, bindparam, tuple_, union_all
+from sqlalchemy.exc import IntegrityError
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+
+# Columna del resumen que corresponde a cada estado de asistencia
+STATUS_COLUMNS = {
+    'PRESENTE': 'present',
+    'AUSENTE': 'absent',
+    'JUSTIFICADO': 'justified',
+    'TARDANZA': 'late'
+}
+
+COUNTER_COLUMNS = ('total_classes', 'present', 'absent', 'justified', 'late')
+
+class AttendanceSummaryService:
+    
+    @staticmethod
+    def _student_career(student_id):
+        """Carrera del estudiante como subconsulta correlacionada (excepciones de RiskPolicy)"""
+        return select(Student.career).where(Student.id == student_id).scalar_subquery()
+    
+    @staticmethod
+    def _summary_risk_expression(absent, total_classes, student_id, course_id):
+        """Nivel de riesgo calculado en SQL a partir de los contadores"""
+        absence_percentage = func.round(absent * 100.0 / func.nullif(total_classes, 0), 2)
+        return case(
+            (
+                total_classes > 0,
+                StatisticsService._risk_level_expression(
+                    absence_percentage,
+                    career=AttendanceSummaryService._student_career(student_id),
+                    course_id=course_id
+                )
+            ),
+            else_='NORMAL'
+        )
+    
+    @staticmethod
+    def _status_delta(delta, old_status, new_status):
+        """Suma a delta el efecto de un cambio de estado sobre los contadores"""
+        if old_status is None:
+            delta['total_classes'] += 1
+        elif old_status in STATUS_COLUMNS:
+            delta[STATUS_COLUMNS[old_status]] -= 1
+        
+        if new_status is None:
+            delta['total_classes'] -= 1
+        elif new_status in STATUS_COLUMNS:
+            delta[STATUS_COLUMNS[new_status]] += 1
+    
+    @staticmethod
+    def apply_changes(changes):
+        """
+        Aplica cambios de estado de asistencia a los contadores del resumen
+        (estudiante, curso) y a los acumulados diarios (estudiante, día)
+        
+        No hace commit: los contadores quedan en la transacción del llamador.
+        
+        Args:
+            changes: iterable de tuplas
+                (student_id, course_id, attendance_date, old_status, new_status).
+                old_status es None para registros nuevos y new_status es None
+                para registros eliminados.
+        """
+        summary_deltas = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+        rollup_deltas = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+        
+        for student_id, course_id, attendance_date, old_status, new_status in changes:
+            if old_status == new_status:
+                continue
+            
+            AttendanceSummaryService._status_delta(
+                summary_deltas[(student_id, course_id)], old_status, new_status
+            )
+            AttendanceSummaryService._status_delta(
+                rollup_deltas[(student_id, attendance_date)], old_status, new_status
+            )
+        
+        summary_deltas = {key: delta for key, delta in summary_deltas.items() if any(delta.values())}
+        rollup_deltas = {key: delta for key, delta in rollup_deltas.items() if any(delta.values())}
+        if not summary_deltas and not rollup_deltas:
+            return
+        
+        # Las estadísticas memorizadas en los Student de la sesión quedan obsoletas
+        Student.invalidate_cached_stats(db.session, [key[0] for key in summary_deltas])
+        
+        AttendanceSummaryService._apply_counter_deltas(
+            StudentAttendanceSummary.__table__, ('student_id', 'course_id'), summary_deltas,
+            with_risk_level=True
+        )
+        AttendanceSummaryService._apply_counter_deltas(
+            AttendanceDailyRollup.__table__, ('student_id', 'rollup_date'), rollup_deltas
+        )
+    
+    @staticmethod
+    def _increment_values(table, delta_for, now, with_risk_level=False):
+        """
+        Valores SET col = col + delta (y nivel de riesgo recalculado) para sumar
+        deltas a una fila de contadores existente
+        
+        Args:
+            delta_for: función columna -> expresión con el delta (bindparam del
+                       executemany o la columna excluded del ON CONFLICT)
+        """
+        values = {
+            column: table.c[column] + delta_for(column)
+            for column in COUNTER_COLUMNS
+        }
+        if with_risk_level:
+            values['risk_level'] = AttendanceSummaryService._summary_risk_expression(
+                table.c.absent + delta_for('absent'),
+                table.c.total_classes + delta_for('total_classes'),
+                table.c.student_id,
+                table.c.course_id
+            )
+            values['updated_at'] = now
+        return values
+    
+    @staticmethod
+    def _apply_counter_deltas(table, key_columns, deltas, with_risk_level=False):
+        """
+        Suma los deltas a una tabla de contadores: UPDATE atómico
+        (SET col = col + :delta) para las claves existentes e INSERT que suma
+        si la clave ya existe para las nuevas (dos primeras escrituras
+        concurrentes de la misma clave no chocan)
+        """
+        if not deltas:
+            return
+        
+        # Filas existentes (una consulta por bloque de claves)
+        keys = list(deltas)
+        key_expression = tuple_(*(table.c[column] for column in key_columns))
+        existing = set()
+        chunk_size = StatisticsService.IN_CLAUSE_CHUNK_SIZE
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            existing.update(
+                tuple(row) for row in db.session.execute(
+                    select(*(table.c[column] for column in key_columns)).where(key_expression.in_(chunk))
+                )
+            )
+        
+        now = datetime.utcnow()
+        
+        # Incrementos atómicos en un solo executemany
+        updates = [
+            AttendanceSummaryService._update_params(key_columns, key, delta)
+            for key, delta in deltas.items() if key in existing
+        ]
+        if updates:
+            AttendanceSummaryService._execute_increments(table, key_columns, updates, now, with_risk_level)
+        
+        new_keys = [key for key in deltas if key not in existing]
+        careers = {}
+        if with_risk_level and new_keys and RiskPolicy.current().by_career:
+            careers = AttendanceSummaryService._careers([key[0] for key in new_keys])
+        
+        inserts = []
+        for key in new_keys:
+            row = dict(deltas[key], **dict(zip(key_columns, key)))
+            if with_risk_level:
+                row['risk_level'] = StatisticsService._build_attendance_stats(
+                    **deltas[key], career=careers.get(row['student_id']), course_id=row['course_id']
+                )['risk_level']
+                row['updated_at'] = now
+            inserts.append(row)
+        if inserts:
+            AttendanceSummaryService._insert_counters(table, key_columns, inserts, now, with_risk_level)
+    
+    @staticmethod
+    def _update_params(key_columns, key, delta):
+        """Parámetros del executemany de incrementos para una clave"""
+        return dict(
+            {f'd_{column}': delta[column] for column in COUNTER_COLUMNS},
+            **{f'b_{column}': value for column, value in zip(key_columns, key)}
+        )
+    
+    @staticmethod
+    def _execute_increments(table, key_columns, params, now, with_risk_level=False):
+        db.session.execute(
+            update(table).where(
+                *(table.c[column] == bindparam(f'b_{column}') for column in key_columns)
+            ).values(
+                AttendanceSummaryService._increment_values(
+                    table, lambda column: bindparam(f'd_{column}'), now, with_risk_level
+                )
+            ),
+            params
+        )
+    
+    @staticmethod
+    def _insert_counters(table, key_columns, rows, now, with_risk_level=False):
+        """
+        Inserta filas de contadores nuevas; si otra transacción ya insertó la
+        misma clave, suma los deltas a esa fila
+        
+        - SQLite / PostgreSQL: INSERT ... ON CONFLICT DO UPDATE SET col = col + excluded.col
+        - Oracle y otros: INSERT en un SAVEPOINT y, ante IntegrityError, clave por
+          clave con reintento como UPDATE atómico
+        """
+        dialect = db.session.get_bind().dialect.name
+        
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            
+            statement = dialect_insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_=AttendanceSummaryService._increment_values(
+                    table, lambda column: statement.excluded[column], now, with_risk_level
+                )
+            )
+            db.session.execute(statement, rows)
+            return
+        
+        AttendanceSummaryService._insert_or_increment(table, key_columns, rows, now, with_risk_level)
+    
+    @staticmethod
+    def _insert_or_increment(table, key_columns, rows, now, with_risk_level=False):
+        """INSERT masivo en un SAVEPOINT; si choca con una clave concurrente se reintenta por clave"""
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table), rows)
+            return
+        except IntegrityError:
+            pass
+        
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(table), [row])
+            except IntegrityError:
+                key = tuple(row[column] for column in key_columns)
+                AttendanceSummaryService._execute_increments(
+                    table, key_columns,
+                    [AttendanceSummaryService._update_params(key_columns, key, row)],
+                    now, with_risk_level
+                )
+    
+    @staticmethod
+    def _careers(student_ids):
+        """Carrera de cada estudiante {student_id: career}"""
+        student_ids = list(dict.fromkeys(student_ids))
+        careers = {}
+        chunk_size = StatisticsService.IN_CLAUSE_CHUNK_SIZE
+        for start in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[start:start + chunk_size]
+            careers.update(
+                db.session.query(Student.id, Student.career).filter(Student.id.in_(chunk)).all()
+            )
+        return careers
+    
+    @staticmethod
+    def reclassify():
+        """
+        Recalcula risk_level de todo el resumen con la política de riesgo vigente
+        en un solo UPDATE (sin recorrer filas en Python)
+        
+        Returns:
+            cantidad de filas actualizadas
+        """
+        summary = StudentAttendanceSummary.__table__
+        
+        try:
+            result = db.session.execute(
+                update(summary).values(
+                    risk_level=AttendanceSummaryService._summary_risk_expression(
+                        summary.c.absent, summary.c.total_classes, summary.c.student_id, summary.c.course_id
+                    )
+                )
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        
+        return result.rowcount
+    
+    @staticmethod
+    def _all_records():
+        """Registros vivos y archivados como una sola subconsulta (UNION ALL)"""
+        live = select(
+            AttendanceRecord.id,
+            AttendanceRecord.student_id,
+            AttendanceRecord.course_id,
+            AttendanceRecord.attendance_date,
+            AttendanceRecord.status
+        )
+        archived = select(
+            AttendanceRecordArchive.id,
+            AttendanceRecordArchive.student_id,
+            AttendanceRecordArchive.course_id,
+            AttendanceRecordArchive.attendance_date,
+            AttendanceRecordArchive.status
+        )
+        return union_all(live, archived).subquery()
+    
+    @staticmethod
+    def _rebuild_inserts(rebuilt_at):
+        """
+        INSERT ... SELECT que cargan el resumen y los acumulados diarios desde
+        los registros vivos y archivados (rebuild y la migración de las tablas)
+        
+        Returns:
+            tupla (insert del resumen, insert de los acumulados diarios)
+        """
+        summary = StudentAttendanceSummary.__table__
+        rollups = AttendanceDailyRollup.__table__
+        
+        records = AttendanceSummaryService._all_records()
+        
+        counts = select(
+            records.c.student_id.label('student_id'),
+            records.c.course_id.label('course_id'),
+            *StatisticsService._record_count_columns(records)
+        ).group_by(
+            records.c.student_id,
+            records.c.course_id
+        ).subquery()
+        
+        summary_source = select(
+            counts.c.student_id,
+            counts.c.course_id,
+            counts.c.total_classes,
+            counts.c.present,
+            counts.c.absent,
+            counts.c.justified,
+            counts.c.late,
+            AttendanceSummaryService._summary_risk_expression(
+                counts.c.absent, counts.c.total_classes, counts.c.student_id, counts.c.course_id
+            ),
+            bindparam('rebuilt_at', rebuilt_at)
+        )
+        
+        rollup_source = select(
+            records.c.student_id,
+            records.c.attendance_date,
+            *StatisticsService._record_count_columns(records)
+        ).group_by(
+            records.c.student_id,
+            records.c.attendance_date
+        )
+        
+        return (
+            insert(summary).from_select(
+                ['student_id', 'course_id', *COUNTER_COLUMNS, 'risk_level', 'updated_at'],
+                summary_source
+            ),
+            insert(rollups).from_select(
+                ['student_id', 'rollup_date', *COUNTER_COLUMNS],
+                rollup_source
+            )
+        )
+    
+    @staticmethod
+    def rebuild():
+        """
+        Recalcula desde attendance_records la tabla de resumen y los acumulados diarios
+        
+        Incluye los semestres archivados, de modo que los totales por estudiante
+        no cambian al mover registros a attendance_records_archive.
+        
+        Returns:
+            dict con la cantidad de filas generadas en cada tabla
+        """
+        summary = StudentAttendanceSummary.__table__
+        rollups = AttendanceDailyRollup.__table__
+        summary_insert, rollup_insert = AttendanceSummaryService._rebuild_inserts(datetime.utcnow())
+        
+        try:
+            db.session.execute(delete(summary))
+            db.session.execute(summary_insert)
+            db.session.execute(delete(rollups))
+            db.session.execute(rollup_insert)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        
+        return {
+            'summary_rows': db.session.query(func.count()).select_from(summary).scalar(),
+            'rollup_rows': db.session.query(func.count()).select_from(rollups).scalar()
+        }
+    
+    @staticmethod
+    def get_window_stats(student_ids, date_from, date_to=None):
+        """
+        Estadísticas de asistencia de una ventana de fechas sumando los
+        acumulados diarios (no recorre attendance_records)
+        
+        Args:
+            student_ids: IDs de los estudiantes
+            date_from: fecha inicial de la ventana
+            date_to: fecha final (opcional, por defecto hoy)
+        
+        Returns:
+            dict {student_id: estadísticas} con el formato de calculate_student_attendance
+        """
+        date_to = date_to or date.today()
+        student_ids = list(dict.fromkeys(student_ids))
+        results = {
+            student_id: StatisticsService._build_attendance_stats()
+            for student_id in student_ids
+        }
+        
+        chunk_size = StatisticsService.IN_CLAUSE_CHUNK_SIZE
+        for start in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[start:start + chunk_size]
+            
+            rows = db.session.query(
+                AttendanceDailyRollup.student_id,
+                func.sum(AttendanceDailyRollup.total_classes).label('total_classes'),
+                func.sum(AttendanceDailyRollup.present).label('present'),
+                func.sum(AttendanceDailyRollup.absent).label('absent'),
+                func.sum(AttendanceDailyRollup.justified).label('justified'),
+                func.sum(AttendanceDailyRollup.late).label('late')
+            ).filter(
+                AttendanceDailyRollup.student_id.in_(chunk),
+                AttendanceDailyRollup.rollup_date >= date_from,
+                AttendanceDailyRollup.rollup_date <= date_to
+            ).group_by(AttendanceDailyRollup.student_id)
+            
+            for row in rows:
+                results[row.student_id] = StatisticsService._build_attendance_stats(
+                    row.total_classes, row.present, row.absent, row.justified, row.late
+                )
+        
+        return results
+    
+    @staticmethod
+    def window_cohort_query(date_from, date_to=None, min_risk_level=None):
+        """
+        Estudiantes activos clasificados en SQL (RiskPolicy) según la
+        asistencia de una ventana de fechas sumada desde los acumulados diarios
+        
+        Returns:
+            Query con filas (Student, contadores, absence_percentage, risk_level)
+            ordenadas por inasistencias, de mayor a menor
+        """
+        date_to = date_to or date.today()
+        
+        counts = db.session.query(
+            AttendanceDailyRollup.student_id.label('student_id'),
+            func.sum(AttendanceDailyRollup.total_classes).label('total_classes'),
+            func.sum(AttendanceDailyRollup.present).label('present'),
+            func.sum(AttendanceDailyRollup.absent).label('absent'),
+            func.sum(AttendanceDailyRollup.justified).label('justified'),
+            func.sum(AttendanceDailyRollup.late).label('late')
+        ).filter(
+            AttendanceDailyRollup.rollup_date >= date_from,
+            AttendanceDailyRollup.rollup_date <= date_to
+        ).group_by(AttendanceDailyRollup.student_id).subquery()
+        
+        absence_percentage = func.round(counts.c.absent * 100.0 / counts.c.total_classes, 2)
+        risk_expression = StatisticsService._risk_level_expression(absence_percentage, career=Student.career)
+        
+        query = db.session.query(
+            Student,
+            counts.c.total_classes,
+            counts.c.present,
+            counts.c.absent,
+            counts.c.justified,
+            counts.c.late,
+            absence_percentage.label('absence_percentage'),
+            risk_expression.label('risk_level')
+        ).join(
+            counts, counts.c.student_id == Student.id
+        ).filter(
+            Student.status == 'A',
+            counts.c.total_classes > 0
+        )
+        
+        if min_risk_level:
+            query = query.filter(risk_expression.in_(RiskPolicy.current().levels_at_or_above(min_risk_level)))
+        
+        return query.order_by(absence_percentage.desc(), Student.id)
+    
+    @staticmethod
+    def get_rolling_stats(student_ids, today=None):
+        """
+        Ventanas móviles estándar: últimos 7 días, últimos 30 días y semestre en curso
+        
+        Returns:
+            dict {student_id: {'last_7_days': ..., 'last_30_days': ..., 'semester': ...}}
+        """
+        today = today or date.today()
+        semester_label, semester_start, _ = SemesterService.current(today)
+        
+        windows = {
+            'last_7_days': AttendanceSummaryService.get_window_stats(student_ids, today - timedelta(days=6), today),
+            'last_30_days': AttendanceSummaryService.get_window_stats(student_ids, today - timedelta(days=29), today),
+            'semester': AttendanceSummaryService.get_window_stats(student_ids, semester_start, today)
+        }
+        
+        results = {}
+        for student_id in student_ids:
+            results[student_id] = {name: stats[student_id] for name, stats in windows.items()}
+            results[student_id]['semester']['semester'] = semester_label
+        
+        return results
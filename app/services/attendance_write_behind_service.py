@@ -0,0 +1,347 @@
+"""
+Modo write-behind para el registro de asistencia en horas pico
+Las asistencias validadas se confirman al cliente apenas quedan en un diario
+local (archivo SQLite) y un hilo de fondo las vuelca a la base en lotes
+con AttendanceService.upsert_attendance
+"""
+from app import db
+from app.services.attendance_service import AttendanceService
+from sqlalchemy.exc import OperationalError, InterfaceError
+from flask import current_app
+from datetime import datetime, date
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Estado del drenador de este proceso (cada worker de gunicorn tiene el suyo)
+_state = {
+    'app': None,
+    'thread': None,
+    'owner': f'{os.getpid()}-{uuid.uuid4().hex[:8]}',
+    'drained': 0,
+    'dead': 0,
+    'batches': 0,
+    'last_drain_at': None,
+    'last_error': None
+}
+_lock = threading.Lock()
+
+# Un solo vaciado a la vez dentro del proceso (hilo drenador y llamadas manuales)
+_drain_lock = threading.Lock()
+
+class AttendanceWriteBehindService:
+    
+    # Fila de la tabla lease que identifica al worker que drena
+    LEASE_NAME = 'drainer'
+    
+    @staticmethod
+    def enabled(app=None):
+        """Modo write-behind activo (ATTENDANCE_WRITE_BEHIND)"""
+        app = app or current_app
+        return bool(app.config.get('ATTENDANCE_WRITE_BEHIND'))
+    
+    @staticmethod
+    def _config(key, default=None):
+        app = _state['app'] or current_app
+        return app.config.get(key, default)
+    
+    @staticmethod
+    def _connect():
+        """Conexión al diario (una por operación; el archivo se comparte entre workers)"""
+        path = AttendanceWriteBehindService._config('ATTENDANCE_JOURNAL_PATH')
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=FULL')
+        return connection
+    
+    @staticmethod
+    def _init_journal():
+        """Crea las tablas del diario si no existen"""
+        connection = AttendanceWriteBehindService._connect()
+        try:
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS journal (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id INTEGER NOT NULL,
+                    course_id INTEGER NOT NULL,
+                    attendance_date TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'PENDING',
+                    enqueued_at REAL NOT NULL,
+                    last_error TEXT
+                )
+            ''')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_journal_state_seq ON journal (state, seq)')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS lease (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            connection.execute(
+                'INSERT OR IGNORE INTO lease (name, owner, expires_at) VALUES (?, NULL, 0)',
+                (AttendanceWriteBehindService.LEASE_NAME,)
+            )
+        finally:
+            connection.close()
+    
+    @staticmethod
+    def init_app(app):
+        """Prepara el diario e inicia el drenador de este worker"""
+        if not AttendanceWriteBehindService.enabled(app):
+            return
+        
+        _state['app'] = app
+        with app.app_context():
+            AttendanceWriteBehindService._init_journal()
+        AttendanceWriteBehindService.start()
+    
+    @staticmethod
+    def start():
+        """Inicia el hilo drenador si no está corriendo"""
+        with _lock:
+            thread = _state['thread']
+            if thread is not None and thread.is_alive():
+                return
+            
+            thread = threading.Thread(
+                target=AttendanceWriteBehindService._run,
+                name='attendance-write-behind',
+                daemon=True
+            )
+            _state['thread'] = thread
+            thread.start()
+    
+    @staticmethod
+    def enqueue(data_list):
+        """
+        Guarda en el diario asistencias ya validadas
+        
+        Args:
+            data_list: lista de dicts con student_id, course_id,
+                       attendance_date (date) y los campos a escribir
+        
+        Returns:
+            dict con la cantidad encolada y el último número de secuencia
+        """
+        now = time.time()
+        rows = []
+        for data in data_list:
+            payload = dict(data, attendance_date=data['attendance_date'].isoformat())
+            rows.append((
+                data['student_id'],
+                data['course_id'],
+                payload['attendance_date'],
+                json.dumps(payload),
+                now
+            ))
+        
+        connection = AttendanceWriteBehindService._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'INSERT INTO journal (student_id, course_id, attendance_date, payload, enqueued_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            last_seq = connection.execute('SELECT MAX(seq) FROM journal').fetchone()[0]
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        finally:
+            connection.close()
+        
+        AttendanceWriteBehindService.start()
+        return {'queued': len(rows), 'journal_seq': last_seq}
+    
+    @staticmethod
+    def _acquire_lease(connection):
+        """Solo un worker drena a la vez: así se respeta el orden del diario"""
+        now = time.time()
+        ttl = AttendanceWriteBehindService._config('ATTENDANCE_DRAIN_LEASE_SECONDS', 30)
+        cursor = connection.execute(
+            'UPDATE lease SET owner = ?, expires_at = ? WHERE name = ? AND (owner = ? OR expires_at < ?)',
+            (_state['owner'], now + ttl, AttendanceWriteBehindService.LEASE_NAME, _state['owner'], now)
+        )
+        return cursor.rowcount == 1
+    
+    @staticmethod
+    def _pending(connection, limit):
+        return connection.execute(
+            "SELECT seq, student_id, course_id, attendance_date, payload FROM journal "
+            "WHERE state = 'PENDING' ORDER BY seq LIMIT ?",
+            (limit,)
+        ).fetchall()
+    
+    @staticmethod
+    def _merge(entries):
+        """
+        Combina las entradas de cada clave en orden de secuencia: un campo
+        omitido en una entrada posterior conserva el valor de la anterior
+        
+        Returns:
+            dict {clave: (datos combinados, [seq, ...])} en orden de llegada
+        """
+        merged = {}
+        for seq, student_id, course_id, attendance_date, payload in entries:
+            key = (student_id, course_id, attendance_date)
+            data = json.loads(payload)
+            data['attendance_date'] = date.fromisoformat(data['attendance_date'])
+            
+            if key in merged:
+                previous, seqs = merged[key]
+                merged[key] = (dict(previous, **data), seqs + [seq])
+            else:
+                merged[key] = (data, [seq])
+        return merged
+    
+    @staticmethod
+    def drain_once():
+        """
+        Vuelca un lote del diario a la base de datos
+        
+        Returns:
+            cantidad de entradas procesadas (0 si no hay pendientes o no se
+            obtuvo el turno de drenado)
+        """
+        with _drain_lock:
+            return AttendanceWriteBehindService._drain_batch()
+    
+    @staticmethod
+    def _drain_batch():
+        batch_size = AttendanceWriteBehindService._config('ATTENDANCE_DRAIN_BATCH', 1000)
+        connection = AttendanceWriteBehindService._connect()
+        try:
+            if not AttendanceWriteBehindService._acquire_lease(connection):
+                return 0
+            
+            entries = AttendanceWriteBehindService._pending(connection, batch_size)
+            if not entries:
+                return 0
+            
+            merged = AttendanceWriteBehindService._merge(entries)
+            done = []
+            dead = []
+            
+            try:
+                AttendanceService.upsert_attendance([data for data, _ in merged.values()])
+                done = [seq for _, seqs in merged.values() for seq in seqs]
+            except (OperationalError, InterfaceError):
+                # Base no disponible: el lote queda en el diario y se reintenta
+                raise
+            except Exception as e:
+                # Un dato rechazado no debe bloquear el lote: se reintenta clave por clave
+                print(f"⚠️ Lote del diario rechazado, reintentando por clave: {str(e)}")
+                for data, seqs in merged.values():
+                    # Renovar el turno entre claves: sin él otro worker podría volver
+                    # a drenar las mismas entradas; las restantes quedan en el diario
+                    if not AttendanceWriteBehindService._acquire_lease(connection):
+                        print("⚠️ Se perdió el turno de drenado, el resto del lote queda pendiente")
+                        break
+                    try:
+                        AttendanceService.upsert_attendance([data])
+                        done.extend(seqs)
+                    except (OperationalError, InterfaceError):
+                        raise
+                    except Exception as key_error:
+                        dead.append((str(key_error)[:500], seqs))
+            finally:
+                db.session.remove()
+                AttendanceWriteBehindService._settle(connection, done, dead)
+            
+            with _lock:
+                _state['drained'] += len(done)
+                _state['dead'] += sum(len(seqs) for _, seqs in dead)
+                _state['batches'] += 1
+                _state['last_drain_at'] = datetime.utcnow()
+            
+            return len(entries)
+        finally:
+            connection.close()
+    
+    @staticmethod
+    def _settle(connection, done, dead):
+        """Quita del diario lo escrito y marca como DEAD lo rechazado"""
+        if not done and not dead:
+            return
+        
+        connection.execute('BEGIN IMMEDIATE')
+        connection.executemany('DELETE FROM journal WHERE seq = ?', [(seq,) for seq in done])
+        connection.executemany(
+            "UPDATE journal SET state = 'DEAD', last_error = ? WHERE seq = ?",
+            [(error, seq) for error, seqs in dead for seq in seqs]
+        )
+        connection.execute('COMMIT')
+    
+    @staticmethod
+    def drain(max_batches=None):
+        """Drena hasta vaciar el diario (o hasta max_batches lotes)"""
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            processed = AttendanceWriteBehindService.drain_once()
+            if not processed:
+                break
+            total += processed
+            batches += 1
+        return total
+    
+    @staticmethod
+    def _run():
+        """Bucle del hilo drenador"""
+        app = _state['app']
+        while True:
+            interval = app.config.get('ATTENDANCE_DRAIN_INTERVAL', 1.0)
+            try:
+                with app.app_context():
+                    processed = AttendanceWriteBehindService.drain()
+                if processed:
+                    print(f"✅ Write-behind: {processed} asistencias volcadas")
+            except Exception as e:
+                with _lock:
+                    _state['last_error'] = f'{datetime.utcnow().isoformat()}: {str(e)[:500]}'
+                print(f"❌ Error en el drenador de asistencias: {str(e)}")
+                interval = max(interval, 5)
+            time.sleep(interval)
+    
+    @staticmethod
+    def get_metrics():
+        """Profundidad del diario y contadores del drenador de este worker"""
+        connection = AttendanceWriteBehindService._connect()
+        try:
+            pending, oldest = connection.execute(
+                "SELECT COUNT(*), MIN(enqueued_at) FROM journal WHERE state = 'PENDING'"
+            ).fetchone()
+            dead = connection.execute(
+                "SELECT COUNT(*) FROM journal WHERE state = 'DEAD'"
+            ).fetchone()[0]
+            owner, expires_at = connection.execute(
+                'SELECT owner, expires_at FROM lease WHERE name = ?',
+                (AttendanceWriteBehindService.LEASE_NAME,)
+            ).fetchone()
+        finally:
+            connection.close()
+        
+        with _lock:
+            thread = _state['thread']
+            return {
+                'enabled': True,
+                'queue_depth': pending,
+                'oldest_pending_seconds': round(time.time() - oldest, 3) if oldest else 0,
+                'dead_letters': dead,
+                'drainer_owner': owner if expires_at >= time.time() else None,
+                'worker': {
+                    'id': _state['owner'],
+                    'drainer_alive': bool(thread and thread.is_alive()),
+                    'drained': _state['drained'],
+                    'dead': _state['dead'],
+                    'batches': _state['batches'],
+                    'last_drain_at': _state['last_drain_at'].isoformat() if _state['last_drain_at'] else None,
+                    'last_error': _state['last_error']
+                }
+            }
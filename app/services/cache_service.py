@@ -0,0 +1,73 @@
+"""
+Caché en memoria por proceso con expiración (TTL)
+Cada worker de gunicorn mantiene su propia copia
+"""
+import threading
+import time
+
+class TTLCache:
+    """Diccionario con expiración por entrada, seguro entre hilos"""
+    
+    def __init__(self, ttl_seconds=60, max_entries=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """Obtiene un valor si existe y no ha expirado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            
+            return value
+    
+    def set(self, key, value, ttl_seconds=None):
+        """Guarda un valor con el TTL indicado (o el TTL por defecto)"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return value
+        
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._evict()
+            self._entries[key] = (time.monotonic() + ttl, value)
+        
+        return value
+    
+    def get_or_set(self, key, compute, ttl_seconds=None):
+        """Devuelve el valor en caché o lo calcula con compute() y lo guarda"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.set(key, compute(), ttl_seconds)
+        return value
+    
+    def invalidate(self, key=None):
+        """Elimina una entrada (o todas si no se indica la clave)"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+    
+    def _evict(self):
+        """Elimina las entradas expiradas y, si no alcanza, la más próxima a expirar"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        
+        if len(self._entries) >= self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            del self._entries[oldest]
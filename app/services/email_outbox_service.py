@@ -0,0 +1,206 @@
+"""
+Envío en segundo plano de los emails encolados (email_notifications en PENDING)
+Las revisiones en lote encolan los emails en su misma transacción y un hilo de
+fondo los envía por SMTP sin bloquear la respuesta
+"""
+from app import db
+from app.models.email_notification import EmailNotification
+from app.services.email_service import EmailService
+from sqlalchemy import update
+from flask import current_app
+from datetime import datetime, timedelta
+import threading
+
+# Estado del hilo de envío de este proceso (cada worker de gunicorn tiene el suyo)
+_state = {
+    'app': None,
+    'thread': None,
+    'sent': 0,
+    'failed': 0,
+    'last_run_at': None,
+    'last_error': None
+}
+_lock = threading.Lock()
+
+# Despierta al hilo apenas se confirma un lote de emails encolados
+_wake = threading.Event()
+
+class EmailOutboxService:
+    
+    @staticmethod
+    def enabled(app=None):
+        """Hilo de envío activo en este proceso (EMAIL_OUTBOX_WORKER)"""
+        app = app or current_app
+        return bool(app.config.get('EMAIL_OUTBOX_WORKER'))
+    
+    @staticmethod
+    def _config(key, default=None):
+        app = _state['app'] or current_app
+        return app.config.get(key, default)
+    
+    @staticmethod
+    def init_app(app):
+        """
+        Inicia el hilo de envío de este worker
+        
+        Se llama desde los puntos de entrada web (run.py / wsgi.py), no desde
+        create_app: un script que termina a mitad de un envío dejaría emails en
+        SENDING que luego se reenviarían.
+        """
+        if not EmailOutboxService.enabled(app):
+            return
+        
+        _state['app'] = app
+        EmailOutboxService.start()
+    
+    @staticmethod
+    def start():
+        """Inicia el hilo de envío si no está corriendo"""
+        with _lock:
+            thread = _state['thread']
+            if thread is not None and thread.is_alive():
+                return
+            
+            thread = threading.Thread(
+                target=EmailOutboxService._run,
+                name='email-outbox',
+                daemon=True
+            )
+            _state['thread'] = thread
+            thread.start()
+    
+    @staticmethod
+    def wake():
+        """Avisa al hilo que hay emails nuevos (llamar después del commit)"""
+        _wake.set()
+    
+    @staticmethod
+    def _release_stale():
+        """Devuelve a PENDING los emails tomados por un worker que se cayó a mitad del envío"""
+        lease = EmailOutboxService._config('EMAIL_OUTBOX_LEASE_SECONDS', 300)
+        table = EmailNotification.__table__
+        db.session.execute(
+            update(table).where(
+                table.c.status == 'SENDING',
+                table.c.sent_at < datetime.utcnow() - timedelta(seconds=lease)
+            ).values(status='PENDING', sent_at=None)
+        )
+        db.session.commit()
+    
+    @staticmethod
+    def _claim(notification_id):
+        """
+        Toma un email PENDING (UPDATE condicional: solo un worker lo envía)
+        
+        Mientras está en SENDING, sent_at guarda el momento en que se tomó.
+        """
+        table = EmailNotification.__table__
+        result = db.session.execute(
+            update(table).where(
+                table.c.id == notification_id,
+                table.c.status == 'PENDING'
+            ).values(status='SENDING', sent_at=datetime.utcnow())
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
+    @staticmethod
+    def _finish(notification_id, error_msg=None):
+        table = EmailNotification.__table__
+        db.session.execute(
+            update(table).where(table.c.id == notification_id).values(
+                status='FAILED' if error_msg else 'SENT',
+                sent_at=None if error_msg else datetime.utcnow(),
+                error_message=error_msg[:1000] if error_msg else None
+            )
+        )
+        db.session.commit()
+    
+    @staticmethod
+    def send_pending(limit=None):
+        """
+        Envía un lote de emails PENDING en orden de llegada
+        
+        Returns:
+            dict con la cantidad de enviados y fallidos
+        """
+        limit = limit or EmailOutboxService._config('EMAIL_OUTBOX_BATCH', 100)
+        EmailOutboxService._release_stale()
+        
+        pending_ids = [
+            row.id for row in db.session.query(EmailNotification.id).filter(
+                EmailNotification.status == 'PENDING'
+            ).order_by(EmailNotification.id).limit(limit)
+        ]
+        
+        sent = 0
+        failed = 0
+        for notification_id in pending_ids:
+            if not EmailOutboxService._claim(notification_id):
+                continue
+            
+            notification = db.session.get(EmailNotification, notification_id)
+            try:
+                EmailService._deliver(
+                    notification.recipient_email,
+                    notification.recipient_name,
+                    notification.subject,
+                    notification.body
+                )
+            except Exception as e:
+                print(f"❌ Error al enviar email a {notification.recipient_email}: {str(e)}")
+                EmailOutboxService._finish(notification_id, str(e))
+                failed += 1
+                continue
+            
+            EmailOutboxService._finish(notification_id)
+            sent += 1
+        
+        with _lock:
+            _state['sent'] += sent
+            _state['failed'] += failed
+            _state['last_run_at'] = datetime.utcnow()
+        
+        return {'sent': sent, 'failed': failed}
+    
+    @staticmethod
+    def send_all(max_batches=None):
+        """Envía lotes hasta vaciar la cola (o hasta max_batches lotes)"""
+        totals = {'sent': 0, 'failed': 0}
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            result = EmailOutboxService.send_pending()
+            if not result['sent'] and not result['failed']:
+                break
+            totals['sent'] += result['sent']
+            totals['failed'] += result['failed']
+            batches += 1
+        return totals
+    
+    @staticmethod
+    def retry_failed():
+        """Vuelve a encolar los emails FAILED"""
+        table = EmailNotification.__table__
+        result = db.session.execute(
+            update(table).where(table.c.status == 'FAILED').values(status='PENDING', error_message=None)
+        )
+        db.session.commit()
+        return result.rowcount
+    
+    @staticmethod
+    def _run():
+        """Bucle del hilo de envío"""
+        app = _state['app']
+        while True:
+            interval = app.config.get('EMAIL_OUTBOX_INTERVAL', 30)
+            _wake.wait(interval)
+            _wake.clear()
+            try:
+                with app.app_context():
+                    result = EmailOutboxService.send_all()
+                if result['sent'] or result['failed']:
+                    print(f"✅ Emails en segundo plano: {result['sent']} enviados, {result['failed']} fallidos")
+            except Exception as e:
+                with _lock:
+                    _state['last_error'] = f'{datetime.utcnow().isoformat()}: {str(e)[:500]}'
+                print(f"❌ Error en el envío de emails en segundo plano: {str(e)}")
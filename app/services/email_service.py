@@ -7,6 +7,7 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 from app import db
+from sqlalchemy import insert
 import os
 
 class EmailService:
@@ -37,22 +38,7 @@ class EmailService:
             bool: True si se envió correctamente, False si falló
         """
         try:
-            # Crear mensaje
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{EmailService.FROM_NAME} <{EmailService.FROM_EMAIL}>"
-            msg['To'] = f"{to_name} <{to_email}>"
-            
-            # Agregar cuerpo HTML
-            html_part = MIMEText(body_html, 'html', 'utf-8')
-            msg.attach(html_part)
-            
-            # Enviar email
-            with smtplib.SMTP(EmailService.SMTP_SERVER, EmailService.SMTP_PORT) as server:
-                server.starttls()
-                if EmailService.SMTP_PASSWORD:
-                    server.login(EmailService.SMTP_USER, EmailService.SMTP_PASSWORD)
-                server.send_message(msg)
+            EmailService._deliver(to_email, to_name, subject, body_html)
             
             # Registrar en base de datos
             EmailService._log_email(
@@ -77,6 +63,53 @@ class EmailService:
             
             return False
     
+    @staticmethod
+    def _deliver(to_email, to_name, subject, body_html):
+        """Envía el mensaje por SMTP (lanza la excepción si falla, no registra en BD)"""
+        # Crear mensaje
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = f"{EmailService.FROM_NAME} <{EmailService.FROM_EMAIL}>"
+        msg['To'] = f"{to_name} <{to_email}>"
+        
+        # Agregar cuerpo HTML
+        html_part = MIMEText(body_html, 'html', 'utf-8')
+        msg.attach(html_part)
+        
+        # Enviar email
+        with smtplib.SMTP(EmailService.SMTP_SERVER, EmailService.SMTP_PORT) as server:
+            server.starttls()
+            if EmailService.SMTP_PASSWORD:
+                server.login(EmailService.SMTP_USER, EmailService.SMTP_PASSWORD)
+            server.send_message(msg)
+    
+    @staticmethod
+    def queue_emails(messages):
+        """
+        Encola emails como PENDING en email_notifications para el envío en segundo plano
+        
+        No hace commit: los emails quedan en la transacción del llamador y solo
+        se envían si esta se confirma (ver EmailOutboxService).
+        
+        Args:
+            messages: lista de dicts con recipient_email, recipient_name, subject,
+                      body, notification_type, related_table y related_id
+        
+        Returns:
+            cantidad de emails encolados
+        """
+        from app.models.email_notification import EmailNotification
+        
+        if not messages:
+            return 0
+        
+        now = datetime.utcnow()
+        db.session.execute(
+            insert(EmailNotification.__table__),
+            [dict(message, status='PENDING', created_at=now) for message in messages]
+        )
+        return len(messages)
+    
     @staticmethod
     def _log_email(to_email, to_name, subject, body, notification_type, related_table, related_id, status, error_msg):
         """Registra el email en la base de datos"""
@@ -149,14 +182,17 @@ class EmailService:
         )
     
     @staticmethod
-    def send_justification_processed(student, justification, course, admin_response, approved):
+    def build_justification_processed(student_name, course_name, absence_date, reason_type, admin_response, approved):
         """
-        Envía email al estudiante cuando su justificación es procesada
+        Arma el asunto y el cuerpo HTML del email de justificación procesada
+        
+        Returns:
+            tupla (subject, body_html)
         """
         status_text = "APROBADA" if approved else "RECHAZADA"
         color = "#10b981" if approved else "#ef4444"
         
-        subject = f"Justificación {status_text} - {course.course_name}"
+        subject = f"Justificación {status_text} - {course_name}"
         
         body_html = f"""
         <html>
@@ -164,14 +200,14 @@ class EmailService:
             <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
                 <h2 style="color: {color};">Justificación {status_text}</h2>
                 
-                <p>Estimado/a <strong>{student.full_name}</strong>,</p>
+                <p>Estimado/a <strong>{student_name}</strong>,</p>
                 
                 <p>Su solicitud de justificación ha sido <strong style="color: {color};">{status_text}</strong>:</p>
                 
                 <div style="background: #f3f4f6; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                    <p><strong>Curso:</strong> {course.course_name}</p>
-                    <p><strong>Fecha de inasistencia:</strong> {justification.absence_date.strftime('%d/%m/%Y')}</p>
-                    <p><strong>Motivo:</strong> {justification.reason_type}</p>
+                    <p><strong>Curso:</strong> {course_name}</p>
+                    <p><strong>Fecha de inasistencia:</strong> {absence_date.strftime('%d/%m/%Y')}</p>
+                    <p><strong>Motivo:</strong> {reason_type}</p>
                 </div>
                 
                 <div style="background: {'#d1fae5' if approved else '#fee2e2'}; padding: 15px; border-radius: 8px; margin: 20px 0;">
@@ -190,6 +226,22 @@ class EmailService:
         </html>
         """
         
+        return subject, body_html
+    
+    @staticmethod
+    def send_justification_processed(student, justification, course, admin_response, approved):
+        """
+        Envía email al estudiante cuando su justificación es procesada
+        """
+        subject, body_html = EmailService.build_justification_processed(
+            student.full_name,
+            course.course_name,
+            justification.absence_date,
+            justification.reason_type,
+            admin_response,
+            approved
+        )
+        
         return EmailService.send_email(
             student.email,
             student.full_name,
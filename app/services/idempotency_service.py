@@ -0,0 +1,207 @@
+"""
+Servicio de idempotencia para los POST que reintentan los clientes móviles
+La primera respuesta de cada Idempotency-Key se guarda (caché del worker y
+tabla idempotency_keys) y se repite en los reintentos sin volver a escribir
+"""
+from app import db
+from app.models.idempotency_key import IdempotencyKey
+from app.services.cache_service import TTLCache
+from sqlalchemy import insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from flask import request, jsonify, current_app, Response
+from functools import wraps
+from datetime import datetime, timedelta
+import hashlib
+
+# Respuestas recientes del worker (evita ir a la base en los reintentos inmediatos)
+_responses_cache = TTLCache(ttl_seconds=86400, max_entries=4096)
+
+class IdempotencyService:
+    
+    HEADER = 'Idempotency-Key'
+    MAX_KEY_LENGTH = 255
+    
+    # Una reserva IN_PROGRESS más antigua se considera abandonada (worker caído)
+    IN_PROGRESS_TIMEOUT_SECONDS = 120
+    
+    @staticmethod
+    def key_hash(key):
+        """La clave se limita a la ruta y al método para que no choque entre endpoints"""
+        scope = f'{request.method}:{request.path}:{key}'
+        return hashlib.sha256(scope.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def request_hash():
+        """Huella del cuerpo: una clave reutilizada con otro contenido se rechaza"""
+        digest = hashlib.sha256()
+        
+        if request.mimetype in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+            for name, value in sorted(request.form.items(multi=True)):
+                digest.update(f'{name}={value}\n'.encode('utf-8'))
+            for name, upload in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+                digest.update(f'{name}:{upload.filename}\n'.encode('utf-8'))
+                digest.update(upload.stream.read())
+                upload.stream.seek(0)
+        else:
+            digest.update(request.get_data(cache=True))
+        
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _replay(stored):
+        status_code, body = stored
+        response = Response(body, status=status_code, mimetype='application/json')
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+    
+    @staticmethod
+    def _reserve(key_hash, request_hash, ttl):
+        """
+        Reserva la clave en la base (IN_PROGRESS) antes de ejecutar la escritura
+        
+        Returns:
+            None si se reservó, o la fila existente de un intento anterior
+        """
+        now = datetime.utcnow()
+        table = IdempotencyKey.__table__
+        
+        abandoned_before = now - timedelta(seconds=IdempotencyService.IN_PROGRESS_TIMEOUT_SECONDS)
+        
+        existing = db.session.get(IdempotencyKey, key_hash)
+        if existing is not None and existing.expires_at > now:
+            if existing.state == 'DONE' or existing.created_at > abandoned_before:
+                return existing
+        
+        try:
+            # Las claves vencidas (y la reserva abandonada) se eliminan junto con la nueva reserva
+            db.session.execute(delete(table).where(
+                (table.c.expires_at <= now) |
+                ((table.c.key_hash == key_hash) & (table.c.state == 'IN_PROGRESS') & (table.c.created_at <= abandoned_before))
+            ))
+            db.session.execute(insert(table).values(
+                key_hash=key_hash,
+                request_hash=request_hash,
+                state='IN_PROGRESS',
+                created_at=now,
+                expires_at=now + timedelta(seconds=ttl)
+            ))
+            db.session.commit()
+        except IntegrityError:
+            # Otro worker reservó la misma clave al mismo tiempo
+            db.session.rollback()
+            return db.session.get(IdempotencyKey, key_hash, populate_existing=True)
+        
+        return None
+    
+    @staticmethod
+    def _store(key_hash, status_code, body):
+        """Guarda la respuesta (la escritura ya se confirmó: un error aquí no se propaga)"""
+        table = IdempotencyKey.__table__
+        try:
+            db.session.execute(
+                update(table).where(table.c.key_hash == key_hash).values(
+                    state='DONE',
+                    status_code=status_code,
+                    response_body=body
+                )
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ No se pudo guardar la respuesta idempotente: {str(e)}")
+    
+    @staticmethod
+    def _release(key_hash):
+        """Libera la clave para que el reintento vuelva a ejecutar la escritura"""
+        table = IdempotencyKey.__table__
+        try:
+            db.session.rollback()
+            db.session.execute(delete(table).where(table.c.key_hash == key_hash))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ No se pudo liberar la clave idempotente: {str(e)}")
+
+def idempotent(f):
+    """
+    Decorador para endpoints POST que aceptan el header Idempotency-Key
+    
+    - Sin el header el endpoint se ejecuta normalmente.
+    - La primera respuesta (2xx o 4xx) se guarda y se repite en los reintentos
+      con el header Idempotent-Replayed: true.
+    - Un reintento mientras la primera petición sigue en curso recibe 409, y
+      la misma clave con otro cuerpo recibe 422.
+    - Las respuestas 5xx no se guardan: el reintento vuelve a ejecutarse.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = request.headers.get(IdempotencyService.HEADER)
+        if not key:
+            return f(*args, **kwargs)
+        
+        if len(key) > IdempotencyService.MAX_KEY_LENGTH:
+            return jsonify({
+                'success': False,
+                'message': f'{IdempotencyService.HEADER} no puede superar {IdempotencyService.MAX_KEY_LENGTH} caracteres'
+            }), 400
+        
+        ttl = current_app.config.get('IDEMPOTENCY_TTL_SECONDS', 86400)
+        key_hash = IdempotencyService.key_hash(key)
+        request_hash = IdempotencyService.request_hash()
+        
+        cached = _responses_cache.get(key_hash)
+        if cached is not None:
+            if cached[0] != request_hash:
+                return jsonify({
+                    'success': False,
+                    'message': f'{IdempotencyService.HEADER} ya se usó con otro contenido'
+                }), 422
+            return IdempotencyService._replay(cached[1:])
+        
+        # Respaldo en la base: compartido entre workers y reinicios
+        use_database = True
+        try:
+            existing = IdempotencyService._reserve(key_hash, request_hash, ttl)
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Idempotencia sin respaldo en base de datos: {str(e)}")
+            existing = None
+            use_database = False
+        
+        if existing is not None:
+            if existing.request_hash != request_hash:
+                return jsonify({
+                    'success': False,
+                    'message': f'{IdempotencyService.HEADER} ya se usó con otro contenido'
+                }), 422
+            if existing.state != 'DONE':
+                return jsonify({
+                    'success': False,
+                    'message': 'La solicitud original todavía se está procesando'
+                }), 409
+            
+            stored = (existing.status_code, existing.response_body)
+            _responses_cache.set(key_hash, (request_hash, *stored), ttl)
+            return IdempotencyService._replay(stored)
+        
+        try:
+            result = f(*args, **kwargs)
+        except Exception:
+            if use_database:
+                IdempotencyService._release(key_hash)
+            raise
+        
+        response = current_app.make_response(result)
+        if response.status_code >= 500:
+            if use_database:
+                IdempotencyService._release(key_hash)
+            return response
+        
+        body = response.get_data(as_text=True)
+        if use_database:
+            IdempotencyService._store(key_hash, response.status_code, body)
+        _responses_cache.set(key_hash, (request_hash, response.status_code, body), ttl)
+        
+        return response
+    
+    return decorated
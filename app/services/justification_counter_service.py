@@ -0,0 +1,287 @@
+"""
+Servicio para mantener justification_counters
+Los contadores por estado (global, estudiante, curso y profesor del curso) se
+actualizan en la misma transacción que crea, aprueba o rechaza una justificación
+"""
+from app import db
+from app.models.justification import Justification
+from app.models.justification_counter import JustificationCounter
+from app.models.course import Course
+from sqlalchemy import func, case, select, insert, update, delete, bindparam, literal, tuple_
+from sqlalchemy.exc import IntegrityError
+from collections import defaultdict
+from datetime import datetime
+
+# Columna del contador que corresponde a cada estado
+STATUS_COLUMNS = {
+    'PENDIENTE': 'pending',
+    'APROBADA': 'approved',
+    'RECHAZADA': 'rejected'
+}
+
+COUNTER_COLUMNS = ('total', 'pending', 'approved', 'rejected')
+
+SCOPES = ('GLOBAL', 'STUDENT', 'COURSE', 'PROFESSOR')
+
+class JustificationCounterService:
+    
+    # Oracle no admite más de 1000 expresiones dentro de un IN (...)
+    IN_CLAUSE_CHUNK_SIZE = 1000
+    
+    @staticmethod
+    def _build_counts(row=None):
+        """Diccionario total/pending/approved/rejected (ceros si no hay fila)"""
+        return {column: int(getattr(row, column) or 0) if row is not None else 0 for column in COUNTER_COLUMNS}
+    
+    @staticmethod
+    def get_counts(scope='GLOBAL', scope_id=0):
+        """Contadores de un ámbito (una lectura por clave primaria)"""
+        row = db.session.get(JustificationCounter, (scope, scope_id))
+        return JustificationCounterService._build_counts(row)
+    
+    @staticmethod
+    def get_many(scope, scope_ids):
+        """
+        Contadores de varios IDs de un ámbito
+        
+        Returns:
+            dict {scope_id: contadores}
+        """
+        scope_ids = list(dict.fromkeys(scope_ids))
+        results = {scope_id: JustificationCounterService._build_counts() for scope_id in scope_ids}
+        
+        chunk_size = JustificationCounterService.IN_CLAUSE_CHUNK_SIZE
+        for start in range(0, len(scope_ids), chunk_size):
+            chunk = scope_ids[start:start + chunk_size]
+            rows = db.session.query(JustificationCounter).filter(
+                JustificationCounter.scope == scope,
+                JustificationCounter.scope_id.in_(chunk)
+            )
+            for row in rows:
+                results[row.scope_id] = JustificationCounterService._build_counts(row)
+        
+        return results
+    
+    @staticmethod
+    def _status_delta(delta, old_status, new_status):
+        """Suma a delta el efecto de un cambio de estado sobre los contadores"""
+        if old_status is None:
+            delta['total'] += 1
+        elif old_status in STATUS_COLUMNS:
+            delta[STATUS_COLUMNS[old_status]] -= 1
+        
+        if new_status is None:
+            delta['total'] -= 1
+        elif new_status in STATUS_COLUMNS:
+            delta[STATUS_COLUMNS[new_status]] += 1
+    
+    @staticmethod
+    def _course_professors(course_ids):
+        """Profesor de cada curso {course_id: professor_id}"""
+        course_ids = list(dict.fromkeys(course_ids))
+        professors = {}
+        chunk_size = JustificationCounterService.IN_CLAUSE_CHUNK_SIZE
+        for start in range(0, len(course_ids), chunk_size):
+            chunk = course_ids[start:start + chunk_size]
+            professors.update(
+                db.session.query(Course.id, Course.professor_id).filter(Course.id.in_(chunk)).all()
+            )
+        return professors
+    
+    @staticmethod
+    def apply_changes(changes):
+        """
+        Aplica cambios de estado de justificaciones a los contadores
+        
+        No hace commit: los contadores quedan en la transacción del llamador.
+        
+        Args:
+            changes: iterable de tuplas (student_id, course_id, old_status, new_status).
+                old_status es None para justificaciones nuevas y new_status es
+                None para las eliminadas.
+        """
+        changes = [change for change in changes if change[2] != change[3]]
+        if not changes:
+            return
+        
+        professors = JustificationCounterService._course_professors([change[1] for change in changes])
+        
+        deltas = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+        for student_id, course_id, old_status, new_status in changes:
+            keys = [('GLOBAL', 0), ('STUDENT', int(student_id)), ('COURSE', int(course_id))]
+            if professors.get(int(course_id)) is not None:
+                keys.append(('PROFESSOR', professors[int(course_id)]))
+            
+            for key in keys:
+                JustificationCounterService._status_delta(deltas[key], old_status, new_status)
+        
+        deltas = {key: delta for key, delta in deltas.items() if any(delta.values())}
+        JustificationCounterService._apply_counter_deltas(deltas)
+    
+    @staticmethod
+    def _apply_counter_deltas(deltas):
+        """
+        UPDATE atómico (SET col = col + :delta) para las claves existentes
+        e INSERT que suma si la clave ya existe para las nuevas
+        """
+        if not deltas:
+            return
+        
+        table = JustificationCounter.__table__
+        keys = list(deltas)
+        key_expression = tuple_(table.c.scope, table.c.scope_id)
+        existing = set()
+        chunk_size = JustificationCounterService.IN_CLAUSE_CHUNK_SIZE
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            existing.update(
+                tuple(row) for row in db.session.execute(
+                    select(table.c.scope, table.c.scope_id).where(key_expression.in_(chunk))
+                )
+            )
+        
+        now = datetime.utcnow()
+        
+        updates = [
+            JustificationCounterService._update_params(key, delta)
+            for key, delta in deltas.items() if key in existing
+        ]
+        if updates:
+            JustificationCounterService._execute_increments(updates, now)
+        
+        inserts = [
+            dict(deltas[key], scope=key[0], scope_id=key[1], updated_at=now)
+            for key in keys if key not in existing
+        ]
+        if inserts:
+            JustificationCounterService._insert_counters(inserts, now)
+    
+    @staticmethod
+    def _update_params(key, delta):
+        return dict(
+            {f'd_{column}': delta[column] for column in COUNTER_COLUMNS},
+            b_scope=key[0],
+            b_scope_id=key[1]
+        )
+    
+    @staticmethod
+    def _execute_increments(params, now):
+        table = JustificationCounter.__table__
+        values = {column: table.c[column] + bindparam(f'd_{column}') for column in COUNTER_COLUMNS}
+        values['updated_at'] = now
+        db.session.execute(
+            update(table).where(
+                table.c.scope == bindparam('b_scope'),
+                table.c.scope_id == bindparam('b_scope_id')
+            ).values(values),
+            params
+        )
+    
+    @staticmethod
+    def _insert_counters(rows, now):
+        """
+        Inserta contadores nuevos; si otra transacción ya insertó el mismo
+        ámbito, suma los deltas a esa fila
+        
+        - SQLite / PostgreSQL: INSERT ... ON CONFLICT DO UPDATE SET col = col + excluded.col
+        - Oracle y otros: INSERT en un SAVEPOINT y, ante IntegrityError, clave por
+          clave con reintento como UPDATE atómico
+        """
+        table = JustificationCounter.__table__
+        dialect = db.session.get_bind().dialect.name
+        
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            
+            statement = dialect_insert(table)
+            values = {column: table.c[column] + statement.excluded[column] for column in COUNTER_COLUMNS}
+            values['updated_at'] = now
+            statement = statement.on_conflict_do_update(index_elements=['scope', 'scope_id'], set_=values)
+            db.session.execute(statement, rows)
+            return
+        
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table), rows)
+            return
+        except IntegrityError:
+            pass
+        
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(table), [row])
+            except IntegrityError:
+                JustificationCounterService._execute_increments(
+                    [JustificationCounterService._update_params((row['scope'], row['scope_id']), row)], now
+                )
+    
+    @staticmethod
+    def _count_columns():
+        """Conteo por estado con agregación condicional (cero si no hay filas)"""
+        return (
+            func.count(Justification.id),
+            func.coalesce(func.sum(case((Justification.status == 'PENDIENTE', 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Justification.status == 'APROBADA', 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Justification.status == 'RECHAZADA', 1), else_=0)), 0)
+        )
+    
+    @staticmethod
+    def _rebuild_inserts(rebuilt_at):
+        """
+        INSERT ... SELECT que cargan los contadores de cada ámbito desde
+        justifications (rebuild y la migración de la tabla)
+        
+        Returns:
+            list de inserts (uno por ámbito)
+        """
+        table = JustificationCounter.__table__
+        rebuilt_at = bindparam('rebuilt_at', rebuilt_at)
+        columns = ['scope', 'scope_id', *COUNTER_COLUMNS, 'updated_at']
+        counts = JustificationCounterService._count_columns()
+        
+        sources = {
+            'GLOBAL': select(literal('GLOBAL'), literal(0), *counts, rebuilt_at),
+            'STUDENT': select(
+                literal('STUDENT'), Justification.student_id, *counts, rebuilt_at
+            ).group_by(Justification.student_id),
+            'COURSE': select(
+                literal('COURSE'), Justification.course_id, *counts, rebuilt_at
+            ).group_by(Justification.course_id),
+            'PROFESSOR': select(
+                literal('PROFESSOR'), Course.professor_id, *counts, rebuilt_at
+            ).join(
+                Course, Course.id == Justification.course_id
+            ).where(
+                Course.professor_id.isnot(None)
+            ).group_by(Course.professor_id)
+        }
+        
+        return [insert(table).from_select(columns, source) for source in sources.values()]
+    
+    @staticmethod
+    def rebuild():
+        """
+        Recalcula todos los contadores desde justifications
+        
+        Returns:
+            dict {ámbito: filas generadas}
+        """
+        table = JustificationCounter.__table__
+        
+        try:
+            db.session.execute(delete(table))
+            for statement in JustificationCounterService._rebuild_inserts(datetime.utcnow()):
+                db.session.execute(statement)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        
+        rows = dict(
+            db.session.query(JustificationCounter.scope, func.count()).group_by(JustificationCounter.scope).all()
+        )
+        return {scope: rows.get(scope, 0) for scope in SCOPES}
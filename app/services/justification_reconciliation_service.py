@@ -0,0 +1,143 @@
+"""
+Servicio para reflejar las justificaciones aprobadas en attendance_records
+Al aprobar una justificación, la inasistencia del mismo (estudiante, curso, fecha)
+pasa a JUSTIFICADO con un UPDATE por bloque; la conciliación nocturna repara
+los desvíos históricos (asistencias registradas después de la aprobación)
+"""
+from app import db
+from app.models.attendance_record import AttendanceRecord
+from app.models.justification import Justification
+from app.services.attendance_summary_service import AttendanceSummaryService
+from app.services.attendance_change_service import AttendanceChangeService
+from app.services.statistics_service import StatisticsService
+from sqlalchemy import select, update, func, and_, tuple_
+
+class JustificationReconciliationService:
+    
+    # Estados de asistencia que una justificación aprobada convierte en JUSTIFICADO
+    JUSTIFIABLE_STATUSES = ('AUSENTE',)
+    
+    # Inasistencias corregidas por commit en la conciliación nocturna
+    RECONCILE_BATCH_SIZE = 1000
+    
+    @staticmethod
+    def _key_expression():
+        return tuple_(
+            AttendanceRecord.student_id,
+            AttendanceRecord.course_id,
+            AttendanceRecord.attendance_date
+        )
+    
+    @staticmethod
+    def apply_approved(keys):
+        """
+        Marca como JUSTIFICADO las inasistencias de las justificaciones aprobadas
+        
+        No hace commit: el cambio queda en la transacción de la aprobación, junto
+        con el resumen de asistencia y la secuencia de cambios.
+        
+        Args:
+            keys: iterable de tuplas (student_id, course_id, absence_date)
+        
+        Returns:
+            list de claves cuyo registro pasó a JUSTIFICADO
+        """
+        keys = list(dict.fromkeys(keys))
+        table = AttendanceRecord.__table__
+        justifiable = JustificationReconciliationService.JUSTIFIABLE_STATUSES
+        
+        changes = []
+        chunk_size = StatisticsService.IN_CLAUSE_CHUNK_SIZE
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            key_filter = and_(
+                JustificationReconciliationService._key_expression().in_(chunk),
+                AttendanceRecord.status.in_(justifiable)
+            )
+            
+            # Estados anteriores para el resumen (bloqueados hasta el commit)
+            rows = db.session.execute(
+                select(
+                    AttendanceRecord.student_id,
+                    AttendanceRecord.course_id,
+                    AttendanceRecord.attendance_date,
+                    AttendanceRecord.status
+                ).where(key_filter).with_for_update()
+            ).all()
+            if not rows:
+                continue
+            
+            db.session.execute(update(table).where(key_filter).values(status='JUSTIFICADO'))
+            changes.extend(
+                (row.student_id, row.course_id, row.attendance_date, row.status, 'JUSTIFICADO')
+                for row in rows
+            )
+        
+        if changes:
+            AttendanceSummaryService.apply_changes(changes)
+            AttendanceChangeService.record([change[:3] for change in changes])
+        
+        return [change[:3] for change in changes]
+    
+    @staticmethod
+    def _mismatches_query():
+        """Inasistencias sin justificar que tienen una justificación aprobada"""
+        return select(
+            AttendanceRecord.student_id,
+            AttendanceRecord.course_id,
+            AttendanceRecord.attendance_date
+        ).join(
+            Justification,
+            and_(
+                Justification.student_id == AttendanceRecord.student_id,
+                Justification.course_id == AttendanceRecord.course_id,
+                Justification.absence_date == AttendanceRecord.attendance_date
+            )
+        ).where(
+            Justification.status == 'APROBADA',
+            AttendanceRecord.status.in_(JustificationReconciliationService.JUSTIFIABLE_STATUSES)
+        ).distinct()
+    
+    @staticmethod
+    def count_mismatches():
+        """Cantidad de inasistencias pendientes de conciliar"""
+        subquery = JustificationReconciliationService._mismatches_query().subquery()
+        return db.session.execute(select(func.count()).select_from(subquery)).scalar() or 0
+    
+    @staticmethod
+    def reconcile(batch_size=None):
+        """
+        Conciliación masiva: corrige por bloques (un commit por bloque) todas las
+        inasistencias que tienen una justificación aprobada
+        
+        Returns:
+            dict con los registros corregidos y la cantidad de bloques
+        """
+        batch_size = batch_size or JustificationReconciliationService.RECONCILE_BATCH_SIZE
+        result = {'reconciled': 0, 'batches': 0}
+        
+        while True:
+            keys = [
+                tuple(row) for row in db.session.execute(
+                    JustificationReconciliationService._mismatches_query().limit(batch_size)
+                )
+            ]
+            if not keys:
+                break
+            
+            try:
+                reconciled = JustificationReconciliationService.apply_approved(keys)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise e
+            
+            result['reconciled'] += len(reconciled)
+            result['batches'] += 1
+            print(f"✅ Bloque {result['batches']}: {len(reconciled)} inasistencias justificadas")
+            
+            # Si otra transacción cambió el bloque a la vez no se vuelve a intentar
+            if not reconciled:
+                break
+        
+        return result
@@ -1,26 +1,35 @@
 from app import db
 from app.models.justification import Justification, JustificationAttachment
 from app.models.student import Student
+from app.models.course import Course
+from app.services.statistics_service import StatisticsService
+from app.services.pagination_service import PaginationService
+from app.services.justification_counter_service import JustificationCounterService
+from app.services.justification_reconciliation_service import JustificationReconciliationService
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_, or_
 from collections import defaultdict
+from flask import request, jsonify, Response, stream_with_context
+import json
 import os
 
 class JustificationService:
     
+    @staticmethod
+    def get_status_counts():
+        """
+        Cantidad de justificaciones por estado desde justification_counters
+        (una lectura por clave primaria)
+        
+        Returns:
+            dict con total, pending, approved y rejected
+        """
+        return JustificationCounterService.get_counts('GLOBAL', 0)
+    
     @staticmethod
     def get_dashboard_stats():
         """Obtiene estadísticas para el dashboard administrativo"""
-        total_requests = db.session.query(Justification).count()
-        pending_requests = db.session.query(Justification).filter(
-            Justification.status == 'PENDIENTE'
-        ).count()
-        approved_requests = db.session.query(Justification).filter(
-            Justification.status == 'APROBADA'
-        ).count()
-        rejected_requests = db.session.query(Justification).filter(
-            Justification.status == 'RECHAZADA'
-        ).count()
+        counts = JustificationService.get_status_counts()
         
         # Estadísticas de estudiantes
         total_students = db.session.query(Student).count()
@@ -28,28 +37,16 @@ class JustificationService:
             Student.status == 'A'
         ).count()
         
-        # Estudiantes en riesgo (25-29% inasistencias)
-        at_risk_students = db.session.query(Student).filter(
-            and_(
-                Student.total_classes > 0,
-                (Student.total_absences * 100.0 / Student.total_classes) >= 25,
-                (Student.total_absences * 100.0 / Student.total_classes) < 30
-            )
-        ).count()
-        
-        # Estudiantes en estado crítico (30%+ inasistencias)
-        critical_students = db.session.query(Student).filter(
-            and_(
-                Student.total_classes > 0,
-                (Student.total_absences * 100.0 / Student.total_classes) >= 30
-            )
-        ).count()
+        # Estudiantes activos por nivel de riesgo (clasificados en SQL con RiskPolicy)
+        risk_distribution = StatisticsService.get_risk_distribution()
+        at_risk_students = risk_distribution['EN_RIESGO']
+        critical_students = risk_distribution['CRITICO']
         
         return {
-            'total_requests': total_requests,
-            'pending_requests': pending_requests,
-            'approved_requests': approved_requests,
-            'rejected_requests': rejected_requests,
+            'total_requests': counts['total'],
+            'pending_requests': counts['pending'],
+            'approved_requests': counts['approved'],
+            'rejected_requests': counts['rejected'],
             'total_students': total_students,
             'active_students': active_students,
             'at_risk_students': at_risk_students,
@@ -60,7 +57,7 @@ class JustificationService:
     def get_recent_requests(limit=10):
         """Obtiene las solicitudes más recientes"""
         return db.session.query(Justification)\
-            .join(Student)\
+            .join(Student, Student.id == Justification.student_id)\
             .order_by(Justification.submission_date.desc())\
             .limit(limit)\
             .all()
@@ -73,9 +70,165 @@ class JustificationService:
             .all()
     
     @staticmethod
-    def get_requests_by_status(status=None, search=None, page=1, per_page=10):
-        """Obtiene solicitudes filtradas por estado y búsqueda"""
-        query = db.session.query(Justification).join(Student)
+    def _all_requests_query(status=None):
+        """
+        Justificaciones con los datos del estudiante y del curso en una sola
+        consulta (uniones externas: se conservan filas sin estudiante o curso)
+        """
+        query = db.session.query(
+            Justification,
+            Student.first_name.label('student_first_name'),
+            Student.last_name.label('student_last_name'),
+            Student.student_code.label('student_code'),
+            Student.email.label('student_email'),
+            Student.phone.label('student_phone'),
+            Student.career.label('student_career'),
+            Student.semester.label('student_semester'),
+            Course.course_name.label('course_name'),
+            Course.course_code.label('course_code')
+        ).outerjoin(
+            Student, Student.id == Justification.student_id
+        ).outerjoin(
+            Course, Course.id == Justification.course_id
+        )
+        
+        if status and status != 'Todas':
+            query = query.filter(Justification.status == status)
+        
+        return query
+    
+    @staticmethod
+    def serialize_request_row(row):
+        """Diccionario de una fila de _all_requests_query"""
+        data = row.Justification.to_dict()
+        if row.student_code is not None:
+            data['student_name'] = f'{row.student_first_name} {row.student_last_name}'
+            data['student_code'] = row.student_code
+            data['student_email'] = row.student_email
+            data['student_phone'] = row.student_phone
+            data['student_career'] = row.student_career
+            data['student_semester'] = row.student_semester
+        if row.course_name is not None:
+            data['course_name'] = row.course_name
+            data['course_code'] = row.course_code
+        return data
+    
+    @staticmethod
+    def get_all_requests_page(status=None, cursor=None, per_page=100):
+        """Página (por cursor) de todas las justificaciones con estudiante y curso"""
+        return PaginationService.keyset_paginate(
+            JustificationService._all_requests_query(status),
+            [(Justification.submission_date, True), (Justification.id, True)],
+            cursor,
+            per_page
+        )
+    
+    @staticmethod
+    def stream_all_requests(status=None, ndjson=False, batch_size=500):
+        """
+        Genera la respuesta de todas las justificaciones por partes
+        
+        Recorre una sola consulta con un cursor del servidor (yield_per), de
+        modo que la memoria no depende del tamaño de la tabla y el primer
+        fragmento sale de inmediato.
+        
+        Args:
+            ndjson: un objeto JSON por línea; si es False se genera el sobre
+                    {"success": true, "data": [...]} de la respuesta original
+        
+        Yields:
+            fragmentos de texto de la respuesta
+        """
+        statement = JustificationService._all_requests_query(status).order_by(
+            Justification.submission_date.desc(),
+            Justification.id.desc()
+        ).statement.execution_options(yield_per=batch_size)
+        
+        separator = '\n' if ndjson else ','
+        
+        if not ndjson:
+            yield '{"success": true, "data": ['
+        
+        # Un fragmento por lote de filas (no una escritura por fila)
+        chunk = []
+        written = 0
+        for row in db.session.execute(statement):
+            chunk.append(json.dumps(JustificationService.serialize_request_row(row), ensure_ascii=False))
+            if len(chunk) >= batch_size:
+                yield JustificationService._stream_chunk(chunk, separator, ndjson, written)
+                written += len(chunk)
+                chunk = []
+        
+        if chunk:
+            yield JustificationService._stream_chunk(chunk, separator, ndjson, written)
+        
+        if not ndjson:
+            yield ']}'
+    
+    @staticmethod
+    def _stream_chunk(items, separator, ndjson, written):
+        text = separator.join(items)
+        if ndjson:
+            return text + '\n'
+        return text if written == 0 else ',' + text
+    
+    @staticmethod
+    def all_requests_response():
+        """
+        Respuesta de /all (compartida con las rutas del profesor)
+        Query params:
+            status: filtra por estado
+            cursor, per_page: paginación por cursor (cursor vacío = primera página)
+            format=ndjson: una justificación por línea en streaming
+        Sin cursor ni formato se transmite el mismo JSON {"success", "data"} de siempre
+        """
+        status = request.args.get('status')
+        file_format = request.args.get('format', 'json').lower()
+        
+        if file_format not in ('json', 'ndjson'):
+            return jsonify({
+                'success': False,
+                'message': f'Formato no soportado: {file_format}'
+            }), 400
+        
+        if 'cursor' in request.args and file_format == 'json':
+            per_page = min(max(int(request.args.get('per_page', 100)), 1), 1000)
+            page = JustificationService.get_all_requests_page(
+                status=status,
+                cursor=request.args.get('cursor'),
+                per_page=per_page
+            )
+            return jsonify({
+                'success': True,
+                'data': [JustificationService.serialize_request_row(row) for row in page.items],
+                'pagination': PaginationService.to_dict(page)
+            })
+        
+        ndjson = file_format == 'ndjson'
+        return Response(
+            stream_with_context(JustificationService.stream_all_requests(status=status, ndjson=ndjson)),
+            mimetype='application/x-ndjson' if ndjson else 'application/json'
+        )
+    
+    @staticmethod
+    def get_requests_by_status(status=None, search=None, page=1, per_page=10, cursor=None, with_student=False):
+        """
+        Obtiene solicitudes filtradas por estado y búsqueda
+        Con cursor (aunque sea vacío) se pagina por keyset y no se calcula el total
+        
+        Con with_student los elementos son filas (Justification, student_email,
+        student_phone, student_career, student_semester) tomadas de la misma unión.
+        """
+        # Sin foreign key entre esquemas: la unión se declara explícitamente
+        query = db.session.query(Justification).join(Student, Student.id == Justification.student_id)
+        
+        if with_student:
+            query = query.add_columns(
+                Student.email.label('student_email'),
+                Student.phone.label('student_phone'),
+                Student.career.label('student_career'),
+                Student.semester.label('student_semester')
+            )
         
         if status and status != 'Todas':
             query = query.filter(Justification.status == status)
@@ -89,7 +242,15 @@ class JustificationService:
                 )
             )
         
-        query = query.order_by(Justification.submission_date.desc())
+        if cursor is not None:
+            return PaginationService.keyset_paginate(
+                query,
+                [(Justification.submission_date, True), (Justification.id, True)],
+                cursor,
+                per_page
+            )
+        
+        query = query.order_by(Justification.submission_date.desc(), Justification.id.desc())
         
         return query.paginate(
             page=page, 
@@ -108,13 +269,22 @@ class JustificationService:
     @staticmethod
     def approve_request(request_id, admin_id, admin_response=None):
         """Aprueba una solicitud"""
-        justification = db.session.query(Justification).get(request_id)
+        # Bloqueada hasta el commit: el estado anterior de los contadores no puede cambiar
+        justification = db.session.query(Justification).with_for_update().populate_existing().get(request_id)
         if justification:
+            old_status = justification.status
             justification.status = 'APROBADA'
             justification.review_date = datetime.utcnow()
             justification.reviewed_by = admin_id
             if admin_response:
                 justification.admin_response = admin_response
+            JustificationCounterService.apply_changes([
+                (justification.student_id, justification.course_id, old_status, justification.status)
+            ])
+            # La inasistencia del mismo día pasa a JUSTIFICADO
+            JustificationReconciliationService.apply_approved([
+                (justification.student_id, justification.course_id, justification.absence_date)
+            ])
             db.session.commit()
             
             # Enviar email al estudiante
@@ -137,13 +307,18 @@ class JustificationService:
     @staticmethod
     def reject_request(request_id, admin_id, admin_response=None):
         """Rechaza una solicitud"""
-        justification = db.session.query(Justification).get(request_id)
+        # Bloqueada hasta el commit: el estado anterior de los contadores no puede cambiar
+        justification = db.session.query(Justification).with_for_update().populate_existing().get(request_id)
         if justification:
+            old_status = justification.status
             justification.status = 'RECHAZADA'
             justification.review_date = datetime.utcnow()
             justification.reviewed_by = admin_id
             if admin_response:
                 justification.admin_response = admin_response
+            JustificationCounterService.apply_changes([
+                (justification.student_id, justification.course_id, old_status, justification.status)
+            ])
             db.session.commit()
             
             # Enviar email al estudiante
@@ -163,6 +338,196 @@ class JustificationService:
             return True
         return False
     
+    # Decisiones aceptadas en la revisión en lote y el estado que aplican
+    BATCH_DECISIONS = {
+        'APPROVE': 'APROBADA',
+        'APROBADA': 'APROBADA',
+        'REJECT': 'RECHAZADA',
+        'RECHAZADA': 'RECHAZADA'
+    }
+    
+    @staticmethod
+    def _parse_batch_decisions(decisions, default_response=None, max_items=500):
+        """
+        Valida las decisiones de una revisión en lote
+        
+        Returns:
+            dict {justification_id: (nuevo estado, admin_response)} en el orden recibido
+        
+        Raises:
+            ValueError: si alguna decisión es inválida (no se aplica ninguna)
+        """
+        if not isinstance(decisions, list) or not decisions:
+            raise ValueError('decisions debe ser una lista no vacía')
+        if len(decisions) > max_items:
+            raise ValueError(f'Máximo {max_items} justificaciones por lote')
+        
+        parsed = {}
+        for index, item in enumerate(decisions):
+            if not isinstance(item, dict):
+                raise ValueError(f'Decisión {index}: formato inválido')
+            
+            try:
+                justification_id = int(item.get('id'))
+            except (TypeError, ValueError):
+                raise ValueError(f'Decisión {index}: id inválido')
+            
+            status = JustificationService.BATCH_DECISIONS.get(str(item.get('decision', '')).upper())
+            if status is None:
+                raise ValueError(f'Decisión {index}: decision debe ser APPROVE o REJECT')
+            
+            admin_response = item.get('admin_response') or default_response or ''
+            if status == 'RECHAZADA' and not admin_response:
+                raise ValueError(f'Justificación {justification_id}: debe proporcionar un motivo de rechazo')
+            
+            if justification_id in parsed:
+                raise ValueError(f'Justificación {justification_id} repetida en el lote')
+            parsed[justification_id] = (status, admin_response)
+        
+        return parsed
+    
+    @staticmethod
+    def batch_review(professor_id, decisions, default_response=None, ip_address=None, max_items=500):
+        """
+        Aprueba o rechaza varias justificaciones en una sola transacción
+        
+        Las justificaciones se leen con un IN por bloque, se actualizan con un
+        UPDATE ejecutado en lote, los audit_logs se insertan en bloque, las
+        inasistencias de las aprobadas pasan a JUSTIFICADO y los emails quedan
+        encolados (PENDING) para el envío en segundo plano.
+        
+        La lectura bloquea las justificaciones (FOR UPDATE) hasta el commit: una
+        revisión simultánea de la misma justificación espera y la encuentra ya
+        cambiada, de modo que queda en unchanged sin volver a contarse,
+        auditarse ni notificarse.
+        
+        Returns:
+            dict con processed, unchanged, not_found, attendance_justified y emails_queued
+        """
+        from app.models.professor import Professor
+        from app.models.audit_log import AuditLog
+        from app.services.email_service import EmailService
+        from sqlalchemy import update, insert, bindparam
+        
+        parsed = JustificationService._parse_batch_decisions(decisions, default_response, max_items)
+        ids = list(parsed)
+        
+        rows = {}
+        chunk_size = StatisticsService.IN_CLAUSE_CHUNK_SIZE
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            query = db.session.query(
+                Justification.id,
+                Justification.student_id,
+                Justification.course_id,
+                Justification.status,
+                Justification.absence_date,
+                Justification.reason_type,
+                Student.first_name,
+                Student.last_name,
+                Student.email,
+                Course.course_name
+            ).outerjoin(
+                Student, Justification.student_id == Student.id
+            ).outerjoin(
+                Course, Justification.course_id == Course.id
+            ).filter(
+                Justification.id.in_(chunk)
+            ).with_for_update(of=Justification)
+            rows.update((row.id, row) for row in query)
+        
+        professor = db.session.get(Professor, professor_id) if professor_id is not None else None
+        now = datetime.utcnow()
+        
+        updates = []
+        audits = []
+        counter_changes = []
+        emails = []
+        approved_keys = []
+        result = {'processed': [], 'unchanged': [], 'not_found': [], 'attendance_justified': 0, 'emails_queued': 0}
+        
+        for justification_id, (status, admin_response) in parsed.items():
+            row = rows.get(justification_id)
+            if row is None:
+                result['not_found'].append(justification_id)
+                continue
+            if row.status == status:
+                result['unchanged'].append(justification_id)
+                continue
+            
+            approved = status == 'APROBADA'
+            updates.append({
+                'b_id': justification_id,
+                'b_status': status,
+                'b_response': admin_response
+            })
+            counter_changes.append((row.student_id, row.course_id, row.status, status))
+            if approved:
+                approved_keys.append((row.student_id, row.course_id, row.absence_date))
+            result['processed'].append({
+                'id': justification_id,
+                'old_status': row.status,
+                'status': status
+            })
+            
+            if row.first_name is None:
+                continue
+            
+            student_name = f"{row.first_name} {row.last_name}"
+            if professor:
+                audits.append({
+                    'user_id': professor.id,
+                    'user_type': 'PROFESSOR',
+                    'action': 'APPROVE_JUSTIFICATION' if approved else 'REJECT_JUSTIFICATION',
+                    'table_name': 'justifications',
+                    'record_id': justification_id,
+                    'new_values': f"{'Aprobó' if approved else 'Rechazó'} justificación de {student_name} - {row.reason_type} (lote)",
+                    'ip_address': ip_address,
+                    'created_at': now
+                })
+            
+            if row.email:
+                subject, body_html = EmailService.build_justification_processed(
+                    student_name, row.course_name or '', row.absence_date, row.reason_type, admin_response, approved
+                )
+                emails.append({
+                    'recipient_email': row.email,
+                    'recipient_name': student_name,
+                    'subject': subject,
+                    'body': body_html,
+                    'notification_type': 'JUSTIFICATION_PROCESSED',
+                    'related_table': 'justifications',
+                    'related_id': justification_id
+                })
+        
+        if not updates:
+            # Nada que escribir: liberar los bloqueos de la lectura
+            db.session.rollback()
+            return result
+        
+        table = Justification.__table__
+        try:
+            db.session.execute(
+                update(table).where(table.c.id == bindparam('b_id')).values(
+                    status=bindparam('b_status'),
+                    admin_response=bindparam('b_response'),
+                    reviewed_by=professor_id,
+                    review_date=now
+                ),
+                updates
+            )
+            if audits:
+                db.session.execute(insert(AuditLog.__table__), audits)
+            JustificationCounterService.apply_changes(counter_changes)
+            result['attendance_justified'] = len(JustificationReconciliationService.apply_approved(approved_keys))
+            result['emails_queued'] = EmailService.queue_emails(emails)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        
+        return result
+    
     @staticmethod
     def create_request(student_id, absence_date, course_subject, reason, detailed_description, files=None):
         """Crea una nueva solicitud de justificación"""
@@ -279,12 +644,6 @@ class JustificationService:
     
     @staticmethod
     def get_students_requiring_attention():
-        """Obtiene estudiantes que requieren atención por inasistencias"""
-        return db.session.query(Student).filter(
-            and_(
-                Student.total_classes > 0,
-                (Student.total_absences * 100.0 / Student.total_classes) >= 25
-            )
-        ).order_by(
-            (Student.total_absences * 100.0 / Student.total_classes).desc()
-        ).all()
\ No newline at end of file
+        """Obtiene estudiantes que requieren atención por inasistencias (EN_RIESGO o CRITICO)"""
+        rows = StatisticsService.risk_cohort_query(min_risk_level='EN_RIESGO').all()
+        return [row.Student for row in rows]
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Paginación por cursor (keyset) para listados grandes
+En lugar de OFFSET + COUNT(*) se busca a partir de la última fila entregada
+(valor de ordenamiento, id), así cada página cuesta lo mismo sin importar su profundidad
+"""
+from sqlalchemy import and_, or_
+from sqlalchemy.engine import Row
+from datetime import date, datetime
+import base64
+import json
+
+class CursorPage:
+    """Página obtenida con cursor: items, per_page, has_next y next_cursor (sin total)"""
+    
+    def __init__(self, items, per_page, next_cursor=None, cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.has_prev = bool(cursor)
+    
+    def to_dict(self):
+        return {
+            'mode': 'cursor',
+            'per_page': self.per_page,
+            'has_next': self.has_next,
+            'next_cursor': self.next_cursor
+        }
+
+class PaginationService:
+    
+    @staticmethod
+    def to_dict(pagination):
+        """Bloque 'pagination' de la respuesta para paginate() o para CursorPage"""
+        if isinstance(pagination, CursorPage):
+            return pagination.to_dict()
+        
+        return {
+            'page': pagination.page,
+            'pages': pagination.pages,
+            'per_page': pagination.per_page,
+            'total': pagination.total,
+            'has_next': pagination.has_next,
+            'has_prev': pagination.has_prev
+        }
+    
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, datetime):
+            return ['dt', value.isoformat()]
+        if isinstance(value, date):
+            return ['d', value.isoformat()]
+        return ['v', value]
+    
+    @staticmethod
+    def _decode_value(encoded):
+        kind, value = encoded
+        if kind == 'dt':
+            return datetime.fromisoformat(value)
+        if kind == 'd':
+            return date.fromisoformat(value)
+        return value
+    
+    @staticmethod
+    def encode_cursor(values):
+        """Token opaco (base64 URL-safe) con los valores de ordenamiento de la última fila"""
+        payload = json.dumps([PaginationService._encode_value(v) for v in values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(token, size):
+        """
+        Valores de ordenamiento de un cursor
+        
+        Raises:
+            ValueError: si el cursor no es válido para este listado
+        """
+        try:
+            payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            values = [PaginationService._decode_value(v) for v in json.loads(payload)]
+        except (ValueError, TypeError):
+            raise ValueError('Cursor inválido')
+        
+        if len(values) != size:
+            raise ValueError('Cursor inválido')
+        
+        return values
+    
+    @staticmethod
+    def _seek_condition(order_by, values):
+        """
+        Condición "después de la fila (v1, ..., vn)" expandida como
+        (c1 < v1) OR (c1 = v1 AND c2 < v2) OR ... porque Oracle no
+        admite comparaciones de tuplas con < o >
+        """
+        conditions = []
+        for i, (column, descending) in enumerate(order_by):
+            equal_prefix = [order_by[j][0] == values[j] for j in range(i)]
+            step = column < values[i] if descending else column > values[i]
+            conditions.append(and_(*equal_prefix, step))
+        return or_(*conditions)
+    
+    @staticmethod
+    def keyset_paginate(query, order_by, cursor=None, per_page=50):
+        """
+        Pagina una consulta por cursor
+        
+        Args:
+            query: Query sin ORDER BY
+            order_by: lista de (columna, descendente) que termina en una columna
+                única (id) para que el orden sea total; las columnas no deben ser nulas
+            cursor: token de la página anterior (None o vacío = primera página)
+            per_page: filas por página
+        
+        Returns:
+            CursorPage
+        """
+        if cursor:
+            values = PaginationService.decode_cursor(cursor, len(order_by))
+            query = query.filter(PaginationService._seek_condition(order_by, values))
+        
+        query = query.order_by(*(
+            column.desc() if descending else column.asc()
+            for column, descending in order_by
+        ))
+        
+        # Una fila extra indica si existe una página siguiente (sin COUNT)
+        rows = query.limit(per_page + 1).all()
+        items = rows[:per_page]
+        
+        next_cursor = None
+        if len(rows) > per_page:
+            last = items[-1]
+            # En consultas con columnas adicionales el modelo es la primera entidad de la fila
+            if isinstance(last, Row):
+                last = last[0]
+            next_cursor = PaginationService.encode_cursor([
+                getattr(last, column.key) for column, _ in order_by
+            ])
+        
+        return CursorPage(items, per_page, next_cursor, cursor)
@@ -1,13 +1,17 @@
 from app.models.professor import Professor
 from app import db
+from app.services.pagination_service import PaginationService
 from werkzeug.security import generate_password_hash
 
 class ProfessorService:
     """Servicio para gestión de profesores"""
     
     @staticmethod
-    def get_all_professors(status_filter=None, search=None, page=1, per_page=50):
-        """Obtener todos los profesores con filtros y paginación"""
+    def get_all_professors(status_filter=None, search=None, page=1, per_page=50, cursor=None):
+        """
+        Obtener todos los profesores con filtros y paginación
+        Con cursor (aunque sea vacío) se pagina por keyset y no se calcula el total
+        """
         query = Professor.query
         
         # Filtro por estado
@@ -29,8 +33,16 @@ class ProfessorService:
                 )
             )
         
-        # Ordenar por apellido
-        query = query.order_by(Professor.last_name, Professor.first_name)
+        # Ordenar por apellido (id desempata)
+        if cursor is not None:
+            return PaginationService.keyset_paginate(
+                query,
+                [(Professor.last_name, False), (Professor.first_name, False), (Professor.id, False)],
+                cursor,
+                per_page
+            )
+        
+        query = query.order_by(Professor.last_name, Professor.first_name, Professor.id)
         
         return query.paginate(page=page, per_page=per_page, error_out=False)
     
@@ -48,12 +48,13 @@ class ReportService:
         
         # Obtener estudiantes
         students = db.session.query(Student).filter(Student.status == 'A').all()
+        all_stats = StatisticsService.calculate_students_attendance([s.id for s in students])
         
         # Crear tabla
         data = [['Código', 'Nombre', 'Carrera', 'Asistencia', 'Estado']]
         
         for student in students:
-            stats = StatisticsService.calculate_student_attendance(student.id)
+            stats = all_stats[student.id]
             attendance_pct = f"{stats['attendance_percentage']}%"
             risk = stats['risk_level']
             
@@ -205,9 +206,10 @@ class ReportService:
         
         # Datos
         students = db.session.query(Student).filter(Student.status == 'A').all()
+        all_stats = StatisticsService.calculate_students_attendance([s.id for s in students])
         
         for row, student in enumerate(students, 2):
-            stats = StatisticsService.calculate_student_attendance(student.id)
+            stats = all_stats[student.id]
             
             ws.cell(row=row, column=1, value=student.student_code).border = border
             ws.cell(row=row, column=2, value=student.full_name).border = border
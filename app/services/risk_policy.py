@@ -0,0 +1,159 @@
+"""
+Política de niveles de riesgo por porcentaje de inasistencias
+Una sola definición de umbrales (con excepciones por carrera o curso)
+que se evalúa en Python, con NumPy o compilada a un CASE de SQL
+"""
+from flask import current_app, has_app_context
+from sqlalchemy import case, literal
+import json
+
+# Niveles de mayor a menor gravedad; por debajo del último umbral es NORMAL
+RISK_LEVELS = ('CRITICO', 'EN_RIESGO', 'ATENCION')
+
+DEFAULT_THRESHOLDS = {
+    'CRITICO': 30,     # ROJO
+    'EN_RIESGO': 25,   # NARANJA
+    'ATENCION': 20     # AMARILLO
+}
+
+class RiskPolicy:
+    """
+    Umbrales de riesgo por defecto con excepciones opcionales
+    
+    Precedencia: curso > carrera > valores por defecto. Una excepción
+    puede definir solo algunos niveles; el resto se hereda.
+    """
+    
+    def __init__(self, thresholds=None, by_career=None, by_course=None):
+        self.thresholds = RiskPolicy._merge(DEFAULT_THRESHOLDS, thresholds)
+        self.by_career = {
+            career: RiskPolicy._merge(self.thresholds, overrides)
+            for career, overrides in (by_career or {}).items()
+        }
+        self.by_course = {
+            int(course_id): RiskPolicy._merge(self.thresholds, overrides)
+            for course_id, overrides in (by_course or {}).items()
+        }
+    
+    @staticmethod
+    def _merge(base, overrides):
+        """Combina umbrales validando niveles y orden (CRITICO ≥ EN_RIESGO ≥ ATENCION)"""
+        merged = dict(base)
+        for level, value in (overrides or {}).items():
+            if level not in RISK_LEVELS:
+                raise ValueError(f'Nivel de riesgo inválido: {level}')
+            merged[level] = float(value)
+        
+        values = [merged[level] for level in RISK_LEVELS]
+        if values != sorted(values, reverse=True):
+            raise ValueError(f'Umbrales de riesgo fuera de orden: {merged}')
+        
+        return merged
+    
+    @staticmethod
+    def from_config(config):
+        """Construye la política desde RISK_THRESHOLDS, RISK_THRESHOLDS_BY_CAREER y RISK_THRESHOLDS_BY_COURSE"""
+        def load(name):
+            value = config.get(name)
+            if isinstance(value, str):
+                return json.loads(value) if value.strip() else None
+            return value
+        
+        return RiskPolicy(
+            thresholds=load('RISK_THRESHOLDS'),
+            by_career=load('RISK_THRESHOLDS_BY_CAREER'),
+            by_course=load('RISK_THRESHOLDS_BY_COURSE')
+        )
+    
+    @staticmethod
+    def current():
+        """
+        Política de la aplicación en curso (se construye una vez por app)
+        Sin contexto de aplicación se usan los umbrales por defecto.
+        """
+        if not has_app_context():
+            return RiskPolicy()
+        
+        policy = current_app.extensions.get('risk_policy')
+        if policy is None:
+            policy = RiskPolicy.from_config(current_app.config)
+            current_app.extensions['risk_policy'] = policy
+        
+        return policy
+    
+    def thresholds_for(self, career=None, course_id=None):
+        """Umbrales efectivos para una carrera y/o curso"""
+        if course_id is not None and course_id in self.by_course:
+            return self.by_course[course_id]
+        if career is not None and career in self.by_career:
+            return self.by_career[career]
+        return self.thresholds
+    
+    def classify(self, absence_percentage, career=None, course_id=None):
+        """Nivel de riesgo de un porcentaje de inasistencias"""
+        thresholds = self.thresholds_for(career, course_id)
+        for level in RISK_LEVELS:
+            if absence_percentage >= thresholds[level]:
+                return level
+        return 'NORMAL'
+    
+    def classify_array(self, absence_percentage, career=None, course_id=None):
+        """Versión vectorizada de classify para un arreglo de NumPy"""
+        import numpy as np
+        
+        thresholds = self.thresholds_for(career, course_id)
+        return np.select(
+            [absence_percentage >= thresholds[level] for level in RISK_LEVELS],
+            list(RISK_LEVELS),
+            default='NORMAL'
+        )
+    
+    def threshold_expression(self, level, career=None, course_id=None):
+        """
+        Umbral de un nivel como expresión SQL
+        
+        Args:
+            level: nivel de riesgo
+            career: columna (o valor) de carrera, opcional
+            course_id: columna (o valor) de curso, opcional
+        """
+        whens = []
+        if course_id is not None:
+            # Con excepciones por carrera el curso debe prevalecer aunque repita el valor por defecto
+            whens.extend(
+                (course_id == overridden_course, thresholds[level])
+                for overridden_course, thresholds in self.by_course.items()
+                if career is not None and self.by_career or thresholds[level] != self.thresholds[level]
+            )
+        if career is not None:
+            whens.extend(
+                (career == overridden_career, thresholds[level])
+                for overridden_career, thresholds in self.by_career.items()
+                if thresholds[level] != self.thresholds[level]
+            )
+        
+        if not whens:
+            return literal(self.thresholds[level])
+        
+        return case(*whens, else_=self.thresholds[level])
+    
+    def sql_case(self, absence_percentage, career=None, course_id=None):
+        """
+        Compila la política a un único CASE de SQL
+        
+        Args:
+            absence_percentage: expresión SQL con el porcentaje de inasistencias
+            career: columna de carrera (opcional, aplica excepciones por carrera)
+            course_id: columna de curso (opcional, aplica excepciones por curso)
+        """
+        return case(
+            *(
+                (absence_percentage >= self.threshold_expression(level, career, course_id), level)
+                for level in RISK_LEVELS
+            ),
+            else_='NORMAL'
+        )
+    
+    def levels_at_or_above(self, level):
+        """Niveles tan graves o más que el indicado (ej. EN_RIESGO → CRITICO, EN_RIESGO)"""
+        return RISK_LEVELS[:RISK_LEVELS.index(level) + 1]
@@ -0,0 +1,75 @@
+"""
+Servicio para el calendario académico
+Los semestres se identifican con etiquetas como 2025-I, 2025-II o 2025-0 (verano)
+"""
+from flask import current_app, has_app_context
+from datetime import date, datetime
+import calendar
+
+class SemesterService:
+    
+    # (periodo, mes inicial, mes final)
+    TERMS = (
+        ('0', 1, 2),     # Verano
+        ('I', 3, 7),
+        ('II', 8, 12)
+    )
+    
+    @staticmethod
+    def label_for(day):
+        """Etiqueta del semestre al que pertenece una fecha"""
+        for term, first_month, last_month in SemesterService.TERMS:
+            if first_month <= day.month <= last_month:
+                return f'{day.year}-{term}'
+    
+    @staticmethod
+    def range_for(label):
+        """
+        Rango de fechas de un semestre
+        
+        Args:
+            label: etiqueta del semestre (ej. 2025-II)
+        
+        Returns:
+            tupla (fecha inicial, fecha final)
+        
+        Raises:
+            ValueError: si la etiqueta no es válida
+        """
+        try:
+            year, term = label.strip().upper().split('-')
+            year = int(year)
+        except (AttributeError, ValueError):
+            raise ValueError(f'Semestre inválido: {label}')
+        
+        for name, first_month, last_month in SemesterService.TERMS:
+            if name == term:
+                last_day = calendar.monthrange(year, last_month)[1]
+                return date(year, first_month, 1), date(year, last_month, last_day)
+        
+        raise ValueError(f'Semestre inválido: {label}')
+    
+    @staticmethod
+    def current(today=None):
+        """
+        Semestre en curso
+        
+        SEMESTER_START y SEMESTER_END (YYYY-MM-DD) en la configuración
+        reemplazan el calendario por defecto cuando están definidos.
+        
+        Returns:
+            tupla (etiqueta, fecha inicial, fecha final)
+        """
+        today = today or date.today()
+        
+        if has_app_context():
+            start = current_app.config.get('SEMESTER_START')
+            end = current_app.config.get('SEMESTER_END')
+            if start and end:
+                start = datetime.strptime(start, '%Y-%m-%d').date()
+                end = datetime.strptime(end, '%Y-%m-%d').date()
+                return SemesterService.label_for(start), start, end
+        
+        label = SemesterService.label_for(today)
+        start, end = SemesterService.range_for(label)
+        return label, start, end
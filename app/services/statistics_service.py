@@ -5,32 +5,65 @@ Calcula porcentajes REALES de asistencia e identifica estudiantes en riesgo
 from app import db
 from app.models.student import Student
 from app.models.attendance_record import AttendanceRecord
-from app.models.justification import Justification
-from sqlalchemy import func, and_
+from app.models.student_attendance_summary import StudentAttendanceSummary
+from app.services.cache_service import TTLCache
+from app.services.risk_policy import RiskPolicy
+from app.services.justification_counter_service import JustificationCounterService
+from sqlalchemy import func, and_, case
+from flask import current_app
+from datetime import datetime
+
+# Snapshot del dashboard compartido por todas las peticiones del worker
+_dashboard_cache = TTLCache(ttl_seconds=60, max_entries=8)
 
 class StatisticsService:
     
+    # Oracle no admite más de 1000 expresiones dentro de un IN (...)
+    IN_CLAUSE_CHUNK_SIZE = 1000
+    
     @staticmethod
-    def calculate_student_attendance(student_id, course_id=None):
+    def _record_count_columns(records=None):
         """
-        Calcula el porcentaje de asistencia REAL de un estudiante
+        Columnas de agregación condicional: cuenta todos los estados
+        en un solo recorrido de attendance_records (SUM(CASE ...))
         
         Args:
-            student_id: ID del estudiante
-            course_id: ID del curso (opcional, si no se especifica calcula para todos)
-            
-        Returns:
-            dict con estadísticas de asistencia
+            records: subconsulta con columnas id y status a contar
+                     (por defecto attendance_records)
         """
-        query = db.session.query(AttendanceRecord).filter(
-            AttendanceRecord.student_id == student_id
-        )
+        record_id = records.c.id if records is not None else AttendanceRecord.id
+        status = records.c.status if records is not None else AttendanceRecord.status
         
-        if course_id:
-            query = query.filter(AttendanceRecord.course_id == course_id)
-        
-        # Total de registros
-        total_classes = query.count()
+        return (
+            func.count(record_id).label('total_classes'),
+            func.sum(case((status == 'PRESENTE', 1), else_=0)).label('present'),
+            func.sum(case((status == 'AUSENTE', 1), else_=0)).label('absent'),
+            func.sum(case((status == 'JUSTIFICADO', 1), else_=0)).label('justified'),
+            func.sum(case((status == 'TARDANZA', 1), else_=0)).label('late')
+        )
+    
+    @staticmethod
+    def _attendance_count_columns():
+        """
+        Columnas que suman los contadores de student_attendance_summary
+        (una fila por estudiante y curso en lugar de todo el historial)
+        """
+        return (
+            func.sum(StudentAttendanceSummary.total_classes).label('total_classes'),
+            func.sum(StudentAttendanceSummary.present).label('present'),
+            func.sum(StudentAttendanceSummary.absent).label('absent'),
+            func.sum(StudentAttendanceSummary.justified).label('justified'),
+            func.sum(StudentAttendanceSummary.late).label('late')
+        )
+    
+    @staticmethod
+    def _build_attendance_stats(total_classes=0, present=0, absent=0, justified=0, late=0,
+                                career=None, course_id=None):
+        """
+        Construye el diccionario de estadísticas a partir de los contadores
+        (career y course_id seleccionan las excepciones de la política de riesgo)
+        """
+        total_classes = int(total_classes or 0)
         
         if total_classes == 0:
             return {
@@ -44,89 +77,252 @@ class StatisticsService:
                 'risk_level': 'NORMAL'
             }
         
-        # Contar por estado
-        present = query.filter(AttendanceRecord.status == 'PRESENTE').count()
-        absent = query.filter(AttendanceRecord.status == 'AUSENTE').count()
-        justified = query.filter(AttendanceRecord.status == 'JUSTIFICADO').count()
-        late = query.filter(AttendanceRecord.status == 'TARDANZA').count()
+        present = int(present or 0)
+        absent = int(absent or 0)
         
         # Calcular porcentajes
         attendance_percentage = round((present / total_classes) * 100, 2)
         absence_percentage = round((absent / total_classes) * 100, 2)
         
         # Determinar nivel de riesgo
-        risk_level = StatisticsService._determine_risk_level(absence_percentage)
+        risk_level = StatisticsService._determine_risk_level(absence_percentage, career, course_id)
         
         return {
             'total_classes': total_classes,
             'present': present,
             'absent': absent,
-            'justified': justified,
-            'late': late,
+            'justified': int(justified or 0),
+            'late': int(late or 0),
             'attendance_percentage': attendance_percentage,
             'absence_percentage': absence_percentage,
             'risk_level': risk_level
         }
     
     @staticmethod
-    def _determine_risk_level(absence_percentage):
-        """Determina el nivel de riesgo según el porcentaje de inasistencias"""
-        if absence_percentage >= 30:
-            return 'CRITICO'  # ROJO
-        elif absence_percentage >= 25:
-            return 'EN_RIESGO'  # NARANJA
-        elif absence_percentage >= 20:
-            return 'ATENCION'  # AMARILLO
-        else:
-            return 'NORMAL'  # VERDE
+    def calculate_student_attendance(student_id, course_id=None):
+        """
+        Calcula el porcentaje de asistencia REAL de un estudiante
+        
+        Args:
+            student_id: ID del estudiante
+            course_id: ID del curso (opcional, si no se especifica calcula para todos)
+        
+        Returns:
+            dict con estadísticas de asistencia
+        """
+        query = db.session.query(
+            *StatisticsService._attendance_count_columns(),
+            func.max(Student.career).label('career')
+        ).join(
+            Student, Student.id == StudentAttendanceSummary.student_id
+        ).filter(
+            StudentAttendanceSummary.student_id == student_id
+        )
+        
+        if course_id:
+            query = query.filter(StudentAttendanceSummary.course_id == course_id)
+        
+        # Un solo viaje a la base de datos para todos los contadores
+        row = query.one()
+        
+        return StatisticsService._build_attendance_stats(
+            row.total_classes, row.present, row.absent, row.justified, row.late,
+            career=row.career, course_id=course_id
+        )
     
     @staticmethod
-    def get_students_at_risk():
+    def calculate_students_attendance(student_ids, course_id=None):
         """
-        Obtiene lista de estudiantes en riesgo (≥25% inasistencias)
+        Calcula las estadísticas de asistencia de varios estudiantes a la vez
+        
+        Args:
+            student_ids: IDs de los estudiantes
+            course_id: ID del curso (opcional)
         
         Returns:
-            list de estudiantes con sus estadísticas
+            dict {student_id: estadísticas}, con valores por defecto para
+            los estudiantes sin registros
         """
-        students = db.session.query(Student).filter(Student.status == 'A').all()
-        at_risk_students = []
+        student_ids = list(dict.fromkeys(student_ids))
+        results = {
+            student_id: StatisticsService._build_attendance_stats()
+            for student_id in student_ids
+        }
         
-        for student in students:
-            stats = StatisticsService.calculate_student_attendance(student.id)
+        chunk_size = StatisticsService.IN_CLAUSE_CHUNK_SIZE
+        for start in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[start:start + chunk_size]
+            
+            query = db.session.query(
+                StudentAttendanceSummary.student_id,
+                *StatisticsService._attendance_count_columns(),
+                func.max(Student.career).label('career')
+            ).join(
+                Student, Student.id == StudentAttendanceSummary.student_id
+            ).filter(
+                StudentAttendanceSummary.student_id.in_(chunk)
+            )
             
-            if stats['absence_percentage'] >= 25:
-                student_data = student.to_dict()
-                student_data['attendance_stats'] = stats
-                at_risk_students.append(student_data)
+            if course_id:
+                query = query.filter(StudentAttendanceSummary.course_id == course_id)
+            
+            # Un GROUP BY por bloque de IDs
+            for row in query.group_by(StudentAttendanceSummary.student_id):
+                results[row.student_id] = StatisticsService._build_attendance_stats(
+                    row.total_classes, row.present, row.absent, row.justified, row.late,
+                    career=row.career, course_id=course_id
+                )
         
-        # Ordenar por porcentaje de inasistencias (mayor a menor)
-        at_risk_students.sort(
-            key=lambda x: x['attendance_stats']['absence_percentage'],
-            reverse=True
+        return results
+    
+    @staticmethod
+    def _determine_risk_level(absence_percentage, career=None, course_id=None):
+        """Determina el nivel de riesgo según el porcentaje de inasistencias (RiskPolicy)"""
+        return RiskPolicy.current().classify(absence_percentage, career, course_id)
+    
+    @staticmethod
+    def _risk_level_expression(absence_percentage, career=None, course_id=None):
+        """Expresión SQL (CASE) equivalente a _determine_risk_level"""
+        return RiskPolicy.current().sql_case(absence_percentage, career, course_id)
+    
+    @staticmethod
+    def _student_counts_subquery():
+        """Contadores de student_attendance_summary sumados por estudiante"""
+        return db.session.query(
+            StudentAttendanceSummary.student_id.label('student_id'),
+            *StatisticsService._attendance_count_columns()
+        ).group_by(StudentAttendanceSummary.student_id).subquery()
+    
+    @staticmethod
+    def risk_cohort_query(min_absence_percentage=None, risk_level=None, min_risk_level=None):
+        """
+        Consulta de la cohorte de estudiantes activos clasificada en la base de datos
+        
+        Las inasistencias se agregan por estudiante con un GROUP BY sobre
+        student_attendance_summary, se unen a students y el porcentaje y el nivel de
+        riesgo (CASE compilado desde RiskPolicy) se calculan en SQL. Solo se
+        incluyen estudiantes con al menos un registro de asistencia.
+        
+        Args:
+            min_absence_percentage: porcentaje mínimo de inasistencias (opcional)
+            risk_level: CRITICO, EN_RIESGO, ATENCION o NORMAL (opcional)
+            min_risk_level: nivel mínimo, ej. EN_RIESGO incluye CRITICO (opcional)
+        
+        Returns:
+            Query con filas (Student, contadores, absence_percentage, risk_level,
+            cohort_total) ordenadas por inasistencias, de mayor a menor
+        """
+        counts = StatisticsService._student_counts_subquery()
+        
+        absence_percentage = func.round(counts.c.absent * 100.0 / counts.c.total_classes, 2)
+        risk_expression = StatisticsService._risk_level_expression(absence_percentage, career=Student.career)
+        
+        query = db.session.query(
+            Student,
+            counts.c.total_classes,
+            counts.c.present,
+            counts.c.absent,
+            counts.c.justified,
+            counts.c.late,
+            absence_percentage.label('absence_percentage'),
+            risk_expression.label('risk_level'),
+            func.count().over().label('cohort_total')
+        ).join(
+            counts, counts.c.student_id == Student.id
+        ).filter(
+            Student.status == 'A',
+            counts.c.total_classes > 0
         )
         
-        return at_risk_students
+        if min_absence_percentage is not None:
+            query = query.filter(absence_percentage >= min_absence_percentage)
+        
+        if risk_level:
+            query = query.filter(risk_expression == risk_level)
+        
+        if min_risk_level:
+            query = query.filter(risk_expression.in_(RiskPolicy.current().levels_at_or_above(min_risk_level)))
+        
+        # Ordenar por porcentaje de inasistencias (mayor a menor)
+        return query.order_by(absence_percentage.desc(), Student.id)
     
     @staticmethod
-    def get_critical_students():
+    def get_risk_cohort(min_absence_percentage=None, risk_level=None, min_risk_level=None,
+                        page=None, per_page=None):
         """
-        Obtiene lista de estudiantes en estado CRÍTICO (≥30% inasistencias)
+        Clasifica a toda la cohorte de estudiantes activos en una sola consulta agrupada
+        
+        Args:
+            min_absence_percentage: porcentaje mínimo de inasistencias (opcional)
+            risk_level: CRITICO, EN_RIESGO, ATENCION o NORMAL (opcional)
+            min_risk_level: nivel mínimo de riesgo (opcional)
+            page: página a devolver (opcional, requiere per_page)
+            per_page: cantidad de estudiantes por página (opcional)
         
         Returns:
-            list de estudiantes críticos
+            dict con la lista de estudiantes (ordenada por inasistencias,
+            de mayor a menor) y el total de la cohorte filtrada
         """
-        students = db.session.query(Student).filter(Student.status == 'A').all()
-        critical_students = []
+        query = StatisticsService.risk_cohort_query(
+            min_absence_percentage=min_absence_percentage,
+            risk_level=risk_level,
+            min_risk_level=min_risk_level
+        )
         
-        for student in students:
-            stats = StatisticsService.calculate_student_attendance(student.id)
-            
-            if stats['absence_percentage'] >= 30:
-                student_data = student.to_dict()
-                student_data['attendance_stats'] = stats
-                critical_students.append(student_data)
+        if per_page:
+            page = max(page or 1, 1)
+            query = query.limit(per_page).offset((page - 1) * per_page)
+        
+        rows = query.all()
         
-        return critical_students
+        students = []
+        for row in rows:
+            student_data = row.Student.to_dict()
+            student_data['attendance_stats'] = StatisticsService._build_attendance_stats(
+                row.total_classes, row.present, row.absent, row.justified, row.late,
+                career=row.Student.career
+            )
+            students.append(student_data)
+        
+        if rows:
+            total = rows[0].cohort_total
+        elif per_page and page > 1:
+            # Página fuera de rango: el total se obtiene sin traer filas
+            total = query.limit(None).offset(None).order_by(None).count()
+        else:
+            total = 0
+        
+        return {
+            'students': students,
+            'total': total,
+            'page': page if per_page else 1,
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page if per_page else 1
+        }
+    
+    @staticmethod
+    def get_students_at_risk(page=None, per_page=None):
+        """
+        Obtiene lista de estudiantes en riesgo (EN_RIESGO o CRITICO según RiskPolicy)
+        
+        Returns:
+            list de estudiantes con sus estadísticas
+        """
+        return StatisticsService.get_risk_cohort(
+            min_risk_level='EN_RIESGO', page=page, per_page=per_page
+        )['students']
+    
+    @staticmethod
+    def get_critical_students(page=None, per_page=None):
+        """
+        Obtiene lista de estudiantes en estado CRÍTICO (según RiskPolicy)
+        
+        Returns:
+            list de estudiantes críticos
+        """
+        return StatisticsService.get_risk_cohort(
+            min_risk_level='CRITICO', page=page, per_page=per_page
+        )['students']
     
     @staticmethod
     def get_justification_stats(student_id):
@@ -139,84 +335,155 @@ class StatisticsService:
         Returns:
             dict con estadísticas de justificaciones
         """
-        total = db.session.query(Justification).filter(
-            Justification.student_id == student_id
-        ).count()
-        
-        pending = db.session.query(Justification).filter(
-            and_(
-                Justification.student_id == student_id,
-                Justification.status == 'PENDIENTE'
-            )
-        ).count()
-        
-        approved = db.session.query(Justification).filter(
-            and_(
-                Justification.student_id == student_id,
-                Justification.status == 'APROBADA'
-            )
-        ).count()
-        
-        rejected = db.session.query(Justification).filter(
-            and_(
-                Justification.student_id == student_id,
-                Justification.status == 'RECHAZADA'
-            )
-        ).count()
+        return StatisticsService.calculate_students_justifications([student_id])[student_id]
+    
+    @staticmethod
+    def _build_justification_stats(total=0, pending=0, approved=0, rejected=0):
+        """Construye el diccionario de estadísticas de justificaciones"""
+        total = int(total or 0)
+        approved = int(approved or 0)
         
         approval_rate = round((approved / total * 100), 1) if total > 0 else 0
         
         return {
             'total': total,
-            'pending': pending,
+            'pending': int(pending or 0),
             'approved': approved,
-            'rejected': rejected,
+            'rejected': int(rejected or 0),
             'approval_rate': approval_rate
         }
     
     @staticmethod
-    def get_dashboard_stats():
+    def calculate_students_justifications(student_ids):
+        """
+        Obtiene las estadísticas de justificaciones de varios estudiantes
+        desde justification_counters (una consulta por bloque de IDs)
+        
+        Args:
+            student_ids: IDs de los estudiantes
+        
+        Returns:
+            dict {student_id: estadísticas}
+        """
+        counters = JustificationCounterService.get_many('STUDENT', student_ids)
+        
+        return {
+            student_id: StatisticsService._build_justification_stats(**counts)
+            for student_id, counts in counters.items()
+        }
+    
+    @staticmethod
+    def preload_student_stats(student_ids):
+        """
+        Precarga las estadísticas de una página de estudiantes en dos
+        consultas agrupadas (asistencia y justificaciones)
+        
+        Args:
+            student_ids: IDs de los estudiantes de la página
+        
+        Returns:
+            dict {student_id: {'attendance': ..., 'justification': ...}}
+        """
+        student_ids = list(student_ids)
+        attendance = StatisticsService.calculate_students_attendance(student_ids)
+        justifications = StatisticsService.calculate_students_justifications(student_ids)
+        
+        return {
+            student_id: {
+                'attendance': attendance[student_id],
+                'justification': justifications[student_id]
+            }
+            for student_id in student_ids
+        }
+    
+    @staticmethod
+    def get_dashboard_stats(use_cache=True):
         """
         Obtiene estadísticas generales para el dashboard del profesor
         
+        El snapshot se memoriza por proceso durante DASHBOARD_STATS_TTL segundos.
+        
+        Args:
+            use_cache: si es False se recalcula y se reemplaza el snapshot
+        
         Returns:
             dict con estadísticas generales
         """
-        # Total de estudiantes
-        total_students = db.session.query(Student).filter(
-            Student.status == 'A'
-        ).count()
+        ttl = current_app.config.get('DASHBOARD_STATS_TTL', 60)
         
-        # Estudiantes en riesgo
-        at_risk = len(StatisticsService.get_students_at_risk())
+        if not use_cache:
+            return _dashboard_cache.set(
+                'dashboard_stats', StatisticsService.build_dashboard_snapshot(), ttl
+            )
         
-        # Estudiantes críticos
-        critical = len(StatisticsService.get_critical_students())
+        return _dashboard_cache.get_or_set(
+            'dashboard_stats', StatisticsService.build_dashboard_snapshot, ttl
+        )
+    
+    @staticmethod
+    def get_risk_distribution():
+        """
+        Histograma de niveles de riesgo de los estudiantes activos en una
+        sola consulta agrupada (sin registros de asistencia = NORMAL)
+        
+        Returns:
+            dict {nivel: cantidad de estudiantes}
+        """
+        counts = StatisticsService._student_counts_subquery()
+        
+        absence_percentage = func.round(counts.c.absent * 100.0 / func.nullif(counts.c.total_classes, 0), 2)
+        risk_expression = case(
+            (
+                counts.c.total_classes > 0,
+                StatisticsService._risk_level_expression(absence_percentage, career=Student.career)
+            ),
+            else_='NORMAL'
+        )
         
-        # Justificaciones pendientes
-        pending_justifications = db.session.query(Justification).filter(
-            Justification.status == 'PENDIENTE'
-        ).count()
+        risk_rows = db.session.query(
+            risk_expression.label('risk_level'),
+            func.count(Student.id).label('count')
+        ).outerjoin(
+            counts, counts.c.student_id == Student.id
+        ).filter(
+            Student.status == 'A'
+        ).group_by(risk_expression).all()
         
-        # Total de justificaciones
-        total_justifications = db.session.query(Justification).count()
+        risk_distribution = dict.fromkeys(['CRITICO', 'EN_RIESGO', 'ATENCION', 'NORMAL'], 0)
+        for row in risk_rows:
+            risk_distribution[row.risk_level] = row.count
         
-        # Justificaciones aprobadas
-        approved_justifications = db.session.query(Justification).filter(
-            Justification.status == 'APROBADA'
-        ).count()
+        return risk_distribution
+    
+    @staticmethod
+    def build_dashboard_snapshot():
+        """
+        Calcula todas las cifras del dashboard con una consulta agrupada
+        (histograma de niveles de riesgo de los estudiantes activos) y la
+        lectura de los contadores globales de justificaciones
         
-        # Justificaciones rechazadas
-        rejected_justifications = db.session.query(Justification).filter(
-            Justification.status == 'RECHAZADA'
-        ).count()
+        Returns:
+            dict con estadísticas generales
+        """
+        risk_distribution = StatisticsService.get_risk_distribution()
+        
+        # Justificaciones por estado (contadores materializados)
+        counts = JustificationCounterService.get_counts('GLOBAL', 0)
+        justification_distribution = {
+            'PENDIENTE': counts['pending'],
+            'APROBADA': counts['approved'],
+            'RECHAZADA': counts['rejected']
+        }
         
         return {
-            'total_students': total_students,
-            'students_at_risk': at_risk,
-            'students_critical': critical,
-            'pending_justifications': pending_justifications,
-            'total_justifications': total_justifications,
-            'approved_justifications': approved_justifications,
-            'rejected_justifications': rejected_justifications
+            'total_students': sum(risk_distribution.values()),
+            'students_at_risk': risk_distribution['EN_RIESGO'] + risk_distribution['CRITICO'],
+            'students_critical': risk_distribution['CRITICO'],
+            'pending_justifications': counts['pending'],
+            'total_justifications': counts['total'],
+            'approved_justifications': counts['approved'],
+            'rejected_justifications': counts['rejected'],
+            'risk_distribution': risk_distribution,
+            'justification_distribution': justification_distribution,
+            'generated_at': datetime.utcnow().isoformat()
         }
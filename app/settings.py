@@ -57,3 +57,90 @@ class Config:
     UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
 
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
+
+    # ======================================================
+    # 6) CACHÉ EN MEMORIA (POR WORKER)
+    # ======================================================
+
+    # Segundos que se reutiliza el snapshot de /api/professor/dashboard/stats (0 = sin caché)
+    DASHBOARD_STATS_TTL = int(os.getenv("DASHBOARD_STATS_TTL", 60))
+
+    # ======================================================
+    # 7) CALENDARIO ACADÉMICO
+    # ======================================================
+
+    # Fechas del semestre en curso (YYYY-MM-DD); si no se definen se usa
+    # el calendario por defecto: verano (ene-feb), I (mar-jul), II (ago-dic)
+    SEMESTER_START = os.getenv("SEMESTER_START")
+    SEMESTER_END = os.getenv("SEMESTER_END")
+
+    # ======================================================
+    # 8) POLÍTICA DE RIESGO POR INASISTENCIAS
+    # ======================================================
+
+    # Umbrales (% de inasistencias) en JSON, ej. {"CRITICO": 30, "EN_RIESGO": 25, "ATENCION": 20}
+    RISK_THRESHOLDS = os.getenv("RISK_THRESHOLDS")
+
+    # Excepciones por carrera o por curso (ID), ej. {"Medicina": {"CRITICO": 20}}
+    RISK_THRESHOLDS_BY_CAREER = os.getenv("RISK_THRESHOLDS_BY_CAREER")
+    RISK_THRESHOLDS_BY_COURSE = os.getenv("RISK_THRESHOLDS_BY_COURSE")
+
+    # ======================================================
+    # 9) IMPORTACIÓN MASIVA DE ASISTENCIA
+    # ======================================================
+
+    # Filas por bloque (cada bloque es un upsert y un commit propio)
+    ATTENDANCE_IMPORT_CHUNK_SIZE = int(os.getenv("ATTENDANCE_IMPORT_CHUNK_SIZE", 1000))
+
+    # Máximo de errores por fila que se devuelven en el reporte
+    ATTENDANCE_IMPORT_MAX_ERRORS = int(os.getenv("ATTENDANCE_IMPORT_MAX_ERRORS", 100))
+
+    # ======================================================
+    # 10) LISTADO DE ASISTENCIAS
+    # ======================================================
+
+    # Calcular las estadísticas del listado en un hilo paralelo a la página
+    # (usa una segunda conexión del pool por petición)
+    ATTENDANCE_STATS_CONCURRENT = os.getenv("ATTENDANCE_STATS_CONCURRENT", "false").lower() == "true"
+
+    # ======================================================
+    # 11) WRITE-BEHIND DE ASISTENCIAS (HORAS PICO)
+    # ======================================================
+
+    # Confirmar los registros de asistencia apenas quedan en el diario local
+    # (202) y volcarlos a la base en lotes desde un hilo de fondo
+    ATTENDANCE_WRITE_BEHIND = os.getenv("ATTENDANCE_WRITE_BEHIND", "false").lower() == "true"
+
+    # Diario SQLite compartido por los workers del mismo servidor
+    ATTENDANCE_JOURNAL_PATH = os.getenv("ATTENDANCE_JOURNAL_PATH", os.path.join(BASE_DIR, "attendance_journal.db"))
+
+    # Segundos entre vaciados, entradas por lote y duración del turno de drenado
+    ATTENDANCE_DRAIN_INTERVAL = float(os.getenv("ATTENDANCE_DRAIN_INTERVAL", 1.0))
+    ATTENDANCE_DRAIN_BATCH = int(os.getenv("ATTENDANCE_DRAIN_BATCH", 1000))
+    ATTENDANCE_DRAIN_LEASE_SECONDS = int(os.getenv("ATTENDANCE_DRAIN_LEASE_SECONDS", 30))
+
+    # ======================================================
+    # 12) IDEMPOTENCIA DE LOS POST (HEADER Idempotency-Key)
+    # ======================================================
+
+    # Segundos que se conserva la respuesta de una clave para repetirla en los reintentos
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+
+    # ======================================================
+    # 13) ENVÍO DE EMAILS EN SEGUNDO PLANO
+    # ======================================================
+
+    # Hilo que envía los emails encolados (PENDING) por las revisiones en lote.
+    # Solo lo inician los procesos web (run.py / wsgi.py) y únicamente si está
+    # activo; los scripts nunca lo inician. Sin él la cola se vacía con
+    # send_pending_emails.py
+    EMAIL_OUTBOX_WORKER = os.getenv("EMAIL_OUTBOX_WORKER", "false").lower() == "true"
+
+    # Segundos entre revisiones de la cola, emails por lote y tiempo tras el cual
+    # un email tomado por un worker caído vuelve a PENDING
+    EMAIL_OUTBOX_INTERVAL = float(os.getenv("EMAIL_OUTBOX_INTERVAL", 30))
+    EMAIL_OUTBOX_BATCH = int(os.getenv("EMAIL_OUTBOX_BATCH", 100))
+    EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", 300))
+
+    # Máximo de justificaciones por petición a /api/justifications/batch-review
+    JUSTIFICATION_BATCH_REVIEW_MAX = int(os.getenv("JUSTIFICATION_BATCH_REVIEW_MAX", 500))
@@ -0,0 +1,65 @@
+"""
+Script para archivar o restaurar la asistencia de un semestre cerrado
+Uso:
+    python archive_attendance.py archive 2025-I
+    python archive_attendance.py restore 2025-I
+    python archive_attendance.py list
+"""
+from app import create_app, db
+from app.models.attendance_record_archive import AttendanceRecordArchive
+from app.services.attendance_archive_service import AttendanceArchiveService
+from datetime import datetime
+import argparse
+
+def archive_attendance(command, semester=None):
+    """Ejecuta la acción indicada sobre attendance_records_archive"""
+    app = create_app()
+    
+    with app.app_context():
+        print('\n' + '='*60)
+        print(f'🗄️ ARCHIVO DE ASISTENCIAS POR SEMESTRE')
+        print(f'📅 Fecha: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+        print('='*60 + '\n')
+        
+        AttendanceRecordArchive.__table__.create(bind=db.engine, checkfirst=True)
+        
+        if command == 'archive':
+            print(f'📦 Archivando el semestre {semester}...')
+            result = AttendanceArchiveService.archive_semester(semester)
+            print(f'✅ Registros archivados: {result["archived"]}')
+        elif command == 'restore':
+            print(f'♻️ Restaurando el semestre {semester}...')
+            result = AttendanceArchiveService.restore_semester(semester)
+            print(f'✅ Registros restaurados: {result["restored"]}')
+        
+        # Estado del archivo
+        archived = AttendanceArchiveService.list_archived()
+        print('\n' + '='*60)
+        print('📊 SEMESTRES ARCHIVADOS')
+        print('='*60)
+        if not archived:
+            print('   (ninguno)')
+        for item in archived:
+            print(f'   {item["semester"]}: {item["records"]} registros '
+                  f'({item["first_date"]} a {item["last_date"]})')
+        print('='*60 + '\n')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Archiva o restaura la asistencia de un semestre')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    archive_parser = subparsers.add_parser('archive', help='Mueve un semestre cerrado al archivo')
+    archive_parser.add_argument('semester', help='Semestre (ej. 2025-I)')
+    
+    restore_parser = subparsers.add_parser('restore', help='Devuelve un semestre archivado a attendance_records')
+    restore_parser.add_argument('semester', help='Semestre (ej. 2025-I)')
+    
+    subparsers.add_parser('list', help='Lista los semestres archivados')
+    args = parser.parse_args()
+    
+    try:
+        archive_attendance(args.command, getattr(args, 'semester', None))
+    except Exception as e:
+        print(f'\n❌ ERROR CRÍTICO: {str(e)}\n')
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,216 @@
+"""
+Benchmark de los índices de las tablas más consultadas
+Crea una base SQLite temporal con datos sintéticos, mide las consultas de los
+listados sin los índices compuestos y luego con ellos (los definidos en los modelos
+y en migrations/versions/a1f3c9d2e7b4_hot_table_indexes.py)
+
+Uso: python benchmark_indexes.py [--students 1000] [--days 80] [--repeat 20]
+"""
+from app.models.attendance_record import AttendanceRecord
+from app.models.justification import Justification
+from app.models.course_enrollment import CourseEnrollment
+from app.models.audit_log import AuditLog
+from sqlalchemy import create_engine, event, select, insert, text
+from datetime import date, datetime, timedelta
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+TABLES = [
+    AttendanceRecord.__table__,
+    Justification.__table__,
+    CourseEnrollment.__table__,
+    AuditLog.__table__
+]
+
+STATUSES = ['PRESENTE'] * 7 + ['AUSENTE', 'TARDANZA', 'JUSTIFICADO']
+COURSES_PER_STUDENT = 5
+
+def create_database(directory):
+    """Base SQLite con los esquemas DEVELOPER_01 y DEVELOPER_02 adjuntos"""
+    engine = create_engine(f'sqlite:///{os.path.join(directory, "main.db")}')
+    
+    @event.listens_for(engine, 'connect')
+    def attach_schemas(dbapi_connection, connection_record):
+        for schema in ('DEVELOPER_01', 'DEVELOPER_02'):
+            path = os.path.join(directory, f'{schema}.db')
+            dbapi_connection.execute(f"ATTACH DATABASE '{path}' AS {schema}")
+    
+    for table in TABLES:
+        table.create(bind=engine)
+    
+    return engine
+
+def seed(engine, students, days, courses):
+    """Datos sintéticos con la forma de producción"""
+    random.seed(42)
+    start = date.today() - timedelta(days=days)
+    
+    with engine.begin() as connection:
+        enrollments = []
+        student_courses = {}
+        for student_id in range(1, students + 1):
+            student_courses[student_id] = random.sample(range(1, courses + 1), COURSES_PER_STUDENT)
+            for course_id in student_courses[student_id]:
+                enrollments.append({
+                    'student_id': student_id,
+                    'course_id': course_id,
+                    'status': 'A' if random.random() < 0.9 else 'R'
+                })
+        connection.execute(insert(CourseEnrollment.__table__), enrollments)
+        
+        batch = []
+        for student_id, course_ids in student_courses.items():
+            for course_id in course_ids:
+                for day in range(days):
+                    batch.append({
+                        'student_id': student_id,
+                        'course_id': course_id,
+                        'attendance_date': start + timedelta(days=day),
+                        'status': random.choice(STATUSES),
+                        'created_at': datetime.utcnow()
+                    })
+            if len(batch) >= 50000:
+                connection.execute(insert(AttendanceRecord.__table__), batch)
+                batch = []
+        if batch:
+            connection.execute(insert(AttendanceRecord.__table__), batch)
+        
+        connection.execute(insert(Justification.__table__), [
+            {
+                'student_id': random.randint(1, students),
+                'course_id': random.randint(1, courses),
+                'absence_date': start + timedelta(days=random.randrange(days)),
+                'reason_type': 'SALUD',
+                'reason_description': 'Benchmark',
+                'status': random.choice(['PENDIENTE', 'APROBADA', 'APROBADA', 'RECHAZADA']),
+                'submission_date': datetime.utcnow() - timedelta(minutes=random.randrange(days * 1440))
+            }
+            for _ in range(students * 10)
+        ])
+        
+        connection.execute(insert(AuditLog.__table__), [
+            {
+                'user_id': random.randint(1, students),
+                'user_type': random.choice(['STUDENT', 'PROFESSOR']),
+                'action': random.choice(['LOGIN', 'RECORD_ATTENDANCE', 'APPROVE_JUSTIFICATION']),
+                'table_name': 'attendance_records',
+                'created_at': datetime.utcnow() - timedelta(minutes=random.randrange(days * 1440))
+            }
+            for _ in range(students * 100)
+        ])
+
+def build_queries(students, days, courses):
+    """Consultas de los caminos más usados con parámetros aleatorios"""
+    a = AttendanceRecord.__table__.c
+    j = Justification.__table__.c
+    e = CourseEnrollment.__table__.c
+    l = AuditLog.__table__.c
+    start = date.today() - timedelta(days=days)
+    
+    def random_date():
+        return start + timedelta(days=random.randrange(days))
+    
+    return [
+        ('Lista de una sesión (curso + fecha)', lambda: select(a.student_id, a.status).where(
+            a.course_id == random.randint(1, courses), a.attendance_date == random_date())),
+        ('Matriz del curso (30 días)', lambda: select(a.student_id, a.attendance_date, a.status).where(
+            a.course_id == random.randint(1, courses),
+            a.attendance_date.between(start, start + timedelta(days=30)))),
+        ('Historial de un estudiante', lambda: select(a.id, a.status).where(
+            a.student_id == random.randint(1, students)).order_by(a.attendance_date.desc())),
+        ('Listado de asistencias (página 1)', lambda: select(a.id).order_by(
+            a.attendance_date.desc(), a.id.desc()).limit(50)),
+        ('Justificaciones pendientes (página 1)', lambda: select(j.id).where(
+            j.status == 'PENDIENTE').order_by(j.submission_date.desc(), j.id.desc()).limit(10)),
+        ('Justificaciones de un estudiante por estado', lambda: select(j.id).where(
+            j.student_id == random.randint(1, students), j.status == 'APROBADA')),
+        ('Roster activo de un curso', lambda: select(e.student_id).where(
+            e.course_id == random.randint(1, courses), e.status == 'A')),
+        ('Auditoría (página 1)', lambda: select(l.id).order_by(
+            l.created_at.desc(), l.id.desc()).limit(50)),
+        ('Auditoría de un usuario', lambda: select(l.id).where(
+            l.user_id == random.randint(1, students)).order_by(l.created_at.desc()).limit(50)),
+    ]
+
+def measure(engine, queries, repeat):
+    """Mediana en milisegundos de cada consulta"""
+    results = {}
+    with engine.connect() as connection:
+        for name, build in queries:
+            timings = []
+            for _ in range(repeat):
+                statement = build()
+                started = time.perf_counter()
+                connection.execute(statement).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+    return results
+
+def set_indexes(engine, create):
+    """Crea o elimina los índices declarados en los modelos"""
+    with engine.begin() as connection:
+        for table in TABLES:
+            for index in table.indexes:
+                if create:
+                    index.create(bind=connection)
+                else:
+                    index.drop(bind=connection)
+        connection.execute(text('ANALYZE'))
+
+def run_benchmark(students, days, repeat):
+    courses = max(students // 25, COURSES_PER_STUDENT)
+    
+    print('\n' + '='*78)
+    print(f'⏱️ BENCHMARK DE ÍNDICES (SQLite)')
+    print(f'📅 Fecha: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+    print('='*78 + '\n')
+    
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_database(directory)
+        
+        print(f'🌱 Generando datos: {students} estudiantes, {courses} cursos, {days} días...')
+        started = time.perf_counter()
+        seed(engine, students, days, courses)
+        print(f'   {students * COURSES_PER_STUDENT * days} asistencias, {students * 10} justificaciones, '
+              f'{students * 100} registros de auditoría ({time.perf_counter() - started:.1f}s)\n')
+        
+        queries = build_queries(students, days, courses)
+        
+        set_indexes(engine, create=False)
+        random.seed(7)
+        before = measure(engine, queries, repeat)
+        
+        started = time.perf_counter()
+        set_indexes(engine, create=True)
+        print(f'🔧 Índices creados en {time.perf_counter() - started:.1f}s\n')
+        random.seed(7)
+        after = measure(engine, queries, repeat)
+        
+        engine.dispose()
+    
+    print(f'{"Consulta":<46}{"Antes (ms)":>11}{"Después (ms)":>13}{"Mejora":>8}')
+    print('-'*78)
+    for name, _ in queries:
+        speedup = before[name] / after[name] if after[name] > 0 else float('inf')
+        print(f'{name:<46}{before[name]:>11.2f}{after[name]:>13.2f}{speedup:>7.1f}x')
+    print('='*78 + '\n')
+    
+    return before, after
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de los índices de las tablas más consultadas')
+    parser.add_argument('--students', type=int, default=1000, help='Estudiantes a generar')
+    parser.add_argument('--days', type=int, default=80, help='Días de asistencia por curso')
+    parser.add_argument('--repeat', type=int, default=20, help='Ejecuciones por consulta')
+    args = parser.parse_args()
+    
+    try:
+        run_benchmark(args.students, args.days, args.repeat)
+    except Exception as e:
+        print(f'\n❌ ERROR CRÍTICO: {str(e)}\n')
+        import traceback
+        traceback.print_exc()
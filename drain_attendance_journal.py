@@ -0,0 +1,46 @@
+"""
+Script para volcar a la base de datos el diario write-behind de asistencias
+Útil antes de reiniciar o desactivar ATTENDANCE_WRITE_BEHIND (drena el diario
+aunque el modo ya esté desactivado)
+Uso: python drain_attendance_journal.py
+"""
+from app import create_app
+from app.services.attendance_write_behind_service import AttendanceWriteBehindService
+from datetime import datetime
+import os
+
+def drain_attendance_journal():
+    """Vacía el diario en lotes y muestra el estado final"""
+    app = create_app()
+    
+    with app.app_context():
+        print('\n' + '='*60)
+        print(f'📤 VOLCADO DEL DIARIO DE ASISTENCIAS')
+        print(f'📅 Fecha: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+        print(f'📄 Diario: {app.config["ATTENDANCE_JOURNAL_PATH"]}')
+        print('='*60 + '\n')
+        
+        # Se drena aunque ATTENDANCE_WRITE_BEHIND ya esté desactivado: las
+        # entradas confirmadas antes del cambio siguen en el diario
+        if not os.path.exists(app.config['ATTENDANCE_JOURNAL_PATH']):
+            print('ℹ️ No hay diario de asistencias para volcar')
+            return
+        
+        AttendanceWriteBehindService._init_journal()
+        processed = AttendanceWriteBehindService.drain()
+        metrics = AttendanceWriteBehindService.get_metrics()
+        
+        print(f'✅ Entradas procesadas: {processed}')
+        print(f'⏳ Pendientes: {metrics["queue_depth"]}')
+        print(f'❌ Rechazadas (DEAD): {metrics["dead_letters"]}')
+        if metrics['queue_depth'] and metrics['drainer_owner']:
+            print(f'ℹ️ Otro worker tiene el turno de drenado: {metrics["drainer_owner"]}')
+        print('='*60 + '\n')
+
+if __name__ == '__main__':
+    try:
+        drain_attendance_journal()
+    except Exception as e:
+        print(f'\n❌ ERROR CRÍTICO: {str(e)}\n')
+        import traceback
+        traceback.print_exc()
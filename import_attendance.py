@@ -0,0 +1,69 @@
+"""
+Script para importar asistencias desde un archivo CSV o NDJSON
+Uso: python import_attendance.py archivo.csv [--format csv|ndjson] [--chunk-size 1000] [--recorded-by ID]
+"""
+from app import create_app
+from app.services.attendance_import_service import AttendanceImportService
+from datetime import datetime
+import argparse
+
+def import_attendance(path, file_format=None, chunk_size=None, recorded_by=None):
+    """Importa el archivo en bloques con un commit por bloque"""
+    app = create_app()
+    
+    with app.app_context():
+        print('\n' + '='*60)
+        print(f'📥 IMPORTACIÓN DE ASISTENCIAS')
+        print(f'📅 Fecha: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+        print(f'📄 Archivo: {path}')
+        print('='*60 + '\n')
+        
+        file_format = file_format or AttendanceImportService.detect_format(path)
+        
+        def progress(report):
+            print(f'   → Bloque {report["chunks"]}: {report["processed"]} filas leídas, '
+                  f'{report["imported"]} importadas, {report["failed"]} con error')
+        
+        with open(path, 'rb') as stream:
+            report = AttendanceImportService.import_stream(
+                stream,
+                file_format=file_format,
+                chunk_size=chunk_size,
+                recorded_by=recorded_by,
+                progress=progress
+            )
+        
+        if report['errors']:
+            print('\n⚠️ Errores:')
+            for error in report['errors']:
+                print(f'   Línea {error["line"]}: {error["message"]}')
+            if report['errors_truncated']:
+                print('   ... (se omitieron más errores)')
+        
+        # Resumen
+        print('\n' + '='*60)
+        print('📊 RESUMEN DE LA IMPORTACIÓN')
+        print('='*60)
+        print(f'📄 Filas leídas: {report["processed"]}')
+        print(f'✅ Registros importados: {report["imported"]}')
+        print(f'🔁 Filas repetidas (misma clave en el bloque): {report["duplicates"]}')
+        print(f'❌ Filas con error: {report["failed"]}')
+        print(f'📦 Bloques: {report["chunks"]}')
+        print('='*60 + '\n')
+        
+        return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importa asistencias desde CSV o NDJSON')
+    parser.add_argument('path', help='Archivo a importar')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help='Formato (por defecto según la extensión)')
+    parser.add_argument('--chunk-size', type=int, help='Filas por bloque')
+    parser.add_argument('--recorded-by', type=int, help='ID del profesor que registra')
+    args = parser.parse_args()
+    
+    try:
+        import_attendance(args.path, args.format, args.chunk_size, args.recorded_by)
+    except Exception as e:
+        print(f'\n❌ ERROR CRÍTICO: {str(e)}\n')
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,96 @@
+"""Índices compuestos y restricción única de las tablas más consultadas
+
+attendance_records: clave natural única (student_id, course_id, attendance_date)
+e índices por curso/fecha, estudiante/fecha y fecha/id.
+justifications, course_enrollments y audit_logs: índices por los filtros y
+ordenamientos de los listados.
+
+Los nombres no superan 30 caracteres (límite de Oracle anterior a 12.2).
+
+Revision ID: a1f3c9d2e7b4
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f3c9d2e7b4'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (nombre, tabla, esquema, columnas)
+INDEXES = [
+    ('ix_attendance_course_date', 'attendance_records', 'DEVELOPER_01',
+     ['course_id', 'attendance_date', 'status', 'student_id']),
+    ('ix_attendance_student_date', 'attendance_records', 'DEVELOPER_01',
+     ['student_id', 'attendance_date', 'status']),
+    ('ix_attendance_date_id', 'attendance_records', 'DEVELOPER_01',
+     ['attendance_date', 'id']),
+    ('ix_justif_student_status', 'justifications', 'DEVELOPER_02',
+     ['student_id', 'status', 'submission_date']),
+    ('ix_justif_status_submitted', 'justifications', 'DEVELOPER_02',
+     ['status', 'submission_date', 'id']),
+    ('ix_enrollment_course_status', 'course_enrollments', 'DEVELOPER_01',
+     ['course_id', 'status', 'student_id']),
+    ('ix_enrollment_student_status', 'course_enrollments', 'DEVELOPER_01',
+     ['student_id', 'status']),
+    ('ix_audit_created_id', 'audit_logs', 'DEVELOPER_02',
+     ['created_at', 'id']),
+    ('ix_audit_user_created', 'audit_logs', 'DEVELOPER_02',
+     ['user_id', 'created_at']),
+    ('ix_audit_action_created', 'audit_logs', 'DEVELOPER_02',
+     ['action', 'created_at']),
+]
+
+UNIQUE_NAME = 'uq_attendance_student_course_date'
+UNIQUE_COLUMNS = ['student_id', 'course_id', 'attendance_date']
+
+
+def _check_duplicates():
+    """La restricción única falla si ya hay duplicados: se informan antes de crearla"""
+    duplicates = op.get_bind().execute(sa.text(
+        'SELECT COUNT(*) FROM ('
+        ' SELECT student_id, course_id, attendance_date'
+        ' FROM DEVELOPER_01.attendance_records'
+        ' GROUP BY student_id, course_id, attendance_date'
+        ' HAVING COUNT(*) > 1'
+        ') d'
+    )).scalar()
+
+    if duplicates:
+        raise RuntimeError(
+            f'attendance_records tiene {duplicates} claves (student_id, course_id, '
+            'attendance_date) repetidas. Elimine los duplicados y ejecute '
+            'rebuild_attendance_summary.py antes de aplicar esta migración.'
+        )
+
+
+def upgrade():
+    _check_duplicates()
+
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite no admite ALTER TABLE ... ADD CONSTRAINT: índice único equivalente
+        op.create_index(UNIQUE_NAME, 'attendance_records', UNIQUE_COLUMNS,
+                        unique=True, schema='DEVELOPER_01')
+    else:
+        op.create_unique_constraint(UNIQUE_NAME, 'attendance_records', UNIQUE_COLUMNS,
+                                    schema='DEVELOPER_01')
+
+    for name, table, schema, columns in INDEXES:
+        op.create_index(name, table, columns, schema=schema)
+
+
+def downgrade():
+    for name, table, schema, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, schema=schema)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        op.drop_index(UNIQUE_NAME, table_name='attendance_records', schema='DEVELOPER_01')
+    else:
+        op.drop_constraint(UNIQUE_NAME, 'attendance_records', type_='unique',
+                           schema='DEVELOPER_01')
@@ -0,0 +1,37 @@
+"""Turno de escritura de la secuencia de cambios de asistencia
+
+attendance_change_clock tiene una sola fila que cada transacción bloquea
+antes de insertar en attendance_changes y mantiene hasta su commit: una
+transacción con un seq menor siempre se confirma antes de que otra pueda
+obtener uno mayor, así el token entregado a los clientes nunca salta un
+cambio que todavía no era visible.
+
+Revision ID: a8d4c7e2f319
+Revises: f3b8d6e1a205
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d4c7e2f319'
+down_revision = 'f3b8d6e1a205'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    clock = op.create_table(
+        'attendance_change_clock',
+        sa.Column('name', sa.String(length=20), nullable=False),
+        sa.Column('ticked_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+        schema='DEVELOPER_01'
+    )
+    op.bulk_insert(clock, [{'name': 'attendance', 'ticked_at': None}])
+
+
+def downgrade():
+    op.drop_table('attendance_change_clock', schema='DEVELOPER_01')
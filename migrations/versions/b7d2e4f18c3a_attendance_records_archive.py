@@ -0,0 +1,47 @@
+"""Tabla de archivo para la asistencia de semestres cerrados
+
+attendance_records_archive conserva el id original de cada registro,
+la etiqueta del semestre y la fecha en que se archivó.
+
+Revision ID: b7d2e4f18c3a
+Revises: a1f3c9d2e7b4
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e4f18c3a'
+down_revision = 'a1f3c9d2e7b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'attendance_records_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('attendance_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('notes', sa.String(length=500), nullable=True),
+        sa.Column('recorded_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('semester', sa.String(length=10), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='DEVELOPER_01'
+    )
+    op.create_index('ix_archive_semester', 'attendance_records_archive', ['semester'],
+                    unique=False, schema='DEVELOPER_01')
+    op.create_index('ix_archive_student_course', 'attendance_records_archive',
+                    ['student_id', 'course_id', 'attendance_date'], unique=False, schema='DEVELOPER_01')
+
+
+def downgrade():
+    op.drop_index('ix_archive_student_course', table_name='attendance_records_archive', schema='DEVELOPER_01')
+    op.drop_index('ix_archive_semester', table_name='attendance_records_archive', schema='DEVELOPER_01')
+    op.drop_table('attendance_records_archive', schema='DEVELOPER_01')
@@ -0,0 +1,43 @@
+"""Secuencia de cambios de asistencia para la sincronización incremental
+
+attendance_changes guarda una fila por escritura de una clave
+(student_id, course_id, attendance_date); seq es el token de cambio.
+
+Revision ID: c4e8a1b95d27
+Revises: b7d2e4f18c3a
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1b95d27'
+down_revision = 'b7d2e4f18c3a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'attendance_changes',
+        sa.Column('seq', sa.Integer(), sa.Identity(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('attendance_date', sa.Date(), nullable=False),
+        sa.Column('operation', sa.String(length=10), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('seq'),
+        schema='DEVELOPER_01'
+    )
+    op.create_index('ix_att_changes_course_seq', 'attendance_changes', ['course_id', 'seq'],
+                    unique=False, schema='DEVELOPER_01')
+    op.create_index('ix_att_changes_student_seq', 'attendance_changes', ['student_id', 'seq'],
+                    unique=False, schema='DEVELOPER_01')
+
+
+def downgrade():
+    op.drop_index('ix_att_changes_student_seq', table_name='attendance_changes', schema='DEVELOPER_01')
+    op.drop_index('ix_att_changes_course_seq', table_name='attendance_changes', schema='DEVELOPER_01')
+    op.drop_table('attendance_changes', schema='DEVELOPER_01')
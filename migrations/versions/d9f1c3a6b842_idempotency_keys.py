@@ -0,0 +1,38 @@
+"""Respuestas guardadas por Idempotency-Key
+
+Revision ID: d9f1c3a6b842
+Revises: c4e8a1b95d27
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9f1c3a6b842'
+down_revision = 'c4e8a1b95d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('key_hash', sa.String(length=64), nullable=False),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('state', sa.String(length=20), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('response_body', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key_hash'),
+        schema='DEVELOPER_01'
+    )
+    op.create_index('ix_idempotency_expires', 'idempotency_keys', ['expires_at'],
+                    unique=False, schema='DEVELOPER_01')
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_expires', table_name='idempotency_keys', schema='DEVELOPER_01')
+    op.drop_table('idempotency_keys', schema='DEVELOPER_01')
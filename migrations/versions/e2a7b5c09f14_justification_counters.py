@@ -0,0 +1,46 @@
+"""Contadores materializados de justificaciones por estado
+
+justification_counters guarda total/pending/approved/rejected por ámbito:
+GLOBAL (scope_id 0), STUDENT, COURSE y PROFESSOR (profesor del curso).
+La tabla se carga en la misma migración con los INSERT ... SELECT de
+JustificationCounterService.rebuild; sin ellos la primera aprobación dejaría
+pending en negativo.
+
+Revision ID: e2a7b5c09f14
+Revises: d9f1c3a6b842
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+from app.services.justification_counter_service import JustificationCounterService
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7b5c09f14'
+down_revision = 'd9f1c3a6b842'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'justification_counters',
+        sa.Column('scope', sa.String(length=10), nullable=False),
+        sa.Column('scope_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('pending', sa.Integer(), nullable=False),
+        sa.Column('approved', sa.Integer(), nullable=False),
+        sa.Column('rejected', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('scope', 'scope_id'),
+        schema='DEVELOPER_02'
+    )
+    for statement in JustificationCounterService._rebuild_inserts(datetime.utcnow()):
+        op.execute(statement)
+
+
+def downgrade():
+    op.drop_table('justification_counters', schema='DEVELOPER_02')
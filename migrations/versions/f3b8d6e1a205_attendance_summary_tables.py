@@ -0,0 +1,88 @@
+"""Tablas de resumen de asistencia (student_attendance_summary y attendance_daily_rollup)
+
+Contadores por (estudiante, curso) y por (estudiante, día) que mantiene
+AttendanceSummaryService en cada escritura de asistencia. Hasta ahora solo
+los creaba rebuild_attendance_summary.py; si ya existen, la migración solo
+agrega los índices que falten.
+Las tablas que crea se cargan en la misma migración con los INSERT ... SELECT
+de AttendanceSummaryService.rebuild (registros vivos y archivados), así las
+escrituras siguientes aplican sus deltas sobre contadores completos.
+
+Revision ID: f3b8d6e1a205
+Revises: e2a7b5c09f14
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+from app.services.attendance_summary_service import AttendanceSummaryService
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d6e1a205'
+down_revision = 'e2a7b5c09f14'
+branch_labels = None
+depends_on = None
+
+
+def _counter_columns():
+    return [
+        sa.Column('total_classes', sa.Integer(), nullable=False),
+        sa.Column('present', sa.Integer(), nullable=False),
+        sa.Column('absent', sa.Integer(), nullable=False),
+        sa.Column('justified', sa.Integer(), nullable=False),
+        sa.Column('late', sa.Integer(), nullable=False)
+    ]
+
+
+def _create_index(inspector, name, table, columns):
+    existing = {index['name'] for index in inspector.get_indexes(table, schema='DEVELOPER_01')}
+    if name.lower() not in {index_name.lower() for index_name in existing if index_name}:
+        op.create_index(name, table, columns, unique=False, schema='DEVELOPER_01')
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    summary_created = not inspector.has_table('student_attendance_summary', schema='DEVELOPER_01')
+    rollup_created = not inspector.has_table('attendance_daily_rollup', schema='DEVELOPER_01')
+
+    if summary_created:
+        op.create_table(
+            'student_attendance_summary',
+            sa.Column('student_id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('course_id', sa.Integer(), autoincrement=False, nullable=False),
+            *_counter_columns(),
+            sa.Column('risk_level', sa.String(length=20), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('student_id', 'course_id'),
+            schema='DEVELOPER_01'
+        )
+
+    if rollup_created:
+        op.create_table(
+            'attendance_daily_rollup',
+            sa.Column('student_id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('rollup_date', sa.Date(), nullable=False),
+            *_counter_columns(),
+            sa.PrimaryKeyConstraint('student_id', 'rollup_date'),
+            schema='DEVELOPER_01'
+        )
+
+    inspector = sa.inspect(op.get_bind())
+    _create_index(inspector, 'ix_att_summary_course', 'student_attendance_summary', ['course_id', 'student_id'])
+    _create_index(inspector, 'ix_att_rollup_date', 'attendance_daily_rollup', ['rollup_date', 'student_id'])
+
+    summary_insert, rollup_insert = AttendanceSummaryService._rebuild_inserts(datetime.utcnow())
+    if summary_created:
+        op.execute(summary_insert)
+    if rollup_created:
+        op.execute(rollup_insert)
+
+
+def downgrade():
+    op.drop_index('ix_att_rollup_date', table_name='attendance_daily_rollup', schema='DEVELOPER_01')
+    op.drop_index('ix_att_summary_course', table_name='student_attendance_summary', schema='DEVELOPER_01')
+    op.drop_table('attendance_daily_rollup', schema='DEVELOPER_01')
+    op.drop_table('student_attendance_summary', schema='DEVELOPER_01')
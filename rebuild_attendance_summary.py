@@ -0,0 +1,38 @@
+"""
+Script para reconstruir student_attendance_summary y attendance_daily_rollup
+Recalcula los contadores desde attendance_records y el archivo de semestres (reparación)
+"""
+from app import create_app, db
+from app.models.student_attendance_summary import StudentAttendanceSummary
+from app.models.attendance_daily_rollup import AttendanceDailyRollup
+from app.models.attendance_record_archive import AttendanceRecordArchive
+from app.services.attendance_summary_service import AttendanceSummaryService
+from datetime import datetime
+
+def rebuild_attendance_summary():
+    """Crea las tablas si no existen y recalcula todos los contadores"""
+    app = create_app()
+    
+    with app.app_context():
+        print('\n' + '='*60)
+        print(f'🔧 RECONSTRUCCIÓN DEL RESUMEN DE ASISTENCIA')
+        print(f'📅 Fecha: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+        print('='*60 + '\n')
+        
+        StudentAttendanceSummary.__table__.create(bind=db.engine, checkfirst=True)
+        AttendanceDailyRollup.__table__.create(bind=db.engine, checkfirst=True)
+        AttendanceRecordArchive.__table__.create(bind=db.engine, checkfirst=True)
+        
+        rows = AttendanceSummaryService.rebuild()
+        
+        print(f'✅ Filas de resumen generadas (estudiante, curso): {rows["summary_rows"]}')
+        print(f'✅ Acumulados diarios generados (estudiante, día): {rows["rollup_rows"]}')
+        print('='*60 + '\n')
+
+if __name__ == '__main__':
+    try:
+        rebuild_attendance_summary()
+    except Exception as e:
+        print(f'\n❌ ERROR CRÍTICO: {str(e)}\n')
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,40 @@
+"""
+Script para reconstruir justification_counters
+Recalcula los contadores por estado (global, estudiante, curso y profesor)
+desde justifications; se ejecuta al crear la tabla o para reparar desvíos
+(por ejemplo, si un curso cambió de profesor)
+"""
+from app import create_app, db
+from app.models.justification_counter import JustificationCounter
+from app.services.justification_counter_service import JustificationCounterService
+from datetime import datetime
+
+def rebuild_justification_counters():
+    """Crea la tabla si no existe y recalcula todos los contadores"""
+    app = create_app()
+    
+    with app.app_context():
+        print('\n' + '='*60)
+        print(f'🔧 RECONSTRUCCIÓN DE CONTADORES DE JUSTIFICACIONES')
+        print(f'📅 Fecha: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+        print('='*60 + '\n')
+        
+        JustificationCounter.__table__.create(bind=db.engine, checkfirst=True)
+        
+        rows = JustificationCounterService.rebuild()
+        
+        for scope, count in rows.items():
+            print(f'✅ Contadores {scope}: {count}')
+        
+        counts = JustificationCounterService.get_counts('GLOBAL', 0)
+        print(f'\n📊 Total: {counts["total"]} | Pendientes: {counts["pending"]} | '
+              f'Aprobadas: {counts["approved"]} | Rechazadas: {counts["rejected"]}')
+        print('='*60 + '\n')
+
+if __name__ == '__main__':
+    try:
+        rebuild_justification_counters()
+    except Exception as e:
+        print(f'\n❌ ERROR CRÍTICO: {str(e)}\n')
+        import traceback
+        traceback.print_exc()
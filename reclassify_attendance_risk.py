@@ -0,0 +1,36 @@
+"""
+Script para recalcular el nivel de riesgo del resumen de asistencia
+Ejecutar después de cambiar RISK_THRESHOLDS, RISK_THRESHOLDS_BY_CAREER o RISK_THRESHOLDS_BY_COURSE
+"""
+from app import create_app
+from app.services.attendance_summary_service import AttendanceSummaryService
+from app.services.risk_policy import RiskPolicy
+from datetime import datetime
+
+def reclassify_attendance_risk():
+    """Aplica la política de riesgo vigente a student_attendance_summary en un solo UPDATE"""
+    app = create_app()
+    
+    with app.app_context():
+        print('\n' + '='*60)
+        print(f'🎯 RECLASIFICACIÓN DE NIVELES DE RIESGO')
+        print(f'📅 Fecha: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+        print('='*60 + '\n')
+        
+        policy = RiskPolicy.current()
+        print(f'📏 Umbrales por defecto: {policy.thresholds}')
+        print(f'📏 Excepciones por carrera: {len(policy.by_career)}')
+        print(f'📏 Excepciones por curso: {len(policy.by_course)}\n')
+        
+        rows = AttendanceSummaryService.reclassify()
+        
+        print(f'✅ Filas reclasificadas: {rows}')
+        print('='*60 + '\n')
+
+if __name__ == '__main__':
+    try:
+        reclassify_attendance_risk()
+    except Exception as e:
+        print(f'\n❌ ERROR CRÍTICO: {str(e)}\n')
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,48 @@
+"""
+Script nocturno para conciliar justificaciones aprobadas y asistencia
+Pasa a JUSTIFICADO las inasistencias (AUSENTE) que tienen una justificación
+aprobada del mismo estudiante, curso y fecha, y actualiza el resumen y los
+acumulados diarios de asistencia en la misma transacción
+Programar con cron/task scheduler
+Uso: python reconcile_justified_attendance.py [--dry-run] [--batch-size N]
+"""
+from app import create_app
+from app.services.justification_reconciliation_service import JustificationReconciliationService
+from datetime import datetime
+import argparse
+
+def reconcile_justified_attendance(dry_run=False, batch_size=None):
+    """Corrige por bloques las inasistencias con justificación aprobada"""
+    app = create_app()
+    
+    with app.app_context():
+        print('\n' + '='*60)
+        print(f'🔄 CONCILIACIÓN DE JUSTIFICACIONES APROBADAS')
+        print(f'📅 Fecha: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+        print('='*60 + '\n')
+        
+        pending = JustificationReconciliationService.count_mismatches()
+        print(f'🔍 Inasistencias con justificación aprobada: {pending}')
+        
+        if dry_run or not pending:
+            print('='*60 + '\n')
+            return
+        
+        result = JustificationReconciliationService.reconcile(batch_size)
+        
+        print(f'\n✅ Registros pasados a JUSTIFICADO: {result["reconciled"]}')
+        print(f'📦 Bloques: {result["batches"]}')
+        print('='*60 + '\n')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Conciliación de justificaciones aprobadas con la asistencia')
+    parser.add_argument('--dry-run', action='store_true', help='Solo contar los registros a corregir')
+    parser.add_argument('--batch-size', type=int, default=None, help='Registros por commit')
+    args = parser.parse_args()
+    
+    try:
+        reconcile_justified_attendance(args.dry_run, args.batch_size)
+    except Exception as e:
+        print(f'\n❌ ERROR CRÍTICO: {str(e)}\n')
+        import traceback
+        traceback.print_exc()
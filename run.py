@@ -1,5 +1,6 @@
 import os
 from app import create_app
+from app.services.email_outbox_service import EmailOutboxService
 
 # ===========================================================
 # 🚀 1. CONFIGURACIÓN PARA ORACLE EN MODO THIN (Render compatible)
@@ -39,6 +40,9 @@ validate_wallet()
 
 app = create_app()
 
+# Envío en segundo plano de los emails encolados (solo en el proceso web)
+EmailOutboxService.init_app(app)
+
 if __name__ == "__main__":
     debug_mode = os.getenv("FLASK_DEBUG", "true").lower() == "true"
 
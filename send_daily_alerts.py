@@ -5,8 +5,9 @@ Ejecutar manualmente o programar con cron/task scheduler
 from app import create_app, db
 from app.models.student import Student
 from app.services.statistics_service import StatisticsService
+from app.services.attendance_summary_service import AttendanceSummaryService
 from app.services.email_service import EmailService
-from datetime import datetime
+from datetime import datetime, date, timedelta
 
 def send_daily_attendance_alerts():
     """Envía alertas diarias a estudiantes con inasistencias críticas"""
@@ -20,25 +21,47 @@ def send_daily_attendance_alerts():
         
         print('🔍 Buscando estudiantes con alertas de inasistencia...\n')
         
-        # Obtener todos los estudiantes activos
-        students = Student.query.filter_by(status='A').all()
-        print(f'📊 Total de estudiantes activos: {len(students)}\n')
+        total_active = Student.query.filter_by(status='A').count()
+        print(f'📊 Total de estudiantes activos: {total_active}\n')
         
+        # Clasificación en la base de datos con la política de riesgo (RiskPolicy):
+        # solo se traen los estudiantes EN_RIESGO o CRITICO
         critical_students = []
         risk_students = []
         
-        for student in students:
-            # Calcular estadísticas
-            stats = StatisticsService.calculate_student_attendance(student.id)
+        for row in StatisticsService.risk_cohort_query(min_risk_level='EN_RIESGO'):
+            stats = StatisticsService._build_attendance_stats(
+                row.total_classes, row.present, row.absent, row.justified, row.late,
+                career=row.Student.career
+            )
             
-            # Clasificar por nivel de riesgo
-            if stats['absence_percentage'] >= 30:
-                critical_students.append((student, stats))
-            elif stats['absence_percentage'] >= 25:
-                risk_students.append((student, stats))
+            if row.risk_level == 'CRITICO':
+                critical_students.append((row.Student, stats))
+            else:
+                risk_students.append((row.Student, stats))
         
-        print(f'❌ Estudiantes CRÍTICOS (≥30% inasistencias): {len(critical_students)}')
-        print(f'🟠 Estudiantes EN RIESGO (25-29% inasistencias): {len(risk_students)}\n')
+        # Deterioro reciente: crítico en los últimos 30 días (acumulados diarios)
+        # aunque el total histórico no lo sea
+        today = date.today()
+        already_critical = {student.id for student, _ in critical_students}
+        recent_critical_students = []
+        
+        for row in AttendanceSummaryService.window_cohort_query(
+            today - timedelta(days=29), today, min_risk_level='CRITICO'
+        ):
+            if row.Student.id in already_critical:
+                continue
+            
+            recent_critical_students.append((row.Student, StatisticsService._build_attendance_stats(
+                row.total_classes, row.present, row.absent, row.justified, row.late,
+                career=row.Student.career
+            )))
+        
+        print(f'❌ Estudiantes CRÍTICOS: {len(critical_students)}')
+        print(f'🟠 Estudiantes EN RIESGO: {len(risk_students)}')
+        print(f'📉 Estudiantes CRÍTICOS en los últimos 30 días: {len(recent_critical_students)}\n')
+        
+        critical_students.extend(recent_critical_students)
         
         # Enviar alertas solo a estudiantes críticos
         alerts_sent = 0
@@ -0,0 +1,41 @@
+"""
+Script para enviar los emails encolados (email_notifications en PENDING)
+Útil cuando EMAIL_OUTBOX_WORKER está desactivado o para reintentar los fallidos
+Uso: python send_pending_emails.py [--retry-failed]
+"""
+from app import create_app
+from app.services.email_outbox_service import EmailOutboxService
+from datetime import datetime
+import argparse
+
+def send_pending_emails(retry_failed=False):
+    """Vacía la cola de emails en lotes y muestra el resultado"""
+    app = create_app()
+    
+    with app.app_context():
+        print('\n' + '='*60)
+        print(f'📧 ENVÍO DE EMAILS ENCOLADOS')
+        print(f'📅 Fecha: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+        print('='*60 + '\n')
+        
+        if retry_failed:
+            requeued = EmailOutboxService.retry_failed()
+            print(f'🔁 Emails fallidos reencolados: {requeued}')
+        
+        result = EmailOutboxService.send_all()
+        
+        print(f'✅ Enviados: {result["sent"]}')
+        print(f'❌ Fallidos: {result["failed"]}')
+        print('='*60 + '\n')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Envío de los emails encolados')
+    parser.add_argument('--retry-failed', action='store_true', help='Reencolar los emails FAILED antes de enviar')
+    args = parser.parse_args()
+    
+    try:
+        send_pending_emails(args.retry_failed)
+    except Exception as e:
+        print(f'\n❌ ERROR CRÍTICO: {str(e)}\n')
+        import traceback
+        traceback.print_exc()
@@ -1,3 +1,7 @@
 from app import create_app
+from app.services.email_outbox_service import EmailOutboxService
 
 app = create_app()
+
+# Envío en segundo plano de los emails encolados (solo en el proceso web)
+EmailOutboxService.init_app(app)